@@ -2,12 +2,13 @@
 LLM Module for Pryzm Project
 
 Contains LLM-related functionality:
-- OpenAI embeddings
+- OpenAI embeddings (with query embedding cache)
 - Context processing
 - LLM client wrapper
 """
 
-from .embeddings import embed_text, embed_batch, embed_query
+from .embeddings import embed_text, embed_batch, embed_query, embed_queries, aembed_text, aembed_query, aembed_queries, EmbeddingCache, embedding_cache, EmbeddingCoalescer, embedding_coalescer
+from .cache import LRUCache, normalize_query
 from .context_processor import ContextProcessor, process_context, EvidenceBlock
 from .retriever import HybridRetriever, get_retriever, RetrievalConfig, SearchResult
 from .llm import OpenRouterClient
@@ -16,6 +17,16 @@ __all__ = [
     'embed_text',
     'embed_batch', 
     'embed_query',
+    'embed_queries',
+    'aembed_text',
+    'aembed_query',
+    'aembed_queries',
+    'EmbeddingCache',
+    'embedding_cache',
+    'EmbeddingCoalescer',
+    'embedding_coalescer',
+    'LRUCache',
+    'normalize_query',
     'ContextProcessor',
     'process_context',
     'EvidenceBlock',
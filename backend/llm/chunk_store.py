@@ -0,0 +1,368 @@
+"""
+Columnar Chunk Store for Pryzm Project
+
+Keeps chunk metadata in memory as compact arrays indexed by a dense
+chunk id (position in rowid order), so retrieval stages can pass integer
+ids around and hydrate results with one array gather instead of one SQL
+lookup per hit. Chunk text stays in SQLite and is fetched lazily, in batches.
+
+Metadata filters (doc_id, doctype, date range) are answered from
+precomputed per-facet postings, so a filter becomes an id mask without
+touching SQLite.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+import numpy as np
+from llm.db_pool import SQLitePool
+from llm.cache import LRUCache
+
+
+# Normalized filter: (doc_ids, doctypes, date_from, date_to)
+FilterKey = Tuple[Tuple[str, ...], Tuple[str, ...], Optional[str], Optional[str]]
+
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> Optional[FilterKey]:
+    """
+    Normalize a filter dict into a hashable key.
+
+    Accepted keys: doc_ids / doctypes (a string or list of strings) and
+    date_from / date_to (inclusive, compared as ISO date strings).
+
+    Args:
+        filters: Filter dict (None or all-empty = no filtering)
+
+    Returns:
+        FilterKey, or None if nothing is filtered
+    """
+    if not filters:
+        return None
+
+    def values(name: str) -> Tuple[str, ...]:
+        value: Union[None, str, Sequence[str]] = filters.get(name)
+        if value is None:
+            return ()
+        if isinstance(value, str):
+            value = [value]
+        return tuple(sorted(set(value)))
+
+    key = (values('doc_ids'), values('doctypes'), filters.get('date_from') or None, filters.get('date_to') or None)
+    return key if any(key) else None
+
+
+def _postings(codes: np.ndarray, num_values: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build an inverted index from dictionary codes to ids.
+
+    Returns:
+        Tuple of (ids grouped by code, offsets) - ids for code c are order[offsets[c]:offsets[c + 1]]
+    """
+    order = np.argsort(codes, kind='stable').astype(np.int32)
+    offsets = np.zeros(num_values + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=num_values), out=offsets[1:])
+    return order, offsets
+
+
+def _intern(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """
+    Dictionary-encode a column of (mostly repeated) strings.
+
+    Args:
+        values: Column values
+
+    Returns:
+        Tuple of (int32 codes, lookup table)
+    """
+    table: List[Optional[str]] = []
+    index: Dict[Optional[str], int] = {}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        code = index.get(value)
+        if code is None:
+            code = len(table)
+            index[value] = code
+            table.append(value)
+        codes[i] = code
+    return codes, table
+
+
+class ChunkStore:
+    """
+    In-memory columnar view of the chunks table.
+
+    Ids are dense integers 0..N-1 in chunks.rowid order. FAISS labels and
+    FTS5 rowids are translated to ids with a single array gather.
+    Repeated string columns (doc_id, title, url, ...) are dictionary-encoded.
+    """
+
+    # Max bound parameters per "WHERE rowid IN (...)" query
+    _TEXT_BATCH = 500
+
+    def __init__(
+        self,
+        db: SQLitePool,
+        text_cache_size: int = 2048,
+        filter_cache_size: int = 256
+    ):
+        """
+        Load chunk metadata from SQLite.
+
+        Args:
+            db: SQLite connection pool
+            text_cache_size: Number of chunk texts kept in the LRU text cache
+            filter_cache_size: Number of filter masks kept (LRU)
+        """
+        self.db = db
+        self.text_cache_size = text_cache_size
+        self._text_cache: "OrderedDict[int, str]" = OrderedDict()
+        self._text_lock = threading.Lock()
+        self._filter_cache = LRUCache(filter_cache_size)
+        self._load()
+
+    def _load(self):
+        """Read all chunk metadata (without text) in rowid order"""
+        with self.db.connection() as conn:
+            # Optional columns are missing in databases created before them
+            self.columns = {row[1] for row in conn.execute("PRAGMA table_info(chunks)")}
+            optional = ", ".join(
+                name if name in self.columns else "NULL"
+                for name in ("simhash", "token_count", "char_start", "char_end")
+            )
+            rows = conn.execute(
+                f"""SELECT rowid, chunk_id, doc_id, doc_title, source_url, date, doctype,
+                          page, section_path, is_table, {optional}
+                   FROM chunks ORDER BY rowid"""
+            ).fetchall()
+
+        self.rowids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.chunk_ids: List[str] = [row[1] for row in rows]
+        self.doc_id_codes, self.doc_ids = _intern([row[2] for row in rows])
+        self.doc_title_codes, self.doc_titles = _intern([row[3] for row in rows])
+        self.source_url_codes, self.source_urls = _intern([row[4] for row in rows])
+        self.date_codes, self.dates = _intern([row[5] for row in rows])
+        self.doctype_codes, self.doctypes = _intern([row[6] for row in rows])
+        self.section_path_codes, raw_paths = _intern([row[8] for row in rows])
+        self.section_paths = [json.loads(p) if p else [] for p in raw_paths]
+        self.pages = np.array([row[7] or 0 for row in rows], dtype=np.int32)
+        self.is_table = np.array([bool(row[9]) for row in rows], dtype=bool)
+        # SimHash per chunk for near-duplicate removal (None = not fingerprinted, see ingest_to_db.py)
+        self.simhashes = np.array([row[10] or 0 for row in rows], dtype=np.int64)
+        self.has_simhash = np.array([row[10] is not None for row in rows], dtype=bool)
+        # Token count per chunk, so context packing does not re-tokenize (-1 = unknown)
+        self.token_counts = np.array([-1 if row[11] is None else row[11] for row in rows], dtype=np.int32)
+        # Character span within the page text, for overlap-free merging (-1 = unknown)
+        self.char_starts = np.array([-1 if row[12] is None else row[12] for row in rows], dtype=np.int32)
+        self.char_ends = np.array([-1 if row[13] is None else row[13] for row in rows], dtype=np.int32)
+
+        # Dense rowid -> id lookup (rowids are small, contiguous integers)
+        max_rowid = int(self.rowids.max()) if len(self.rowids) else -1
+        self.rowid_to_id = np.full(max_rowid + 1, -1, dtype=np.int32)
+        self.rowid_to_id[self.rowids] = np.arange(len(self.rowids), dtype=np.int32)
+
+        # Facet postings for filtering
+        self._doc_id_postings = _postings(self.doc_id_codes, len(self.doc_ids))
+        self._doctype_postings = _postings(self.doctype_codes, len(self.doctypes))
+        date_values = np.array([d or '' for d in self.dates], dtype=str)[self.date_codes]
+        self._date_order = np.argsort(date_values, kind='stable').astype(np.int32)
+        self._date_sorted = date_values[self._date_order]  # Missing dates ('') sort first
+        self._num_undated = int(np.searchsorted(self._date_sorted, '', side='right'))
+
+        missing = int((~self.has_simhash).sum())
+        uncounted = int((self.token_counts < 0).sum())
+        print(f"[ChunkStore] Loaded metadata for {len(self.rowids)} chunks")
+        if missing:
+            print(f"[ChunkStore] {missing} chunks have no SimHash fingerprint (re-run ingestion to add them)")
+        if uncounted:
+            print(f"[ChunkStore] {uncounted} chunks have no token count (re-run ingestion to add them)")
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    def ids_from_rowids(self, rowids: np.ndarray) -> np.ndarray:
+        """
+        Map SQLite rowids to store ids.
+
+        Args:
+            rowids: Array of chunks.rowid values
+
+        Returns:
+            int64 array of ids (-1 where the rowid is unknown)
+        """
+        rowids = np.asarray(rowids, dtype=np.int64)
+        ids = np.full(len(rowids), -1, dtype=np.int64)
+        in_range = (rowids >= 0) & (rowids < len(self.rowid_to_id))
+        ids[in_range] = self.rowid_to_id[rowids[in_range]]
+        return ids
+
+    def ids_from_chunk_ids(self, chunk_ids: Sequence[str]) -> np.ndarray:
+        """
+        Map chunk_id strings to store ids (used for legacy FAISS mappings).
+
+        Args:
+            chunk_ids: chunk_id values
+
+        Returns:
+            int64 array of ids (-1 where the chunk_id is unknown)
+        """
+        by_chunk_id = {chunk_id: i for i, chunk_id in enumerate(self.chunk_ids)}
+        return np.array([by_chunk_id.get(chunk_id, -1) for chunk_id in chunk_ids], dtype=np.int64)
+
+    def _facet_ids(self, postings: Tuple[np.ndarray, np.ndarray], table: List[Optional[str]], wanted: Sequence[str]) -> np.ndarray:
+        """Ids whose facet value is one of wanted"""
+        order, offsets = postings
+        wanted = set(wanted)
+        codes = [code for code, value in enumerate(table) if value in wanted]
+        if not codes:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate([order[offsets[c]:offsets[c + 1]] for c in codes])
+
+    def _date_ids(self, date_from: Optional[str], date_to: Optional[str]) -> np.ndarray:
+        """Ids with date_from <= date <= date_to (chunks without a date never match)"""
+        lo = self._num_undated
+        if date_from:
+            lo = max(lo, int(np.searchsorted(self._date_sorted, date_from, side='left')))
+        hi = len(self._date_sorted)
+        if date_to:
+            # Inclusive upper bound that also covers longer values with the same prefix (e.g. timestamps)
+            hi = int(np.searchsorted(self._date_sorted, date_to + '\uffff', side='right'))
+        return self._date_order[lo:max(lo, hi)]
+
+    def filter_mask(self, key: Optional[FilterKey]) -> Optional[np.ndarray]:
+        """
+        Resolve a normalized filter to a boolean mask over store ids.
+
+        Each facet is gathered from its postings and the facets are ANDed.
+        Masks are cached per filter, since callers tend to reuse the same filters.
+
+        Args:
+            key: Filter key from normalize_filters()
+
+        Returns:
+            Read-only bool array of length len(self), or None if key is None
+        """
+        if key is None:
+            return None
+        mask = self._filter_cache.get(key)
+        if mask is not None:
+            return mask
+
+        doc_ids, doctypes, date_from, date_to = key
+        mask = np.ones(len(self), dtype=bool)
+        for facet_ids in (
+            self._facet_ids(self._doc_id_postings, self.doc_ids, doc_ids) if doc_ids else None,
+            self._facet_ids(self._doctype_postings, self.doctypes, doctypes) if doctypes else None,
+            self._date_ids(date_from, date_to) if (date_from or date_to) else None
+        ):
+            if facet_ids is None:
+                continue
+            facet = np.zeros(len(self), dtype=bool)
+            facet[facet_ids] = True
+            mask &= facet
+
+        mask.setflags(write=False)
+        self._filter_cache.put(key, mask)
+        return mask
+
+    def get_texts(self, ids: Sequence[int]) -> List[str]:
+        """
+        Fetch chunk texts, loading cache misses from SQLite in batched queries.
+
+        Args:
+            ids: Store ids
+
+        Returns:
+            Texts in the same order as ids
+        """
+        ids = [int(i) for i in ids]
+        texts: Dict[int, str] = {}
+        with self._text_lock:
+            for i in ids:
+                text = self._text_cache.get(i)
+                if text is not None:
+                    self._text_cache.move_to_end(i)
+                    texts[i] = text
+
+        missing = [i for i in dict.fromkeys(ids) if i not in texts]
+        for start in range(0, len(missing), self._TEXT_BATCH):
+            batch = missing[start:start + self._TEXT_BATCH]
+            rowid_to_id = {int(self.rowids[i]): i for i in batch}
+            placeholders = ",".join("?" * len(batch))
+            with self.db.connection() as conn:
+                rows = conn.execute(
+                    f"SELECT rowid, text FROM chunks WHERE rowid IN ({placeholders})",
+                    list(rowid_to_id.keys())
+                ).fetchall()
+            for rowid, text in rows:
+                texts[rowid_to_id[rowid]] = text
+
+        if missing:
+            with self._text_lock:
+                for i in missing:
+                    if i in texts:
+                        self._text_cache[i] = texts[i]
+                while len(self._text_cache) > self.text_cache_size:
+                    self._text_cache.popitem(last=False)
+
+        return [texts.get(i, '') for i in ids]
+
+    def hydrate(
+        self,
+        ids: np.ndarray,
+        scores: Optional[Dict[str, np.ndarray]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Build result dictionaries for a list of ids.
+
+        Args:
+            ids: Store ids, in result order
+            scores: Optional score columns aligned with ids (NaN = no score)
+
+        Returns:
+            List of chunk dictionaries in the retriever's result format
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        scores = scores or {}
+        texts = self.get_texts(ids)
+
+        # Column gathers
+        doc_ids = self.doc_id_codes[ids]
+        doc_titles = self.doc_title_codes[ids]
+        source_urls = self.source_url_codes[ids]
+        dates = self.date_codes[ids]
+        doctypes = self.doctype_codes[ids]
+        section_paths = self.section_path_codes[ids]
+        pages = self.pages[ids]
+        is_table = self.is_table[ids]
+        simhashes = self.simhashes[ids]
+        has_simhash = self.has_simhash[ids]
+        token_counts = self.token_counts[ids]
+        char_starts = self.char_starts[ids]
+        char_ends = self.char_ends[ids]
+        score_columns = {name: np.asarray(values, dtype=np.float64) for name, values in scores.items()}
+
+        results = []
+        for j, i in enumerate(ids):
+            result = {
+                'chunk_id': self.chunk_ids[i],
+                'doc_id': self.doc_ids[doc_ids[j]],
+                'doc_title': self.doc_titles[doc_titles[j]],
+                'source_url': self.source_urls[source_urls[j]],
+                'date': self.dates[dates[j]],
+                'doctype': self.doctypes[doctypes[j]],
+                'page': int(pages[j]),
+                'section_path': list(self.section_paths[section_paths[j]]),
+                'text': texts[j],
+                'is_table': bool(is_table[j]),
+                'simhash': int(simhashes[j]) if has_simhash[j] else None,
+                'token_count': int(token_counts[j]) if token_counts[j] >= 0 else None,
+                'char_start': int(char_starts[j]) if char_starts[j] >= 0 else None,
+                'char_end': int(char_ends[j]) if char_ends[j] >= 0 else None
+            }
+            for name, column in score_columns.items():
+                value = column[j]
+                result[name] = None if np.isnan(value) else float(value)
+            results.append(result)
+
+        return results
@@ -2,15 +2,48 @@
 Context Processing Module for Pryzm Project
 
 Handles:
-- Merging adjacent chunks from the same document
+- Merging adjacent chunks from the same document (overlap written once, see llm.stitching)
+- Query-focused sentence extraction for long blocks (see llm.sentence_extraction)
 - Citation formatting
-- Context packing for LLM consumption
+- Context packing for LLM consumption (relevance per token, see pack_context)
+
+Processors hold no per-request state, so routes create one per
+configuration at import time and reuse it. Token counts come from
+chunks.token_count (counted at ingestion); only truncated blocks, or
+chunks without a stored count, are tokenized per request.
 """
 
+import math
+import time
 from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
+import numpy as np
 import tiktoken
 from collections import defaultdict
+from llm.fingerprint import hamming_distance, lsh_bands, band_keys
+from llm.fusion import rrf_scores, normalize_scores
+from llm.stitching import splice
+from llm.sentence_extraction import split_sentences, terms, sentence_idf, score_sentences, select_sentences, stitch
+
+
+# rank: top blocks in rank order until one overflows the budget
+# density: greedy by relevance per token
+# knapsack: exact max total relevance under the token budget and block cap
+PACKING_STRATEGIES = ('rank', 'density', 'knapsack')
+
+# Token estimate for texts without a stored count
+CHARS_PER_TOKEN = 4
+
+# Knapsack token budget is split into at most this many buckets (weights round up,
+# so the packed total never exceeds the budget)
+KNAPSACK_BUCKETS = 1024
+
+
+@lru_cache(maxsize=None)
+def get_encoder(encoding_model: str = "cl100k_base") -> tiktoken.Encoding:
+    """Shared tiktoken encoding (loaded once per process, thread-safe)"""
+    return tiktoken.get_encoding(encoding_model)
 
 
 @dataclass
@@ -29,6 +62,85 @@ class EvidenceBlock:
     chunk_ids: List[str]  # Original chunk IDs for traceability
     citation: str  # Formatted citation like "[Title p.12-13]"
     token_count: int
+    final_rank: Optional[int] = None  # Best rank among the block's chunks
+    scores: Dict[str, Optional[float]] = field(default_factory=dict)  # Scores of that chunk
+    relevance: float = 0.0  # Set by pack_context
+
+
+def block_relevance(blocks: List[EvidenceBlock]) -> np.ndarray:
+    """
+    Relevance of each block on one scale, for packing.
+    
+    Uses the reranker score (already a [0, 1] probability) when every block
+    has one, otherwise the fused score relative to the best block (min-max
+    normalized if it can be negative, e.g. zscore fusion), otherwise RRF of
+    the block order.
+    
+    Args:
+        blocks: Evidence blocks in rank order
+        
+    Returns:
+        float64 array of non-negative relevances aligned with blocks
+    """
+    for name in ('rerank', 'rrf'):
+        values = [block.scores.get(name) for block in blocks]
+        if blocks and all(value is not None for value in values):
+            values = np.asarray(values, dtype=np.float64)
+            if name == 'rerank':
+                return np.clip(values, 0.0, None)
+            if values.min() < 0:
+                return normalize_scores(values, 'minmax')
+            return values / values.max() if values.max() > 0 else np.ones_like(values)
+    relevance = rrf_scores(len(blocks), 60)
+    return relevance / relevance[0] if len(blocks) else relevance
+
+
+def _knapsack(weights: np.ndarray, values: np.ndarray, capacity: int, max_items: int) -> List[int]:
+    """
+    0/1 knapsack with a cardinality limit (dynamic programming over budget x item count).
+    
+    Args:
+        weights: Integer weights (token counts)
+        values: Item values (relevance)
+        capacity: Weight budget
+        max_items: Maximum number of items taken
+        
+    Returns:
+        Indices of the chosen items, ascending
+    """
+    n = len(weights)
+    max_items = min(max_items, n)
+    if n == 0 or capacity <= 0 or max_items <= 0:
+        return []
+    
+    # Bucket the budget; weights round up so a solution never exceeds the real capacity
+    scale = max(1, -(-capacity // KNAPSACK_BUCKETS))
+    buckets = capacity // scale
+    weights = -(-np.asarray(weights, dtype=np.int64) // scale)
+    
+    # best[c, b]: max value with c items and at most b buckets used
+    best = np.full((max_items + 1, buckets + 1), -np.inf)
+    best[0, :] = 0.0
+    taken = np.zeros((n, max_items + 1, buckets + 1), dtype=bool)
+    for i in range(n):
+        w = int(weights[i])
+        if w > buckets:
+            continue
+        for c in range(max_items, 0, -1):
+            candidate = best[c - 1, :buckets + 1 - w] + values[i]
+            better = candidate > best[c, w:]
+            best[c, w:][better] = candidate[better]
+            taken[i, c, w:] = better
+    
+    # Walk back from the best cell
+    c, b = np.unravel_index(int(np.argmax(best)), best.shape)
+    chosen = []
+    for i in range(n - 1, -1, -1):
+        if c > 0 and taken[i, c, b]:
+            chosen.append(i)
+            b -= int(weights[i])
+            c -= 1
+    return sorted(chosen)
 
 
 class ContextProcessor:
@@ -49,7 +161,11 @@ class ContextProcessor:
         max_blocks_per_doc: int = 4,
         max_evidence_blocks: int = 10,
         max_block_chars: int = None,
+        max_block_tokens: int = None,
         text_similarity_threshold: float = 0.85,
+        simhash_max_distance: int = 6,
+        packing: str = "knapsack",
+        min_blocks_per_doc: int = 1,
         encoding_model: str = "cl100k_base"
     ):
         """
@@ -60,8 +176,17 @@ class ContextProcessor:
             context_fill_ratio: Target % of tokens to fill (0.60-0.75 recommended)
             max_blocks_per_doc: Maximum merged blocks per document
             max_evidence_blocks: Maximum total evidence blocks to include
-            max_block_chars: Maximum characters per evidence block (None = no limit)
-            text_similarity_threshold: Threshold for text deduplication (0.0-1.0)
+            max_block_chars: Maximum characters per evidence block (None = no limit); blind
+                             truncation, used when sentence extraction does not apply
+            max_block_tokens: Token cap per evidence block, met by keeping the sentences
+                              that best match the query (None = no extraction)
+            text_similarity_threshold: Threshold for text deduplication (0.0-1.0), used for chunks
+                                       without a SimHash fingerprint
+            simhash_max_distance: Max differing SimHash bits (of 64) for a near-duplicate
+            packing: Block selection under the token budget, one of PACKING_STRATEGIES
+            min_blocks_per_doc: Blocks reserved for each document ranked in the top
+                                max_evidence_blocks before optimizing (0 = no coverage
+                                constraint; not used by 'rank' packing)
             encoding_model: Tiktoken encoding model (cl100k_base for GPT-3.5/4)
         """
         self.max_context_tokens = max_context_tokens
@@ -69,10 +194,17 @@ class ContextProcessor:
         self.max_blocks_per_doc = max_blocks_per_doc
         self.max_evidence_blocks = max_evidence_blocks
         self.max_block_chars = max_block_chars
+        self.max_block_tokens = max_block_tokens
         self.text_similarity_threshold = text_similarity_threshold
+        self.simhash_max_distance = simhash_max_distance
+        self._simhash_bands = lsh_bands(simhash_max_distance)
+        if packing not in PACKING_STRATEGIES:
+            raise ValueError(f"Unknown packing strategy: {packing} (expected one of {PACKING_STRATEGIES})")
+        self.packing = packing
+        self.min_blocks_per_doc = min_blocks_per_doc
         
-        # Initialize token encoder
-        self.encoder = tiktoken.get_encoding(encoding_model)
+        # Shared token encoder
+        self.encoder = get_encoder(encoding_model)
         
         # Calculate target token budget for evidence
         self.target_tokens = int(max_context_tokens * context_fill_ratio)
@@ -88,11 +220,13 @@ class ContextProcessor:
         """
         Remove chunks with very similar text content.
         
-        Uses difflib's SequenceMatcher for fast text comparison.
-        Only compares first 500 chars for efficiency.
+        Chunks with a 'simhash' fingerprint (chunks.simhash, computed at ingestion)
+        are compared by Hamming distance, and only against earlier chunks that
+        share an LSH band bucket. Chunks without one (database not re-ingested yet)
+        fall back to difflib's SequenceMatcher on the first 500 chars.
         
         Args:
-            chunks: List of chunk dictionaries with 'text' field
+            chunks: List of chunk dictionaries with 'text' (and optionally 'simhash') fields
             
         Returns:
             Deduplicated list of chunks
@@ -104,23 +238,35 @@ class ContextProcessor:
         
         unique_chunks = []
         duplicates_removed = 0
+        buckets: Dict[tuple, List[int]] = defaultdict(list)  # LSH band key -> kept fingerprints
         
         for chunk in chunks:
             is_duplicate = False
-            # Only compare first 500 chars for efficiency
-            chunk_text = chunk['text'][:500]
+            fingerprint = chunk.get('simhash')
             
-            for existing in unique_chunks:
-                existing_text = existing['text'][:500]
-                # Calculate similarity ratio
-                ratio = SequenceMatcher(None, chunk_text, existing_text).ratio()
-                
-                if ratio > self.text_similarity_threshold:
-                    is_duplicate = True
-                    duplicates_removed += 1
-                    break
+            if fingerprint is not None:
+                keys = band_keys(fingerprint, self._simhash_bands)
+                is_duplicate = any(
+                    hamming_distance(fingerprint, other) <= self.simhash_max_distance
+                    for key in keys for other in buckets.get(key, ())
+                )
+                if not is_duplicate:
+                    for key in keys:
+                        buckets[key].append(fingerprint)
+            else:
+                # Only compare first 500 chars for efficiency
+                chunk_text = chunk['text'][:500]
+                for existing in unique_chunks:
+                    existing_text = existing['text'][:500]
+                    # Calculate similarity ratio
+                    ratio = SequenceMatcher(None, chunk_text, existing_text).ratio()
+                    if ratio > self.text_similarity_threshold:
+                        is_duplicate = True
+                        break
             
-            if not is_duplicate:
+            if is_duplicate:
+                duplicates_removed += 1
+            else:
                 unique_chunks.append(chunk)
         
         if duplicates_removed > 0:
@@ -198,7 +344,8 @@ class ContextProcessor:
                         'page_start': chunk['page'],
                         'page_end': chunk['page'],
                         'section_path': chunk.get('section_path', []),
-                        'texts': [chunk['text']],
+                        'parts': [chunk],
+                        'token_counts': [chunk.get('token_count')],
                         'is_table': chunk.get('is_table', False),
                         # Preserve scores for reference
                         'scores': {
@@ -220,7 +367,19 @@ class ContextProcessor:
                         # Merge into current block
                         current_block['chunk_ids'].append(chunk['chunk_id'])
                         current_block['page_end'] = chunk['page']
-                        current_block['texts'].append(chunk['text'])
+                        current_block['parts'].append(chunk)
+                        current_block['token_counts'].append(chunk.get('token_count'))
+                        
+                        # The block ranks (and scores) as its best chunk
+                        rank = chunk.get('final_rank')
+                        if rank is not None and (current_block['final_rank'] is None or rank < current_block['final_rank']):
+                            current_block['final_rank'] = rank
+                            current_block['scores'] = {
+                                'rerank': chunk.get('rerank_score'),
+                                'rrf': chunk.get('rrf_score'),
+                                'bm25': chunk.get('bm25_score'),
+                                'faiss': chunk.get('faiss_score')
+                            }
                         
                         # Update source_url to end page if different
                         if chunk['page'] != current_block['page_start']:
@@ -239,7 +398,8 @@ class ContextProcessor:
                             'page_start': chunk['page'],
                             'page_end': chunk['page'],
                             'section_path': chunk.get('section_path', []),
-                            'texts': [chunk['text']],
+                            'parts': [chunk],
+                            'token_counts': [chunk.get('token_count')],
                             'is_table': chunk.get('is_table', False),
                             'scores': {
                                 'rerank': chunk.get('rerank_score'),
@@ -257,10 +417,15 @@ class ContextProcessor:
             # Cap blocks per document
             merged_blocks = merged_blocks[:self.max_blocks_per_doc]
             
-            # Combine texts in each block
+            # Combine texts in each block, writing the overlap of consecutive chunks once
             for block in merged_blocks:
-                block['text'] = ' '.join(block['texts'])
-                del block['texts']  # Clean up temporary list
+                block['text'], kept = splice(block.pop('parts'))
+                # Stored chunk counts, scaled by the share of each chunk kept (None if
+                # any is unknown); overlaps are whole sentences, so this stays close
+                token_counts = block.pop('token_counts')
+                block['token_count'] = None if None in token_counts else sum(
+                    round(count * share) for count, share in zip(token_counts, kept)
+                )
                 merged_results.append(block)
         
         # Re-sort by original ranking
@@ -300,23 +465,75 @@ class ContextProcessor:
         
         return f"[{title} {page_str}]"
     
+    def extract_sentences(
+        self,
+        merged_chunks: List[Dict[str, Any]],
+        query: str
+    ) -> Dict[int, str]:
+        """
+        Compact blocks over max_block_tokens to their best-matching sentences.
+        
+        Sentences are BM25-scored against the query, with the sentences of all
+        blocks as the collection, and kept best first with the text around
+        them up to max_block_tokens. Sentence costs are estimated from
+        the block's stored token count, so nothing is tokenized here.
+        
+        Args:
+            merged_chunks: Merged chunk dictionaries
+            query: Search query
+            
+        Returns:
+            Compacted text by block index (only blocks that were over the cap)
+        """
+        query_terms = terms(query)
+        blocks = []
+        for chunk in merged_chunks:
+            sentences = split_sentences(chunk['text'])
+            blocks.append((sentences, [terms(sentence) for sentence in sentences]))
+        idf = sentence_idf([t for _, block_terms in blocks for t in block_terms])
+        
+        compacted = {}
+        for i, (chunk, (sentences, block_terms)) in enumerate(zip(merged_chunks, blocks)):
+            text = chunk['text']
+            token_count = chunk.get('token_count') or len(text) / CHARS_PER_TOKEN
+            if token_count <= self.max_block_tokens or len(sentences) < 2:
+                continue
+            tokens_per_char = token_count / max(len(text), 1)
+            costs = [max(1, math.ceil(len(sentence) * tokens_per_char)) for sentence in sentences]
+            scores = score_sentences(block_terms, query_terms, idf)
+            keep = select_sentences(scores, costs, self.max_block_tokens)
+            if keep:
+                compacted[i] = stitch(sentences, keep)
+        return compacted
+    
     def create_evidence_blocks(
         self,
-        merged_chunks: List[Dict[str, Any]]
+        merged_chunks: List[Dict[str, Any]],
+        query: Optional[str] = None
     ) -> List[EvidenceBlock]:
         """
         Create formatted evidence blocks from merged chunks.
         
+        Blocks keep the token count summed from their chunks; only compacted or
+        truncated blocks and blocks without a stored count are tokenized here.
+        
         Args:
             merged_chunks: List of merged chunk dictionaries
+            query: Search query, for sentence extraction (max_block_tokens)
             
         Returns:
             List of EvidenceBlock objects
         """
         evidence_blocks = []
         truncated_count = 0
+        tokenized_count = 0
         
-        for chunk in merged_chunks:
+        compacted = {}
+        compacted_tokens = 0
+        if query and self.max_block_tokens:
+            compacted = self.extract_sentences(merged_chunks, query)
+        
+        for index, chunk in enumerate(merged_chunks):
             citation = self.format_citation(
                 chunk['doc_title'],
                 chunk['page_start'],
@@ -330,11 +547,21 @@ class ContextProcessor:
                 # Use starting page for the link
                 source_url = f"{base_url}#page={chunk['page_start']}"
             
-            # Apply text truncation if max_block_chars is set
+            # Query-focused extraction, else text truncation if max_block_chars is set
             text = chunk['text']
-            if self.max_block_chars and len(text) > self.max_block_chars:
+            token_count = chunk.get('token_count')
+            if index in compacted:
+                text = compacted[index]
+                token_count = None
+            elif self.max_block_chars and len(text) > self.max_block_chars:
                 text = self.truncate_text(text, self.max_block_chars)
                 truncated_count += 1
+                token_count = None
+            if token_count is None:
+                token_count = self.count_tokens(text)
+                tokenized_count += 1
+            if index in compacted:
+                compacted_tokens += token_count
             
             evidence = EvidenceBlock(
                 doc_id=chunk['doc_id'],
@@ -347,16 +574,97 @@ class ContextProcessor:
                 source_url=source_url,
                 chunk_ids=chunk['chunk_ids'],
                 citation=citation,
-                token_count=self.count_tokens(text)
+                token_count=token_count,
+                final_rank=chunk.get('final_rank'),
+                scores=chunk.get('scores', {})
             )
             
             evidence_blocks.append(evidence)
         
+        if compacted:
+            before = sum(len(merged_chunks[i]['text']) for i in compacted)
+            after = sum(len(text) for text in compacted.values())
+            print(f"[ContextProcessor] Sentence extraction: {len(compacted)} blocks compacted to "
+                  f"{compacted_tokens} tokens (cap {self.max_block_tokens} per block, {before} → {after} chars)")
         if truncated_count > 0:
             print(f"[ContextProcessor] Truncated {truncated_count} evidence blocks to {self.max_block_chars} chars")
+        if tokenized_count > 0:
+            print(f"[ContextProcessor] Tokenized {tokenized_count}/{len(evidence_blocks)} evidence blocks")
         
         return evidence_blocks
     
+    def select_blocks(
+        self,
+        evidence_blocks: List[EvidenceBlock],
+        relevance: np.ndarray
+    ) -> Dict[str, Any]:
+        """
+        Choose which blocks to pack, according to self.packing.
+        
+        'density' and 'knapsack' first reserve min_blocks_per_doc blocks (best
+        ranked first) for every document with a block in the top
+        max_evidence_blocks, as long as they fit, then fill the remaining budget
+        and block slots from all blocks.
+        
+        Args:
+            evidence_blocks: Evidence blocks in rank order
+            relevance: Relevance per block (block_relevance)
+            
+        Returns:
+            Dictionary with 'selected' (indices, ascending = rank order),
+            'reserved' (coverage blocks) and 'candidates' (blocks considered)
+        """
+        budget = self.target_tokens
+        max_blocks = self.max_evidence_blocks
+        tokens = np.array([block.token_count for block in evidence_blocks], dtype=np.int64)
+        
+        if self.packing == 'rank':
+            # Original behavior: the top blocks, until one does not fit
+            selected = []
+            used = 0
+            for i in range(min(max_blocks, len(evidence_blocks))):
+                if used + tokens[i] > budget:
+                    break
+                selected.append(i)
+                used += int(tokens[i])
+            return {'selected': selected, 'reserved': [], 'candidates': min(max_blocks, len(evidence_blocks))}
+        
+        # Coverage: reserve the best blocks of each document ranked near the top
+        reserved = []
+        used = 0
+        if self.min_blocks_per_doc > 0:
+            covered_docs = {block.doc_id for block in evidence_blocks[:max_blocks]}
+            per_doc: Dict[str, int] = defaultdict(int)
+            for i, block in enumerate(evidence_blocks):
+                if len(reserved) >= max_blocks:
+                    break
+                if block.doc_id not in covered_docs or per_doc[block.doc_id] >= self.min_blocks_per_doc:
+                    continue
+                if used + tokens[i] <= budget:
+                    reserved.append(i)
+                    used += int(tokens[i])
+                    per_doc[block.doc_id] += 1
+        
+        reserved_set = set(reserved)
+        remaining = np.array([i for i in range(len(evidence_blocks)) if i not in reserved_set], dtype=np.int64)
+        slots = max_blocks - len(reserved)
+        
+        if self.packing == 'density':
+            chosen = []
+            density = relevance[remaining] / np.maximum(tokens[remaining], 1)
+            for j in np.argsort(-density, kind='stable'):
+                if len(chosen) >= slots:
+                    break
+                i = int(remaining[j])
+                if used + tokens[i] <= budget:
+                    chosen.append(i)
+                    used += int(tokens[i])
+        else:
+            picked = _knapsack(tokens[remaining], relevance[remaining], budget - used, slots)
+            chosen = [int(remaining[j]) for j in picked]
+        
+        return {'selected': sorted(reserved + chosen), 'reserved': reserved, 'candidates': len(evidence_blocks)}
+    
     def pack_context(
         self,
         evidence_blocks: List[EvidenceBlock],
@@ -365,29 +673,64 @@ class ContextProcessor:
         """
         Pack evidence blocks into context within token budget.
         
+        Blocks are selected to maximize total relevance within target_tokens
+        and max_evidence_blocks (see select_blocks), then kept in rank order.
+        
         Args:
             evidence_blocks: List of evidence blocks (already ranked)
             query: Optional query string for reference
             
         Returns:
-            Dictionary with packed context and metadata
+            Dictionary with packed context and metadata ('packing' holds the
+            selection statistics)
         """
-        packed_blocks = []
-        total_tokens = 0
-        blocks_included = 0
-        
-        # Limit to max_evidence_blocks
-        evidence_blocks = evidence_blocks[:self.max_evidence_blocks]
-        
-        for block in evidence_blocks:
-            # Check if adding this block would exceed budget
-            if total_tokens + block.token_count <= self.target_tokens:
-                packed_blocks.append(block)
-                total_tokens += block.token_count
-                blocks_included += 1
-            else:
-                # Budget exhausted
+        start = time.perf_counter()
+        relevance = block_relevance(evidence_blocks)
+        for block, value in zip(evidence_blocks, relevance):
+            block.relevance = float(value)
+        
+        selection = self.select_blocks(evidence_blocks, relevance)
+        packed_blocks = [evidence_blocks[i] for i in selection['selected']]
+        total_tokens = sum(block.token_count for block in packed_blocks)
+        blocks_included = len(packed_blocks)
+        selected = set(selection['selected'])
+        
+        # What rank-order packing would have taken, for comparison
+        baseline_tokens = 0
+        baseline_relevance = 0.0
+        baseline_blocks = 0
+        for block in evidence_blocks[:self.max_evidence_blocks]:
+            if baseline_tokens + block.token_count > self.target_tokens:
                 break
+            baseline_tokens += block.token_count
+            baseline_relevance += block.relevance
+            baseline_blocks += 1
+        
+        packed_relevance = float(sum(block.relevance for block in packed_blocks))
+        available_relevance = float(relevance.sum())
+        packing_stats = {
+            'strategy': self.packing,
+            'candidate_blocks': selection['candidates'],
+            'candidate_tokens': int(sum(block.token_count for block in evidence_blocks)),
+            'reserved_blocks': len(selection['reserved']),
+            'excluded_blocks': selection['candidates'] - blocks_included,
+            'docs_packed': len({block.doc_id for block in packed_blocks}),
+            'docs_available': len({block.doc_id for block in evidence_blocks}),
+            'relevance': round(packed_relevance, 4),
+            'relevance_available': round(available_relevance, 4),
+            'relevance_ratio': round(packed_relevance / available_relevance, 4) if available_relevance > 0 else 0,
+            'relevance_per_1k_tokens': round(packed_relevance * 1000 / total_tokens, 4) if total_tokens else 0,
+            'skipped_ranks': [block.final_rank for i, block in enumerate(evidence_blocks) if i not in selected],
+            'rank_order': {
+                'blocks': baseline_blocks,
+                'tokens': baseline_tokens,
+                'relevance': round(baseline_relevance, 4)
+            },
+            'pack_ms': round((time.perf_counter() - start) * 1000, 2)
+        }
+        print(f"[ContextProcessor] Packed {blocks_included}/{len(evidence_blocks)} blocks ({self.packing}): "
+              f"{total_tokens}/{self.target_tokens} tokens, relevance {packed_relevance:.2f} "
+              f"(rank order: {baseline_blocks} blocks, {baseline_tokens} tokens, relevance {baseline_relevance:.2f})")
         
         # Format for LLM consumption
         formatted_evidence = []
@@ -403,7 +746,9 @@ class ContextProcessor:
                 'text': block.text,
                 'source_url': block.source_url,
                 'chunk_ids': block.chunk_ids,
-                'token_count': block.token_count
+                'token_count': block.token_count,
+                'relevance': block.relevance,
+                'scores': block.scores
             })
         
         return {
@@ -415,7 +760,11 @@ class ContextProcessor:
                 'target_tokens': self.target_tokens,
                 'max_tokens': self.max_context_tokens,
                 'fill_ratio': total_tokens / self.target_tokens if self.target_tokens > 0 else 0,
-                'blocks_truncated': len(evidence_blocks) - blocks_included
+                # Blocks of the top max_evidence_blocks left out for the token budget
+                'blocks_truncated': sum(
+                    1 for i in range(min(self.max_evidence_blocks, len(evidence_blocks))) if i not in selected
+                ),
+                'packing': packing_stats
             }
         }
     
@@ -430,7 +779,7 @@ class ContextProcessor:
         Pipeline:
         1. Deduplicate by text similarity
         2. Merge adjacent chunks
-        3. Create evidence blocks with citations (includes truncation)
+        3. Create evidence blocks with citations (includes sentence extraction / truncation)
         4. Pack into token budget
         
         Args:
@@ -446,8 +795,8 @@ class ContextProcessor:
         # Step 2: Merge adjacent chunks
         merged = self.merge_adjacent_chunks(deduped)
         
-        # Step 3: Create evidence blocks (with truncation)
-        evidence_blocks = self.create_evidence_blocks(merged)
+        # Step 3: Create evidence blocks (with sentence extraction / truncation)
+        evidence_blocks = self.create_evidence_blocks(merged, query)
         
         # Step 4: Pack within budget
         packed_context = self.pack_context(evidence_blocks, query)
@@ -455,6 +804,32 @@ class ContextProcessor:
         return packed_context
 
 
+@lru_cache(maxsize=32)
+def get_context_processor(
+    max_context_tokens: int = 32000,
+    context_fill_ratio: float = 0.70,
+    max_evidence_blocks: int = 10,
+    max_block_chars: int = None,
+    text_similarity_threshold: float = 0.85,
+    packing: str = "knapsack",
+    max_block_tokens: int = None,
+    max_blocks_per_doc: int = 4,
+    min_blocks_per_doc: int = 1
+) -> ContextProcessor:
+    """Shared ContextProcessor per configuration (processors are stateless between calls)"""
+    return ContextProcessor(
+        max_context_tokens=max_context_tokens,
+        context_fill_ratio=context_fill_ratio,
+        max_evidence_blocks=max_evidence_blocks,
+        max_block_chars=max_block_chars,
+        text_similarity_threshold=text_similarity_threshold,
+        packing=packing,
+        max_block_tokens=max_block_tokens,
+        max_blocks_per_doc=max_blocks_per_doc,
+        min_blocks_per_doc=min_blocks_per_doc
+    )
+
+
 # Helper function for easy import
 def process_context(
     search_results: List[Dict[str, Any]],
@@ -463,11 +838,17 @@ def process_context(
     context_fill_ratio: float = 0.70,
     max_evidence_blocks: int = 10,
     max_block_chars: int = None,
-    text_similarity_threshold: float = 0.85
+    text_similarity_threshold: float = 0.85,
+    packing: str = "knapsack",
+    max_block_tokens: int = None,
+    max_blocks_per_doc: int = 4,
+    min_blocks_per_doc: int = 1
 ) -> Dict[str, Any]:
     """
     Convenience function to process search results into packed context.
     
+    Reuses the shared processor for this configuration (get_context_processor).
+    
     Args:
         search_results: Search results from retriever
         query: Original query
@@ -476,16 +857,24 @@ def process_context(
         max_evidence_blocks: Maximum total evidence blocks
         max_block_chars: Maximum characters per block (None = no limit)
         text_similarity_threshold: Threshold for text deduplication
+        packing: Block selection strategy (PACKING_STRATEGIES)
+        max_block_tokens: Token cap per block via query-focused sentence extraction
+        max_blocks_per_doc: Maximum merged blocks per document
+        min_blocks_per_doc: Blocks reserved per top-ranked document before optimizing
         
     Returns:
         Packed context dictionary
     """
-    processor = ContextProcessor(
-        max_context_tokens=max_context_tokens,
-        context_fill_ratio=context_fill_ratio,
-        max_evidence_blocks=max_evidence_blocks,
-        max_block_chars=max_block_chars,
-        text_similarity_threshold=text_similarity_threshold
+    processor = get_context_processor(
+        max_context_tokens,
+        context_fill_ratio,
+        max_evidence_blocks,
+        max_block_chars,
+        text_similarity_threshold,
+        packing,
+        max_block_tokens,
+        max_blocks_per_doc,
+        min_blocks_per_doc
     )
     return processor.process(search_results, query)
 
@@ -0,0 +1,91 @@
+"""
+SQLite Connection Pool for Pryzm Project
+
+Hands out one read-only connection per thread, tuned for the retrieval
+workload (memory-mapped I/O, larger page cache, in-memory temp store),
+so FTS5 queries from executor threads run in parallel instead of
+contending on a single shared connection.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Union
+
+
+class SQLitePool:
+    """
+    Per-thread pool of read-only SQLite connections.
+
+    Usage:
+        with pool.connection() as conn:
+            conn.execute(...)
+    """
+
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        mmap_size: int = 256 * 1024 * 1024,
+        cache_size_kib: int = 64 * 1024,
+        temp_store_memory: bool = True
+    ):
+        """
+        Initialize the pool (connections are opened lazily, per thread).
+
+        Args:
+            db_path: Path to the SQLite database
+            mmap_size: Bytes of the database file to memory-map (0 = disabled)
+            cache_size_kib: Page cache size per connection, in KiB
+            temp_store_memory: Keep temporary tables/indices in memory
+        """
+        self.db_path = Path(db_path)
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.temp_store_memory = temp_store_memory
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        """Open and tune a new read-only connection"""
+        uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+        # check_same_thread=False only so close() can run from another thread;
+        # each connection is otherwise used by the thread that opened it
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")  # Negative = KiB
+        if self.temp_store_memory:
+            conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA query_only=1")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow this thread's connection, opening it on first use.
+
+        Yields:
+            Read-only sqlite3.Connection
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        yield conn
+
+    @property
+    def size(self) -> int:
+        """Number of connections opened so far"""
+        return len(self._connections)
+
+    def close(self):
+        """Close every connection opened by the pool"""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
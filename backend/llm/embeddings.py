@@ -3,10 +3,19 @@ OpenAI Embeddings utility for encoding text.
 Used both for query-time encoding and corpus building.
 """
 import os
+import time
+import queue
+import atexit
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FuturesTimeout
 import numpy as np
-from openai import OpenAI
-from typing import List, Union
+from openai import OpenAI, AsyncOpenAI
+from typing import List, Union, Optional, Dict, Any
 from dotenv import load_dotenv
+from llm.cache import LRUCache, normalize_query
 
 # Load environment variables
 load_dotenv()
@@ -15,30 +24,419 @@ load_dotenv()
 EMBED_MODEL = "text-embedding-3-small"  # 1536 dimensions
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# Validate API key
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY environment variable is required")
+# Query embedding cache
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))  # In-memory entries (0 = disabled)
+EMBED_CACHE_TTL = float(os.getenv("EMBED_CACHE_TTL", "604800"))  # Seconds (0 = never expire)
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "")  # SQLite file for the persistent tier (empty = memory only)
+EMBED_CACHE_FLUSH_S = float(os.getenv("EMBED_CACHE_FLUSH_S", "1"))  # Disk writes are committed in batches this often
 
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Embeddings API client: per-request timeout and retries on transient errors (timeouts, 429, 5xx)
+EMBED_TIMEOUT = float(os.getenv("EMBED_TIMEOUT", "10"))  # Seconds per attempt
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "2"))
 
+# Query embedding coalescing (concurrent embed_query calls share one API request)
+EMBED_COALESCE_MS = float(os.getenv("EMBED_COALESCE_MS", "2"))  # Collection window (0 = disabled)
+EMBED_COALESCE_MAX_BATCH = int(os.getenv("EMBED_COALESCE_MAX_BATCH", "256"))  # Texts per request
+EMBED_COALESCE_MAX_REQUESTS = int(os.getenv("EMBED_COALESCE_MAX_REQUESTS", "4"))  # Concurrent API requests
 
-def embed_text(text: str) -> np.ndarray:
+# Initialize OpenAI clients (sync for scripts/threads, async for request handlers).
+# Without an API key only the local vector space (llm/local_embeddings.py) is usable
+client: Optional[OpenAI] = None
+async_client: Optional[AsyncOpenAI] = None
+if OPENAI_API_KEY:
+    client = OpenAI(api_key=OPENAI_API_KEY, timeout=EMBED_TIMEOUT, max_retries=EMBED_MAX_RETRIES)
+    async_client = AsyncOpenAI(api_key=OPENAI_API_KEY, timeout=EMBED_TIMEOUT, max_retries=EMBED_MAX_RETRIES)
+
+
+def _sync_client() -> OpenAI:
+    """The sync OpenAI client, or a clear error when no API key is configured"""
+    if client is None:
+        raise ValueError("OPENAI_API_KEY environment variable is required for OpenAI embeddings")
+    return client
+
+
+def _async_client() -> AsyncOpenAI:
+    """The async OpenAI client, or a clear error when no API key is configured"""
+    if async_client is None:
+        raise ValueError("OPENAI_API_KEY environment variable is required for OpenAI embeddings")
+    return async_client
+
+
+def _with_timeout(api_client, timeout: Optional[float]):
+    """
+    Client whose requests end within timeout seconds (a caller's deadline).
+    
+    A deadline leaves no room for retries, so they are turned off; without one
+    the client's EMBED_TIMEOUT / EMBED_MAX_RETRIES apply.
+    """
+    if timeout is None:
+        return api_client
+    if timeout <= 0:
+        raise TimeoutError("embedding deadline already passed")
+    return api_client.with_options(timeout=timeout, max_retries=0)
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of text embeddings keyed by model + normalized text.
+    
+    - Memory tier: bounded LRU with TTL
+    - Disk tier (optional): SQLite file that survives restarts. Writes are
+      queued and committed in batches by a writer thread; async callers
+      read it through aget(), off the event loop
+    """
+    
+    def __init__(
+        self,
+        model: str = EMBED_MODEL,
+        max_entries: int = EMBED_CACHE_SIZE,
+        ttl_seconds: float = EMBED_CACHE_TTL,
+        db_path: Optional[str] = EMBED_CACHE_PATH,
+        flush_interval: float = EMBED_CACHE_FLUSH_S
+    ):
+        """
+        Initialize the embedding cache.
+        
+        Args:
+            model: Embedding model name (part of the key)
+            max_entries: Maximum in-memory entries
+            ttl_seconds: Entry lifetime in seconds (0 = never expire)
+            db_path: SQLite file for the persistent tier (None/empty = disabled)
+            flush_interval: Seconds queued disk writes wait to be committed together
+        """
+        self.model = model
+        self.ttl_seconds = ttl_seconds or None
+        self.memory = LRUCache(max_entries, ttl_seconds)
+        self.disk_hits = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes: "queue.Queue[tuple]" = queue.Queue()
+        self.flush_interval = flush_interval
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL;")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._db.commit()
+            threading.Thread(target=self._write_loop, name="embed-cache-writer", daemon=True).start()
+            atexit.register(self.flush)
+            print(f"[EmbeddingCache] Persistent tier at {db_path}")
+    
+    @property
+    def persistent(self) -> bool:
+        """Whether the disk tier is enabled"""
+        return self._db is not None
+    
+    def key(self, text: str) -> str:
+        """Cache key for a text: hash of model + normalized text"""
+        normalized = normalize_query(text)
+        return hashlib.sha1(f"{self.model}\x00{normalized}".encode('utf-8')).hexdigest()
+    
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Look up an embedding, checking memory first and then disk.
+        
+        Args:
+            text: Text that was embedded
+            
+        Returns:
+            Copy of the cached vector, or None on a miss
+        """
+        key = self.key(text)
+        vector = self.memory.get(key)
+        if vector is not None:
+            return vector.copy()
+        if self._db is None:
+            return None
+        return self._disk_get(key)
+    
+    async def aget(self, text: str) -> Optional[np.ndarray]:
+        """Async version of get(); the disk tier is read on the default executor"""
+        key = self.key(text)
+        vector = self.memory.get(key)
+        if vector is not None:
+            return vector.copy()
+        if self._db is None:
+            return None
+        return await asyncio.get_running_loop().run_in_executor(None, self._disk_get, key)
+    
+    def _disk_get(self, key: str) -> Optional[np.ndarray]:
+        """Disk tier lookup; a hit is promoted to the memory tier"""
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT vector, created_at FROM embedding_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        if self.ttl_seconds is not None and time.time() - row[1] > self.ttl_seconds:
+            return None
+        
+        vector = np.frombuffer(row[0], dtype="float32")
+        vector.flags.writeable = False
+        self.memory.put(key, vector)
+        self.disk_hits += 1
+        return vector.copy()
+    
+    def put(self, text: str, vector: np.ndarray):
+        """
+        Store an embedding in memory and queue it for the disk tier (never blocks on SQLite).
+        
+        Args:
+            text: Text that was embedded
+            vector: Embedding vector
+        """
+        key = self.key(text)
+        vector = np.array(vector, dtype="float32")
+        vector.flags.writeable = False
+        self.memory.put(key, vector)
+        
+        if self._db is not None:
+            self._writes.put((key, vector.tobytes(), time.time()))
+    
+    def _write_loop(self):
+        while True:
+            rows = [self._writes.get()]
+            time.sleep(self.flush_interval)
+            self._write(rows)
+    
+    def _write(self, rows: List[tuple]):
+        """Commit the given rows plus everything else queued, in one transaction"""
+        while True:
+            try:
+                rows.append(self._writes.get_nowait())
+            except queue.Empty:
+                break
+        if not rows:
+            return
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (key, vector, created_at) VALUES (?, ?, ?)", rows
+            )
+            self._db.commit()
+    
+    def flush(self):
+        """Commit queued disk writes now (called at exit)"""
+        if self._db is not None:
+            self._write([])
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for both tiers"""
+        memory = self.memory.stats()
+        # Memory misses that were served from disk are not real misses
+        misses = memory['misses'] - self.disk_hits
+        lookups = memory['hits'] + self.disk_hits + misses
+        return {
+            'model': self.model,
+            'memory': memory,
+            'persistent': self.persistent,
+            'disk_hits': self.disk_hits,
+            'hits': memory['hits'] + self.disk_hits,
+            'misses': misses,
+            'hit_rate': (memory['hits'] + self.disk_hits) / lookups if lookups else 0.0
+        }
+
+
+# Shared query embedding cache
+embedding_cache = EmbeddingCache()
+
+
+def _resolve(future: Future, result: Any = None, exception: Optional[BaseException] = None):
+    """Complete a future unless its caller already gave up on it (deadline cancelled it)"""
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class EmbeddingCoalescer:
+    """
+    Micro-batches concurrent single-text embedding calls.
+    
+    Callers (threads or coroutines) submit texts and get futures. Texts are
+    deduplicated on the cache key (normalize_query), so spellings that share a
+    cache entry also share a slot in the batch; the first original spelling
+    is what gets embedded, as on every other path. A dispatcher on the coalescer's own event loop
+    takes the first waiting text, collects whatever else arrives within
+    window_ms (up to max_batch distinct texts) and sends them as one
+    embeddings.create request with the AsyncOpenAI client (at most
+    max_requests in flight), then fans the vectors back out. An idle caller
+    pays only the window; bursts share round trips.
+    """
+    
+    def __init__(
+        self,
+        model: str = EMBED_MODEL,
+        window_ms: float = EMBED_COALESCE_MS,
+        max_batch: int = EMBED_COALESCE_MAX_BATCH,
+        max_requests: int = EMBED_COALESCE_MAX_REQUESTS
+    ):
+        """
+        Initialize the coalescer (its event loop thread starts on first use).
+        
+        Args:
+            model: Embedding model name
+            window_ms: How long the first text of a batch waits for others
+            max_batch: Maximum distinct texts per API request
+            max_requests: Maximum concurrent API requests
+        """
+        self.model = model
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.max_requests = max_requests
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._tasks = set()  # Batch requests in flight (referenced so they are not garbage collected)
+        self.texts = 0
+        self.requests = 0
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the coalescer's event loop thread and dispatcher once"""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="embed-coalescer", daemon=True).start()
+                    asyncio.run_coroutine_threadsafe(self._start(), loop).result()
+                    self._loop = loop
+        return self._loop
+    
+    async def _start(self):
+        # Loop-bound state: the queue, the request limit and an AsyncOpenAI client of this loop
+        # (the shared async_client belongs to the request handlers' loop)
+        self._queue: "asyncio.Queue[tuple]" = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_requests)
+        self._client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY, timeout=EMBED_TIMEOUT, max_retries=EMBED_MAX_RETRIES
+        ) if OPENAI_API_KEY else None
+        self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch_loop())
+    
+    def submit(self, text: str, timeout: Optional[float] = None) -> Future:
+        """
+        Queue a text for embedding.
+        
+        Args:
+            text: The text to embed
+            timeout: Seconds the caller will wait (None = no deadline); the batch
+                     request is given the latest deadline of the texts it carries
+            
+        Returns:
+            Future resolving to a float32 vector of shape (1536,)
+        """
+        loop = self._ensure_loop()
+        future: Future = Future()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        loop.call_soon_threadsafe(self._queue.put_nowait, (normalize_query(text), text, future, deadline))
+        return future
+    
+    async def _dispatch_loop(self):
+        loop = asyncio.get_running_loop()
+        carry = None  # Text that did not fit the previous batch; starts the next one
+        while True:
+            batch = [carry if carry is not None else await self._queue.get()]
+            carry = None
+            await asyncio.sleep(self.window)
+            distinct = {batch[0][0]}
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item[0] not in distinct and len(distinct) >= self.max_batch:
+                    carry = item
+                    break
+                batch.append(item)
+                distinct.add(item[0])
+            task = loop.create_task(self._embed_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _embed_batch(self, batch: List[tuple]):
+        """One API request for a collected batch; texts with the same cache key are sent once"""
+        waiting: Dict[str, List[Future]] = {}
+        originals: Dict[str, str] = {}
+        for key, text, future, _ in batch:
+            waiting.setdefault(key, []).append(future)
+            originals.setdefault(key, text)
+        keys = list(waiting)
+        texts = [originals[key] for key in keys]
+        deadlines = [deadline for _, _, _, deadline in batch]
+        try:
+            async with self._slots:
+                timeout = None if None in deadlines else max(deadlines) - time.monotonic()
+                api = _with_timeout(self._client or _async_client(), timeout)
+                response = await api.embeddings.create(model=self.model, input=texts)
+        except Exception as e:
+            for futures in waiting.values():
+                for future in futures:
+                    _resolve(future, exception=e)
+            return
+        self.requests += 1
+        self.texts += len(batch)
+        for key, data in zip(keys, response.data):
+            vector = np.array(data.embedding, dtype="float32")
+            for future in waiting[key]:
+                _resolve(future, result=vector.copy())
+    
+    def embed(self, text: str, timeout: Optional[float] = None) -> np.ndarray:
+        """Embed one text through the coalescer (blocking; TimeoutError after timeout seconds)"""
+        future = self.submit(text, timeout)
+        try:
+            return future.result(timeout)
+        except FuturesTimeout:
+            future.cancel()
+            raise TimeoutError("embedding deadline passed") from None
+    
+    async def aembed(self, text: str, timeout: Optional[float] = None) -> np.ndarray:
+        """Embed one text through the coalescer without blocking the event loop"""
+        return await asyncio.wait_for(asyncio.wrap_future(self.submit(text, timeout)), timeout)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return request counters"""
+        return {
+            'window_ms': self.window * 1000,
+            'texts': self.texts,
+            'api_requests': self.requests,
+            'texts_per_request': self.texts / self.requests if self.requests else 0.0
+        }
+
+
+# Shared coalescer for query embeddings (None = every call makes its own request)
+embedding_coalescer = EmbeddingCoalescer() if EMBED_COALESCE_MS > 0 else None
+
+
+def embed_text(text: str, timeout: Optional[float] = None) -> np.ndarray:
     """
     Embed a single text string using OpenAI's embedding model.
+    Served from the embedding cache when the normalized text was seen before;
+    misses go through the coalescer so concurrent calls share one request.
     
     Args:
         text: The text to embed
+        timeout: Seconds until the caller's deadline (None = client defaults);
+                 raises TimeoutError when the API does not answer in time
         
     Returns:
         numpy array of shape (1536,) containing the embedding vector
     """
-    response = client.embeddings.create(
-        model=EMBED_MODEL,
-        input=text
-    )
-    embedding = response.data[0].embedding
-    return np.array(embedding, dtype="float32")
+    cached = embedding_cache.get(text)
+    if cached is not None:
+        return cached
+    
+    if embedding_coalescer is not None:
+        embedding = embedding_coalescer.embed(text, timeout)
+    else:
+        response = _with_timeout(_sync_client(), timeout).embeddings.create(
+            model=EMBED_MODEL,
+            input=text
+        )
+        embedding = np.array(response.data[0].embedding, dtype="float32")
+    embedding_cache.put(text, embedding)
+    return embedding
 
 
 def embed_batch(texts: List[str], batch_size: int = 256) -> np.ndarray:
@@ -58,7 +456,7 @@ def embed_batch(texts: List[str], batch_size: int = 256) -> np.ndarray:
     # Process in batches to respect API limits
     for i in range(0, len(texts), batch_size):
         batch = texts[i:i + batch_size]
-        response = client.embeddings.create(
+        response = _sync_client().embeddings.create(
             model=EMBED_MODEL,
             input=batch
         )
@@ -68,21 +466,135 @@ def embed_batch(texts: List[str], batch_size: int = 256) -> np.ndarray:
     return np.array(all_embeddings, dtype="float32")
 
 
-def embed_query(query: str) -> np.ndarray:
+def embed_query(query: str, timeout: Optional[float] = None) -> np.ndarray:
     """
     Convenience function to embed a user query.
     Returns embedding ready for FAISS search (shape: (1, 1536))
     
     Args:
         query: The query text to embed
+        timeout: Seconds until the caller's deadline (see embed_text)
         
     Returns:
         numpy array of shape (1, 1536) for FAISS search
     """
-    embedding = embed_text(query)
+    embedding = embed_text(query, timeout)
     return embedding[np.newaxis, :]  # Add batch dimension for FAISS
 
 
+def _cached_or_missing(texts: List[str]) -> tuple:
+    """Split texts into cached vectors and the distinct texts that still need embedding"""
+    vectors: Dict[int, np.ndarray] = {}
+    missing: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        cached = embedding_cache.get(text)
+        if cached is not None:
+            vectors[i] = cached
+        else:
+            missing.setdefault(text, []).append(i)
+    return vectors, missing
+
+
+def _stack(texts: List[str], vectors: Dict[int, np.ndarray], missing: Dict[str, List[int]], new: np.ndarray) -> np.ndarray:
+    """Cache newly embedded texts and assemble the (len(texts), dim) matrix"""
+    for text, vector in zip(missing, new):
+        embedding_cache.put(text, vector)
+        for i in missing[text]:
+            vectors[i] = vector
+    return np.stack([vectors[i] for i in range(len(texts))]).astype("float32", copy=False)
+
+
+def embed_queries(queries: List[str], batch_size: int = 256) -> np.ndarray:
+    """
+    Embed many queries with as few API calls as possible.
+    Cached queries are served from the embedding cache; the distinct misses
+    go out in embed_batch() requests of up to batch_size texts.
+    
+    Args:
+        queries: Query texts
+        batch_size: Maximum number of texts per API call
+        
+    Returns:
+        numpy array of shape (len(queries), 1536) for FAISS search
+    """
+    if not queries:
+        return np.empty((0, 0), dtype="float32")
+    vectors, missing = _cached_or_missing(queries)
+    new = embed_batch(list(missing), batch_size) if missing else []
+    return _stack(queries, vectors, missing, new)
+
+
+async def aembed_queries(queries: List[str], batch_size: int = 256) -> np.ndarray:
+    """
+    Async version of embed_queries.
+    
+    Args:
+        queries: Query texts
+        batch_size: Maximum number of texts per API call
+        
+    Returns:
+        numpy array of shape (len(queries), 1536) for FAISS search
+    """
+    if not queries:
+        return np.empty((0, 0), dtype="float32")
+    if embedding_cache.persistent:
+        # Disk tier lookups run off the event loop
+        vectors, missing = await asyncio.get_running_loop().run_in_executor(None, _cached_or_missing, queries)
+    else:
+        vectors, missing = _cached_or_missing(queries)
+    texts = list(missing)
+    new = []
+    for i in range(0, len(texts), batch_size):
+        response = await _async_client().embeddings.create(
+            model=EMBED_MODEL,
+            input=texts[i:i + batch_size]
+        )
+        new.extend(np.array(data.embedding, dtype="float32") for data in response.data)
+    return _stack(queries, vectors, missing, new)
+
+
+async def aembed_text(text: str, timeout: Optional[float] = None) -> np.ndarray:
+    """
+    Async version of embed_text; does not block the event loop.
+    
+    Args:
+        text: The text to embed
+        timeout: Seconds until the caller's deadline (see embed_text)
+        
+    Returns:
+        numpy array of shape (1536,) containing the embedding vector
+    """
+    cached = await embedding_cache.aget(text)
+    if cached is not None:
+        return cached
+    
+    if embedding_coalescer is not None:
+        embedding = await embedding_coalescer.aembed(text, timeout)
+    else:
+        response = await _with_timeout(_async_client(), timeout).embeddings.create(
+            model=EMBED_MODEL,
+            input=text
+        )
+        embedding = np.array(response.data[0].embedding, dtype="float32")
+    embedding_cache.put(text, embedding)
+    return embedding
+
+
+async def aembed_query(query: str, timeout: Optional[float] = None) -> np.ndarray:
+    """
+    Async version of embed_query.
+    
+    Args:
+        query: The query text to embed
+        timeout: Seconds until the caller's deadline (see embed_text)
+        
+    Returns:
+        numpy array of shape (1, 1536) for FAISS search
+    """
+    embedding = await aembed_text(query, timeout)
+    return embedding[np.newaxis, :]
+
+
 # For testing/validation
 if __name__ == "__main__":
     # Test single embedding
@@ -0,0 +1,85 @@
+"""
+Text Fingerprints for Pryzm Project
+
+64-bit SimHash over word shingles. Ingestion stores one per chunk
+(chunks.simhash) and the context processor compares them with an integer
+Hamming distance: near-identical texts (re-issued document versions,
+repeated pages and boilerplate) land within a few bits of each other,
+while unrelated texts differ in about half of the 64 bits.
+
+LSH banding keeps comparisons local: with the bits split into
+max_distance + 1 bands, two fingerprints within max_distance bits agree
+exactly on at least one band, so only same-bucket pairs are compared.
+
+This module only depends on numpy so ingestion scripts can import it.
+"""
+
+import re
+import hashlib
+from typing import List, Tuple
+import numpy as np
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3  # Words per shingle
+
+_WORD = re.compile(r"\w+")
+_MASK = (1 << SIMHASH_BITS) - 1
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[str]:
+    """Overlapping word n-grams of the lowercased text (the text itself if shorter)"""
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return [' '.join(words)] if words else []
+    return [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash of a text.
+
+    Each shingle is hashed (blake2b, 64 bits); every output bit is the
+    majority vote of that bit over all shingles.
+
+    Args:
+        text: Chunk text
+
+    Returns:
+        Signed 64-bit integer (fits an SQLite INTEGER column); 0 for empty text
+    """
+    grams = shingles(text)
+    if not grams:
+        return 0
+    digests = b''.join(hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest() for g in grams)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(grams)
+    packed = np.packbits(votes > 0, bitorder='little').tobytes()
+    return int.from_bytes(packed, 'little', signed=True)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints"""
+    return ((a ^ b) & _MASK).bit_count()
+
+
+def lsh_bands(max_distance: int) -> List[Tuple[int, int]]:
+    """
+    Split the fingerprint into max_distance + 1 bands (pigeonhole principle).
+
+    Returns:
+        (shift, mask) per band
+    """
+    num_bands = min(SIMHASH_BITS, max_distance + 1)
+    bands = []
+    start = 0
+    for band in range(num_bands):
+        width = SIMHASH_BITS // num_bands + (1 if band < SIMHASH_BITS % num_bands else 0)
+        bands.append((start, (1 << width) - 1))
+        start += width
+    return bands
+
+
+def band_keys(fingerprint: int, bands: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """LSH bucket keys (band number, band value) of a fingerprint"""
+    value = fingerprint & _MASK
+    return [(band, (value >> shift) & mask) for band, (shift, mask) in enumerate(bands)]
@@ -0,0 +1,155 @@
+"""
+Rank Fusion for Pryzm Project
+
+Combines ranked runs (integer id arrays with scores, best first) from the
+retrieval branches using NumPy only - no per-candidate Python loops, so
+cost stays flat as branch depths grow.
+
+Methods:
+- rrf:    weighted Reciprocal Rank Fusion, sum(w_i / (k + rank_i))
+- minmax: CombSUM over min-max normalized scores
+- zscore: CombSUM over z-score normalized scores
+
+A chunk found by several branches gets every branch's contribution.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+
+FUSION_METHODS = ('rrf', 'minmax', 'zscore')
+
+# (ids, scores) with ids as int64 and best match first
+Run = Tuple[np.ndarray, np.ndarray]
+
+
+def top_k_indices(scores: np.ndarray, k: int, tie_break: np.ndarray = None) -> np.ndarray:
+    """
+    Indices of the k highest scores, highest first, without a full sort.
+
+    Args:
+        scores: 1-d score array
+        k: Number of indices to return
+        tie_break: Optional array ordering equal scores (ascending)
+
+    Returns:
+        int64 index array of length min(k, len(scores))
+    """
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+    if tie_break is None:
+        order = np.argsort(-scores[top], kind='stable')
+    else:
+        order = np.lexsort((tie_break[top], -scores[top]))
+    return top[order]
+
+
+def rrf_scores(length: int, k: int, weight: float = 1.0) -> np.ndarray:
+    """Weighted RRF contribution for ranks 1..length"""
+    return weight / (k + np.arange(1, length + 1, dtype=np.float64))
+
+
+def normalize_scores(scores: np.ndarray, method: str, higher_is_better: bool = True) -> np.ndarray:
+    """
+    Normalize one run's raw scores so larger is better.
+
+    Args:
+        scores: Raw branch scores
+        method: 'minmax' (to [0, 1]) or 'zscore' (zero mean, unit variance)
+        higher_is_better: False for distances and FTS5 bm25() (more negative = better)
+
+    Returns:
+        float64 array aligned with scores
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if not higher_is_better:
+        scores = -scores
+    if len(scores) == 0:
+        return scores
+    if method == 'minmax':
+        low, high = scores.min(), scores.max()
+        if high - low <= 0:
+            return np.ones_like(scores)
+        return (scores - low) / (high - low)
+    if method == 'zscore':
+        std = scores.std()
+        if std <= 0:
+            return np.zeros_like(scores)
+        return (scores - scores.mean()) / std
+    raise ValueError(f"Unknown normalization method: {method}")
+
+
+def fuse_runs(
+    runs: Sequence[Run],
+    weights: Sequence[float],
+    method: str = 'rrf',
+    top_k: int = 200,
+    rrf_k: int = 60,
+    higher_is_better: Sequence[bool] = None
+) -> Tuple[np.ndarray, np.ndarray, List[np.ndarray]]:
+    """
+    Fuse ranked runs into one ranking.
+
+    Args:
+        runs: (ids, scores) per branch, best first
+        weights: Weight per run
+        method: One of FUSION_METHODS
+        top_k: Number of fused results
+        rrf_k: RRF rank constant
+        higher_is_better: Score direction per run (used by minmax/zscore)
+
+    Returns:
+        Tuple of (fused ids, fused scores, per-run contributions aligned with
+        fused ids - NaN where the run did not return the id)
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method '{method}', expected one of {FUSION_METHODS}")
+    if higher_is_better is None:
+        higher_is_better = [True] * len(runs)
+
+    # Per-run contributions, laid out back to back
+    contributions = []
+    for (ids, scores), weight, higher in zip(runs, weights, higher_is_better):
+        if method == 'rrf':
+            contributions.append(rrf_scores(len(ids), rrf_k, weight))
+        else:
+            contributions.append(weight * normalize_scores(scores, method, higher))
+
+    all_ids = np.concatenate([np.asarray(ids, dtype=np.int64) for ids, _ in runs]) if runs else np.empty(0, dtype=np.int64)
+    if len(all_ids) == 0:
+        return all_ids, np.empty(0, dtype=np.float64), [np.empty(0, dtype=np.float64) for _ in runs]
+
+    # Union of ids; inverse maps every (run, rank) entry to its union slot
+    union_ids, inverse = np.unique(all_ids, return_inverse=True)
+    per_run = np.full((len(runs), len(union_ids)), np.nan, dtype=np.float64)
+    offset = 0
+    for r, contribution in enumerate(contributions):
+        slots = inverse[offset:offset + len(contribution)]
+        per_run[r, slots] = contribution
+        offset += len(contribution)
+
+    fused = np.nansum(per_run, axis=0)
+    top = top_k_indices(fused, top_k, tie_break=union_ids)
+    return union_ids[top], fused[top], [row[top] for row in per_run]
+
+
+def fusion_columns(fused_scores: np.ndarray, contributions: List[np.ndarray], names: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    Score columns in the retriever's result format.
+
+    The fused score keeps the 'rrf_score' name (API field) whatever the method.
+
+    Args:
+        fused_scores: Fused score per result
+        contributions: Per-run contributions from fuse_runs()
+        names: Column name per run (e.g. 'bm25_score', 'faiss_score')
+
+    Returns:
+        Dict of column name -> float64 array
+    """
+    columns = {'rrf_score': fused_scores}
+    columns.update(zip(names, contributions))
+    return columns
@@ -0,0 +1,100 @@
+"""
+Local ONNX Embeddings for Pryzm Project
+
+Runs a small sentence-embedding model (e.g. all-MiniLM-L6-v2) on
+onnxruntime (CPU), so queries can be embedded in-process in a few
+milliseconds with no network access. Vectors live in their own space
+(data/vectors.local.faiss), built at ingestion with --vector-spaces local.
+
+Create the export with scripts/export_embedding_onnx.py. The model is
+loaded lazily on first use; session loading and length-bucketed batches
+are shared with the reranker (onnx_model.ONNXModel).
+"""
+
+import json
+from pathlib import Path
+from typing import Optional, Sequence, Union
+import numpy as np
+
+try:
+    from .onnx_model import ONNXModel
+except ImportError:  # Loaded as a top-level module (scripts put backend/llm on sys.path)
+    from onnx_model import ONNXModel
+
+
+class LocalEmbedder(ONNXModel):
+    """
+    ONNX sentence-embedding model with mean or CLS pooling and L2 normalization.
+
+    Expects a directory with model_quantized.onnx (or model.onnx),
+    tokenizer.json and local_embedding.json (model name, pooling, dimension).
+    """
+
+    KIND = "embedding model"
+    EXPORT_SCRIPT = "scripts/export_embedding_onnx.py"
+
+    def __init__(
+        self,
+        model_dir: Union[str, Path],
+        max_length: int = 256,
+        batch_size: int = 32,
+        num_threads: Optional[int] = None
+    ):
+        """
+        Configure the embedder (nothing is loaded until first use).
+
+        Args:
+            model_dir: Directory produced by scripts/export_embedding_onnx.py
+            max_length: Max tokens per text; longer texts are truncated
+            batch_size: Texts per forward pass
+            num_threads: onnxruntime intra-op threads (None = onnxruntime default)
+        """
+        super().__init__(model_dir, max_length, batch_size, num_threads)
+        self.pooling = "mean"
+        self.model_name = self.model_dir.name
+
+    def _configure(self):
+        config_path = self.model_dir / "local_embedding.json"
+        if config_path.exists():
+            config = json.loads(config_path.read_text())
+            self.pooling = config.get("pooling", self.pooling)
+            self.model_name = config.get("model", self.model_name)
+
+    def _loaded_message(self, model_path: Path) -> str:
+        return f"[LocalEmbedder] Loaded {self.model_name} ({model_path.name}, pooling={self.pooling})"
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Sentence vectors from token states: CLS token or mean over real tokens"""
+        if self.pooling == "cls":
+            return hidden[:, 0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            L2-normalized float32 array of shape (len(texts), dimension)
+        """
+        self.load()
+        encodings = self.tokenizer.encode_batch(list(texts))
+
+        vectors = None
+        for bucket, hidden, attention_mask in self.run_buckets(encodings):
+            pooled = self._pool(hidden, attention_mask)
+            if vectors is None:
+                vectors = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            vectors[bucket] = pooled
+        if vectors is None:
+            return np.empty((0, 0), dtype=np.float32)
+
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed one query, shape (1, dimension) for FAISS search"""
+        return self.embed([query])
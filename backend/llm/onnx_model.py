@@ -0,0 +1,146 @@
+"""
+Shared ONNX Runtime plumbing for Pryzm Project
+
+Base class for the small transformer models run in-process on
+onnxruntime (CPU): the cross-encoder reranker (reranker.py) and the
+local sentence embedder (local_embeddings.py). It finds the export,
+loads the session and tokenizer once, and runs tokenized inputs in
+length buckets padded only to the longest input in each bucket.
+Subclasses only turn the model output into scores or vectors.
+
+onnxruntime and tokenizers are optional dependencies, imported on load.
+"""
+
+import threading
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+
+class ONNXModel:
+    """
+    Lazily loaded ONNX session + tokenizer with bucketed batch inference.
+
+    Expects a directory with model_quantized.onnx (or model.onnx) and
+    tokenizer.json.
+    """
+
+    MODEL_FILES = ("model_quantized.onnx", "model.onnx")
+    KIND = "model"  # For messages, e.g. "reranker"
+    EXPORT_SCRIPT = ""  # Script that creates the export, for the missing-model error
+    TRUNCATION = "longest_first"  # tokenizers truncation strategy
+
+    def __init__(
+        self,
+        model_dir: Union[str, Path],
+        max_length: int = 256,
+        batch_size: int = 16,
+        num_threads: Optional[int] = None
+    ):
+        """
+        Configure the model (nothing is loaded until first use).
+
+        Args:
+            model_dir: Directory with the ONNX export and tokenizer.json
+            max_length: Max tokens per input; longer inputs are truncated
+            batch_size: Inputs per forward pass
+            num_threads: onnxruntime intra-op threads (None = onnxruntime default)
+        """
+        self.model_dir = Path(model_dir)
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.session = None
+        self.tokenizer = None
+        self._input_names: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def model_path(self) -> Optional[Path]:
+        """The ONNX file that will be loaded, or None if the export is missing"""
+        for name in self.MODEL_FILES:
+            path = self.model_dir / name
+            if path.exists():
+                return path
+        return None
+
+    @property
+    def loaded(self) -> bool:
+        return self.session is not None
+
+    def _configure(self):
+        """Read model settings from the export directory before loading (subclass hook)"""
+
+    def _loaded_message(self, model_path: Path) -> str:
+        return f"[{type(self).__name__}] Loaded {model_path.name}"
+
+    def load(self):
+        """Load the ONNX session and tokenizer (thread-safe, runs once)"""
+        if self.session is not None:
+            return
+        with self._lock:
+            if self.session is not None:
+                return
+
+            # Optional dependencies, only needed once the model is actually used
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+
+            model_path = self.model_path
+            if model_path is None:
+                raise FileNotFoundError(
+                    f"No ONNX {self.KIND} in {self.model_dir} - run {self.EXPORT_SCRIPT}"
+                )
+            self._configure()
+
+            tokenizer = Tokenizer.from_file(str(self.model_dir / "tokenizer.json"))
+            tokenizer.enable_truncation(max_length=self.max_length, strategy=self.TRUNCATION)
+            tokenizer.no_padding()  # Padding is done per length bucket
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if self.num_threads:
+                options.intra_op_num_threads = self.num_threads
+            session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+
+            self._input_names = [i.name for i in session.get_inputs()]
+            self.tokenizer = tokenizer
+            self.session = session
+            print(self._loaded_message(model_path))
+
+    def _forward(self, encodings: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pad a bucket to its longest input and run one forward pass.
+
+        Returns:
+            Tuple of (first model output as float32, attention mask)
+        """
+        width = max(len(e.ids) for e in encodings)
+        input_ids = np.zeros((len(encodings), width), dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), width), dtype=np.int64)
+        token_type_ids = np.zeros((len(encodings), width), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            n = len(encoding.ids)
+            input_ids[row, :n] = encoding.ids
+            attention_mask[row, :n] = 1
+            token_type_ids[row, :n] = encoding.type_ids
+
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask, 'token_type_ids': token_type_ids}
+        output = self.session.run(None, {name: feeds[name] for name in self._input_names})[0]
+        return np.asarray(output, dtype=np.float32), attention_mask
+
+    def run_buckets(self, encodings: Sequence) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Run encodings in length buckets (sorted by token count, batch_size each).
+
+        Args:
+            encodings: Tokenizer encodings
+
+        Yields:
+            (indices into encodings, model output, attention mask) per bucket
+        """
+        order = np.argsort([len(e.ids) for e in encodings], kind='stable')
+        for start in range(0, len(order), self.batch_size):
+            bucket = order[start:start + self.batch_size]
+            output, attention_mask = self._forward([encodings[i] for i in bucket])
+            yield bucket, output, attention_mask
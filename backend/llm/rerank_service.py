@@ -0,0 +1,530 @@
+"""
+Out-of-process Reranker Service for Pryzm Project
+
+Runs the cross-encoder in one dedicated process per node, so the model is
+loaded once (not once per uvicorn worker) and inference never holds the
+GIL of a request-handling process.
+
+- RerankServer: listens on a multiprocessing.connection address, queues
+  (query, passage) pairs from all connected clients and micro-batches
+  them into shared forward passes (max-wait window + max pairs per batch).
+- RerankClient: one persistent connection per process, thread-safe,
+  with a per-request timeout. Drop-in for CrossEncoder.predict().
+
+Messages are JSON (send_bytes/recv_bytes), never pickles, and every
+connection must pass the HMAC handshake with the shared secret: the
+RERANKER_AUTHKEY environment variable, or else a random key generated
+once per deployment in RERANKER_AUTHKEY_FILE (models/reranker.key).
+The worker refuses to start without one.
+
+Start the worker explicitly with:
+    python backend/llm/rerank_service.py --model-dir models/reranker-onnx
+
+or let the retriever autostart it on first use (reranker_autostart). An
+autostarted worker exits once no client has been connected for
+--idle-exit seconds, so restarts do not leave orphaned workers.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import secrets
+import argparse
+import itertools
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener, Connection
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+DEFAULT_ADDRESS = "127.0.0.1:8771"
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+AUTHKEY_FILE = Path(os.getenv("RERANKER_AUTHKEY_FILE", str(PROJECT_ROOT / "models" / "reranker.key")))
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024  # Larger messages are rejected, not parsed
+
+
+def get_authkey(create: bool = False) -> bytes:
+    """
+    Shared secret for the connection handshake.
+
+    Args:
+        create: Generate AUTHKEY_FILE (random, mode 0600) if it does not exist
+
+    Returns:
+        The key from RERANKER_AUTHKEY, else from AUTHKEY_FILE
+
+    Raises:
+        RuntimeError: No key is configured (and create is False)
+    """
+    key = os.getenv("RERANKER_AUTHKEY")
+    if key:
+        return key.encode()
+    if create and not AUTHKEY_FILE.exists():
+        AUTHKEY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(AUTHKEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+        except FileExistsError:
+            pass  # Another process created it first
+    try:
+        key = AUTHKEY_FILE.read_text().strip()
+    except FileNotFoundError:
+        key = ""
+    if not key:
+        raise RuntimeError(f"No reranker authkey: set RERANKER_AUTHKEY or create {AUTHKEY_FILE}")
+    return key.encode()
+
+
+def default_pidfile(address: str) -> Path:
+    """Pidfile of the worker serving an address"""
+    name = "".join(c if c.isalnum() else "_" for c in address)
+    return Path(tempfile.gettempdir()) / f"pryzm-reranker-{name}.pid"
+
+
+def _pid_alive(pidfile: Path) -> bool:
+    """Whether the pidfile names a running process"""
+    try:
+        os.kill(int(pidfile.read_text().strip()), 0)
+        return True
+    except (FileNotFoundError, ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True  # Running, under another user
+
+
+def _send(conn: Connection, message: Any):
+    conn.send_bytes(json.dumps(message).encode())
+
+
+def _recv(conn: Connection) -> Any:
+    return json.loads(conn.recv_bytes(MAX_MESSAGE_BYTES))
+
+
+def _close(conn: Connection):
+    """Shut the socket down, then close it (a plain close does not wake a thread blocked in recv)"""
+    try:
+        sock = socket.socket(fileno=os.dup(conn.fileno()))
+        sock.shutdown(socket.SHUT_RDWR)
+        sock.close()
+    except OSError:
+        pass
+    conn.close()
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """'host:port' -> (host, port); anything else is a Unix socket path"""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return address
+
+
+class _Request:
+    """One client request waiting in the batch queue"""
+    __slots__ = ('conn', 'send_lock', 'request_id', 'pairs', 'deadline')
+
+    def __init__(self, conn: Connection, send_lock: threading.Lock, request_id: int, pairs: list, deadline: float):
+        self.conn = conn
+        self.send_lock = send_lock
+        self.request_id = request_id
+        self.pairs = pairs
+        self.deadline = deadline
+
+
+class RerankServer:
+    """
+    Micro-batching reranker server.
+
+    Each connection gets a reader thread that enqueues requests; a single
+    batching thread drains the queue and runs the model.
+    """
+
+    def __init__(
+        self,
+        reranker: Any,
+        address: str = DEFAULT_ADDRESS,
+        max_wait_ms: float = 5.0,
+        max_batch_pairs: int = 128,
+        authkey: Optional[bytes] = None,
+        idle_exit: float = 0.0
+    ):
+        """
+        Args:
+            reranker: Object with predict(pairs) -> scores (ONNXReranker or CrossEncoder)
+            address: 'host:port' or Unix socket path
+            max_wait_ms: How long the first request of a batch waits for others to join
+            max_batch_pairs: Pairs per shared forward pass (a batch closes early when reached)
+            authkey: Handshake secret (default: get_authkey())
+            idle_exit: Exit after this many seconds without a connected client (0 = never)
+        """
+        self.reranker = reranker
+        self.address = address
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_pairs = max_batch_pairs
+        self.authkey = authkey or get_authkey()
+        self.idle_exit = idle_exit
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._clients = 0
+        self._idle_since = time.monotonic()
+        self._clients_lock = threading.Lock()
+        self._stopping = False
+        self.batches = 0
+        self.requests = 0
+        self.expired = 0
+
+    def serve_forever(self):
+        """Bind the address and serve until the process is killed (or idle for idle_exit)"""
+        listener = Listener(parse_address(self.address), authkey=self.authkey)
+        print(f"[RerankWorker] Listening on {self.address} (max_wait={self.max_wait * 1000:.0f}ms, "
+              f"max_batch_pairs={self.max_batch_pairs})")
+        threading.Thread(target=self._batch_loop, name="rerank-batcher", daemon=True).start()
+        if self.idle_exit:
+            threading.Thread(target=self._idle_watch, name="rerank-idle", daemon=True).start()
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:  # Failed handshake (e.g. wrong authkey)
+                print(f"[RerankWorker] Rejected connection: {e}")
+                continue
+            if self._stopping:
+                conn.close()
+                listener.close()
+                return
+            threading.Thread(target=self._read_loop, args=(conn,), name="rerank-reader", daemon=True).start()
+
+    def _idle_watch(self):
+        """Stop serving once no client has been connected for idle_exit seconds"""
+        while True:
+            time.sleep(min(self.idle_exit, 5.0))
+            with self._clients_lock:
+                idle = self._clients == 0 and time.monotonic() - self._idle_since > self.idle_exit
+            if idle:
+                print(f"[RerankWorker] No clients for {self.idle_exit:.0f}s, exiting")
+                self._stopping = True
+                # Wake the blocking accept() with a connection of our own
+                try:
+                    Client(parse_address(self.address), authkey=self.authkey).close()
+                except OSError:
+                    pass
+                return
+
+    def _read_loop(self, conn: Connection):
+        """Enqueue requests from one client until it disconnects"""
+        send_lock = threading.Lock()
+        with self._clients_lock:
+            self._clients += 1
+        try:
+            while True:
+                message = _recv(conn)
+                request_id, pairs, timeout = message['id'], message['pairs'], message.get('timeout')
+                # Deadline on this process's clock; expired requests are skipped, not scored
+                deadline = time.monotonic() + timeout if timeout else float('inf')
+                self._queue.put(_Request(conn, send_lock, request_id, [tuple(p) for p in pairs], deadline))
+        except (EOFError, OSError, ValueError, KeyError, TypeError):
+            conn.close()
+        finally:
+            with self._clients_lock:
+                self._clients -= 1
+                self._idle_since = time.monotonic()
+
+    def _next_batch(self) -> List[_Request]:
+        """Block for one request, then collect more for up to max_wait"""
+        batch = [self._queue.get()]
+        num_pairs = len(batch[0].pairs)
+        window_end = time.monotonic() + self.max_wait
+        while num_pairs < self.max_batch_pairs:
+            remaining = window_end - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            num_pairs += len(request.pairs)
+        return batch
+
+    def _batch_loop(self):
+        while True:
+            batch = self._next_batch()
+            now = time.monotonic()
+            live = [r for r in batch if r.deadline > now]
+            self.expired += len(batch) - len(live)
+            if not live:
+                continue
+
+            start = time.perf_counter()
+            pairs = [pair for request in live for pair in request.pairs]
+            try:
+                scores = np.asarray(self.reranker.predict(pairs), dtype=np.float32)
+                error = None
+            except Exception as e:
+                scores, error = None, f"{type(e).__name__}: {e}"
+                print(f"[RerankWorker] Batch failed: {error}")
+
+            offset = 0
+            for request in live:
+                n = len(request.pairs)
+                reply = {
+                    'id': request.request_id,
+                    'scores': scores[offset:offset + n].tolist() if scores is not None else None,
+                    'error': error
+                }
+                offset += n
+                try:
+                    with request.send_lock:
+                        _send(request.conn, reply)
+                except (OSError, ValueError):
+                    pass  # Client went away; its reader thread cleans up
+
+            self.batches += 1
+            self.requests += len(live)
+            print(f"[RerankWorker] Batch: {len(live)} requests, {len(pairs)} pairs in "
+                  f"{(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+class RerankClient:
+    """
+    Thread-safe client for RerankServer with CrossEncoder's predict() interface.
+
+    Requests from all threads share one connection; a reader thread resolves
+    the matching futures. predict() raises TimeoutError when the reply does
+    not arrive in time and ConnectionError when the worker is unreachable,
+    so callers can fall back to the fused order. It never waits for a worker
+    to start: a cold start spawns the worker, fails fast, and a later request
+    connects.
+    """
+
+    def __init__(
+        self,
+        address: str = DEFAULT_ADDRESS,
+        timeout_ms: float = 800.0,
+        spawn_args: Optional[List[str]] = None,
+        idle_exit: float = 300.0
+    ):
+        """
+        Args:
+            address: Server address ('host:port' or Unix socket path)
+            timeout_ms: Per-request timeout
+            spawn_args: Command-line arguments for this module to start the worker if
+                        nothing is listening (None = never start it)
+            idle_exit: Seconds an autostarted worker stays up without any client
+        """
+        self.address = address
+        self.timeout = timeout_ms / 1000
+        self.spawn_args = spawn_args
+        self.idle_exit = idle_exit
+        self.pidfile = default_pidfile(address)
+        self._conn: Optional[Connection] = None
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()  # Guards _conn, _pending and sends
+        self._connect_lock = threading.Lock()  # One connection attempt at a time
+        self._process: Optional[subprocess.Popen] = None
+        self.timeouts = 0
+        self.failures = 0
+
+    def _connect(self) -> Connection:
+        """
+        Return the live connection, connecting if needed.
+
+        Raises:
+            ConnectionError: Not connected yet (worker down, starting, or another
+                             thread is connecting) - the caller falls back immediately
+        """
+        with self._lock:
+            if self._conn is not None:
+                return self._conn
+        if not self._connect_lock.acquire(blocking=False):
+            raise ConnectionError(f"Connecting to reranker worker at {self.address}")
+        try:
+            with self._lock:
+                if self._conn is not None:
+                    return self._conn
+            try:
+                authkey = get_authkey(create=self.spawn_args is not None)
+            except RuntimeError as e:
+                raise ConnectionError(str(e))
+            try:
+                conn = Client(parse_address(self.address), authkey=authkey)
+            except (ConnectionRefusedError, FileNotFoundError):
+                self._spawn()
+                raise ConnectionError(f"Reranker worker not running at {self.address}")
+            with self._lock:
+                self._conn = conn
+            threading.Thread(target=self._read_loop, args=(conn,), name="rerank-client", daemon=True).start()
+            print(f"[RerankClient] Connected to reranker worker at {self.address}")
+            return conn
+        finally:
+            self._connect_lock.release()
+
+    def _spawn(self):
+        """Start the worker in the background (no waiting) unless one is already starting"""
+        if self.spawn_args is None:
+            return
+        if self._process is not None and self._process.poll() is None:
+            return  # Ours is still loading
+        if _pid_alive(self.pidfile):
+            return  # Another process started it
+        # Own session: the worker is shared by every uvicorn worker on the node and
+        # exits by itself once none of them has been connected for idle_exit seconds
+        self._process = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--address", self.address,
+             "--pidfile", str(self.pidfile), "--idle-exit", str(self.idle_exit), *self.spawn_args],
+            start_new_session=True
+        )
+        print(f"[RerankClient] Starting reranker worker at {self.address} (pid {self._process.pid})")
+
+    def _read_loop(self, conn: Connection):
+        """Resolve pending futures from server replies"""
+        try:
+            while True:
+                reply = _recv(conn)
+                with self._lock:
+                    future = self._pending.pop(reply['id'], None)
+                if future is None:
+                    continue  # Caller already timed out
+                if reply.get('error') is not None:
+                    future.set_exception(RuntimeError(f"Reranker worker error: {reply['error']}"))
+                else:
+                    future.set_result(np.asarray(reply['scores'], dtype=np.float32))
+        except (EOFError, OSError, ValueError, KeyError):
+            pass
+        self._drop_connection(conn)
+
+    def _drop_connection(self, conn: Connection):
+        """Forget a broken connection and fail everything waiting on it"""
+        with self._lock:
+            if self._conn is conn:
+                self._conn = None
+            pending, self._pending = self._pending, {}
+        _close(conn)
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Reranker worker connection lost"))
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], timeout_ms: Optional[float] = None) -> np.ndarray:
+        """
+        Score (query, passage) pairs in the worker.
+
+        Args:
+            pairs: (query, passage) tuples
+            timeout_ms: Override of the client timeout for this call
+
+        Returns:
+            float32 scores aligned with pairs
+        """
+        if not pairs:
+            return np.empty(0, dtype=np.float32)
+        timeout = self.timeout if timeout_ms is None else timeout_ms / 1000
+
+        try:
+            conn = self._connect()
+        except ConnectionError:
+            self.failures += 1
+            raise
+        request_id = next(self._ids)
+        future: Future = Future()
+        try:
+            with self._lock:
+                if self._conn is not conn:
+                    raise ConnectionError("Reranker worker connection lost")
+                self._pending[request_id] = future
+                _send(conn, {'id': request_id, 'pairs': [list(p) for p in pairs], 'timeout': timeout})
+        except (OSError, ValueError) as e:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            self.failures += 1
+            self._drop_connection(conn)
+            raise ConnectionError(f"Reranker worker send failed: {e}")
+        except ConnectionError:
+            self.failures += 1
+            raise
+
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            self.timeouts += 1
+            raise TimeoutError(f"Reranker worker did not answer within {timeout * 1000:.0f}ms")
+        except ConnectionError:
+            self.failures += 1
+            raise
+
+    def close(self):
+        """Disconnect (the shared worker exits on its own once idle)"""
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            _close(conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared cross-encoder reranker worker (one per node)")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="'host:port' or Unix socket path")
+    parser.add_argument("--model-dir", type=Path, default=PROJECT_ROOT / "models" / "reranker-onnx")
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=16, help="Pairs per ONNX forward pass")
+    parser.add_argument("--threads", type=int, default=None, help="onnxruntime intra-op threads")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Batching window")
+    parser.add_argument("--max-batch-pairs", type=int, default=128, help="Pairs per shared batch")
+    parser.add_argument("--idle-exit", type=float, default=0.0,
+                        help="Exit after this many seconds without a connected client (0 = never)")
+    parser.add_argument("--pidfile", type=Path, default=None, help="Default: per address, in the temp directory")
+    args = parser.parse_args()
+
+    try:
+        authkey = get_authkey()
+    except RuntimeError as e:
+        print(f"[RerankWorker] {e}")
+        sys.exit(1)
+
+    pidfile = args.pidfile or default_pidfile(args.address)
+    if _pid_alive(pidfile) and int(pidfile.read_text().strip()) != os.getpid():
+        print(f"[RerankWorker] Already running (pidfile {pidfile})")
+        sys.exit(1)
+
+    address = parse_address(args.address)
+    if isinstance(address, str) and os.path.exists(address):
+        try:
+            Client(address, authkey=authkey).close()
+            print(f"[RerankWorker] Already running on {args.address}")
+            sys.exit(1)
+        except ConnectionRefusedError:
+            os.unlink(address)  # Stale socket left by a killed worker
+
+    pidfile.write_text(str(os.getpid()))
+    try:
+        # Run as a script: backend/llm is on sys.path, the llm package (API keys) is not needed
+        from reranker import ONNXReranker
+
+        reranker = ONNXReranker(args.model_dir, max_length=args.max_length,
+                                batch_size=args.batch_size, num_threads=args.threads)
+        reranker.load()  # Pay the load once, before accepting requests
+        server = RerankServer(reranker, args.address, args.max_wait_ms, args.max_batch_pairs,
+                              authkey=authkey, idle_exit=args.idle_exit)
+        try:
+            server.serve_forever()
+        except OSError as e:
+            # Address in use: another process already runs the worker on this node
+            print(f"[RerankWorker] Cannot listen on {args.address}: {e}")
+            sys.exit(1)
+    finally:
+        # Only remove our own pidfile (a worker that lost the race to bind must not)
+        try:
+            if pidfile.read_text().strip() == str(os.getpid()):
+                pidfile.unlink()
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
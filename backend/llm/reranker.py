@@ -0,0 +1,89 @@
+"""
+ONNX Cross-Encoder Reranker for Pryzm Project
+
+Runs an int8-quantized ONNX export of a small cross-encoder on
+onnxruntime (CPU). Pairs are tokenized in one batch call, sorted by
+length and run in buckets padded only to the longest pair in each
+bucket, so short passages don't pay for long ones (onnx_model.ONNXModel).
+
+The model is loaded lazily on the first predict() call; create the
+export with scripts/export_reranker_onnx.py.
+"""
+
+from pathlib import Path
+from typing import Optional, Sequence, Tuple, Union
+import numpy as np
+
+try:
+    from .onnx_model import ONNXModel
+except ImportError:  # Loaded as a top-level module (scripts put backend/llm on sys.path)
+    from onnx_model import ONNXModel
+
+
+class ONNXReranker(ONNXModel):
+    """
+    Quantized ONNX cross-encoder with the same predict() interface as
+    sentence_transformers.CrossEncoder.
+
+    Expects a directory with model_quantized.onnx (or model.onnx) and
+    tokenizer.json.
+    """
+
+    KIND = "reranker"
+    EXPORT_SCRIPT = "scripts/export_reranker_onnx.py"
+    TRUNCATION = "only_second"  # Truncate the passage, never the query
+
+    def __init__(
+        self,
+        model_dir: Union[str, Path],
+        max_length: int = 256,
+        batch_size: int = 16,
+        num_threads: Optional[int] = None
+    ):
+        """
+        Configure the reranker (nothing is loaded until first use).
+
+        Args:
+            model_dir: Directory produced by scripts/export_reranker_onnx.py
+            max_length: Max tokens per (query, passage) pair; longer passages are truncated
+            batch_size: Pairs per forward pass
+            num_threads: onnxruntime intra-op threads (None = onnxruntime default)
+        """
+        super().__init__(model_dir, max_length, batch_size, num_threads)
+
+    def _loaded_message(self, model_path: Path) -> str:
+        return f"[Reranker] Loaded {model_path.name} (max_length={self.max_length}, batch_size={self.batch_size})"
+
+    @staticmethod
+    def _relevance(logits: np.ndarray) -> np.ndarray:
+        """Relevance probabilities from the classification head's logits"""
+        logits = logits.reshape(len(logits), -1)
+        if logits.shape[1] == 1:
+            # Single-logit relevance head
+            return 1.0 / (1.0 + np.exp(-logits[:, 0]))
+        if logits.shape[1] == 2:
+            # 2-class head: probability of the "relevant" class
+            shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+            return shifted[:, 1] / shifted.sum(axis=1)
+        raise ValueError(f"Unsupported reranker output width {logits.shape[1]} (expected 1 or 2 logits per pair)")
+
+    def predict(self, pairs: Sequence[Tuple[str, str]]) -> np.ndarray:
+        """
+        Score (query, passage) pairs.
+
+        Args:
+            pairs: (query, passage) tuples
+
+        Returns:
+            float32 relevance scores in [0, 1] (sigmoid of a single logit, softmax
+            of a 2-class head), aligned with pairs
+        """
+        if not pairs:
+            return np.empty(0, dtype=np.float32)
+        self.load()
+
+        encodings = self.tokenizer.encode_batch([(query, passage) for query, passage in pairs])
+        scores = np.empty(len(pairs), dtype=np.float32)
+        for bucket, logits, _ in self.run_buckets(encodings):
+            scores[bucket] = self._relevance(logits)
+        return scores
@@ -5,16 +5,49 @@ Combines BM25 (FTS5) keyword search with FAISS semantic search,
 using RRF fusion and cross-encoder reranking.
 """
 
-import sqlite3
-import pickle
+import os
+import math
+import time
+import asyncio
+import hashlib
+import threading
 import numpy as np
 import faiss
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from dataclasses import dataclass
-from sentence_transformers import CrossEncoder
-from llm.embeddings import embed_query
-import json
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from llm.embeddings import embed_query, aembed_query, embed_queries, aembed_queries
+from llm.local_embeddings import LocalEmbedder
+from llm.chunk_store import ChunkStore, FilterKey, normalize_filters
+from llm.db_pool import SQLitePool
+from llm.vector_index import (
+    read_faiss_index, apply_search_params, selector_search_params, load_id_mapping, load_legacy_mapping,
+    truncate_embeddings, FullVectors, BinaryVectorIndex, VECTOR_SPACE_FILES
+)
+from llm.cache import LRUCache, normalize_query
+from llm.fusion import FUSION_METHODS, fuse_runs, fusion_columns
+from llm.reranker import ONNXReranker
+from llm.rerank_service import RerankClient
+
+
+def _empty_hits() -> Tuple[np.ndarray, np.ndarray]:
+    """Empty (ids, scores) pair returned by a search branch with no results"""
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+
+def _timed(fn: Callable, *args, **kwargs) -> Tuple[Any, float]:
+    """Call fn and return (result, elapsed milliseconds)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+async def _atimed(awaitable) -> Tuple[Any, float]:
+    """Await a coroutine and return (result, elapsed milliseconds)"""
+    start = time.perf_counter()
+    result = await awaitable
+    return result, (time.perf_counter() - start) * 1000
 
 
 @dataclass
@@ -22,18 +55,109 @@ class RetrievalConfig:
     """Configuration for retrieval system"""
     db_path: str = "data/corpus.db"
     faiss_index_path: str = "data/vectors.faiss"
-    chunk_mapping_path: str = "data/vectors.pkl"
+    # Position mappings, only needed for indexes built without ids (labels are chunks.rowid otherwise)
+    chunk_mapping_path: str = "data/vectors.ids.npy"  # int64 chunks.rowid per FAISS position
+    legacy_mapping_path: str = "data/vectors.pkl"  # Pickled chunk_id list (used if the .npy is missing)
+    faiss_mmap: bool = True  # Memory-map the index so workers share it via the page cache
+    # Search-time overrides, e.g. "efSearch=64" (HNSW) or "nprobe=16" (IVF); empty = values stored in the index.
+    # The index type itself is chosen at ingestion (--index-factory, see scripts/ingestion/tune_index.py)
+    faiss_search_params: str = ""
+    # Truncated (Matryoshka) indexes, built with ingest_to_db.py --truncate-dim: queries are cut to the
+    # index dimension and the top faiss_top_k * rescore_factor candidates are rescored exactly against
+    # the full-dimension embeddings stored next to the index (embeddings.npy, memory-mapped)
+    rescore_factor: float = 2.0  # 0 = keep the truncated scores
+    # Vector search: "faiss" = the index above, "binary" = Hamming top-N over sign-bit codes of the stored
+    # embeddings (embeddings.bin.npy, 32x smaller than float32) rescored against float16 vectors
+    # (embeddings.f16.npy); both files are written by ingestion next to embeddings.npy
+    vector_search: str = "faiss"
+    binary_rescore_factor: float = 8.0  # Hamming candidates rescored per result
+    
+    # Vector space queried by the FAISS branch: "openai" = OpenAI embeddings + faiss_index_path,
+    # "local" = ONNX sentence-embedding model run in this process + local_faiss_index_path (no network
+    # access needed). Both indexes are built by scripts/ingestion/ingest_to_db.py --vector-spaces;
+    # export the local model with scripts/export_embedding_onnx.py
+    vector_space: str = os.getenv("VECTOR_SPACE", "openai")
+    local_faiss_index_path: str = "data/vectors.local.faiss"
+    local_embedding_path: str = "models/embedding-onnx"
+    local_embedding_max_length: int = 256  # Tokens per query
+    local_embedding_threads: Optional[int] = None  # onnxruntime intra-op threads (None = default)
     
     # Retrieval parameters
     bm25_top_k: int = 120
     faiss_top_k: int = 120
     rrf_k: int = 60
     fusion_top_k: int = 200
+    
+    # Fusion: 'rrf' (weighted Reciprocal Rank Fusion), 'minmax' or 'zscore' (normalized CombSUM).
+    # Can be overridden per request via retrieve(fusion={...})
+    fusion_method: str = "rrf"
+    bm25_weight: float = 1.0
+    faiss_weight: float = 1.0
     rerank_top_k: int = 32
     
-    # Cross-encoder model (disabled for performance)
+    # Latency budget per retrieve() call (0 = unbounded; overridable per request). The BM25 and
+    # vector branches must finish by budget - budget_reserve_ms; a branch that misses the deadline
+    # (or fails) is dropped and the result comes from the other one, flagged in stats['degraded']
+    latency_budget_ms: float = 2500.0
+    budget_reserve_ms: float = 150.0  # Kept for fusion, reranking and hydration
+    # When the vector branch is dropped, BM25 may run this far past the deadline (into the reserve);
+    # if it still has not answered the result is empty and stats['degraded'] is 'empty'
+    degraded_bm25_wait_ms: float = 100.0
+    # HNSW efSearch by vector-branch time left after embedding: (below_ms, efSearch), first match wins;
+    # with more time left the index's own efSearch applies
+    budget_ef_search: Tuple[Tuple[float, int], ...] = ((50.0, 32), (200.0, 64))
+    
+    # Run BM25 alongside the embedding call + FAISS search instead of one after the other
+    concurrent_search: bool = True
+    search_workers: int = 4  # Bounded thread pool for BM25/FAISS/SQLite work (also used by aretrieve)
+    vector_workers: int = 4  # Separate pool for budgeted vector branches, so slow embedding calls never queue BM25
+    
+    # SQLite connection pool (one read-only connection per thread)
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # Bytes of corpus.db to memory-map
+    sqlite_cache_size_kib: int = 64 * 1024  # Page cache per connection
+    
+    # Chunk store
+    text_cache_size: int = 2048  # Chunk texts kept in memory (LRU)
+    
+    # Metadata filters (doc_ids / doctypes / date range)
+    filter_cache_size: int = 256  # Filter masks and FAISS selectors kept (LRU)
+    filter_exact_max: int = 2048  # Filters selecting at most this many vectors are scored exactly instead of walking the index
+    
+    # Corpus snapshot (corpus.db + index + mapping sizes/mtimes), checked at most this often by
+    # get_retriever(); a change loads a new retriever (store, indexes, empty caches) in the
+    # background and swaps it in when ready (0 = never reload, restart after re-ingesting)
+    snapshot_check_interval: float = 10.0
+    reload_grace_s: float = 60.0  # The replaced retriever is closed after in-flight requests had this long
+    
+    # Final result cache (ranked ids + scores), per loaded snapshot
+    result_cache_size: int = 1024  # 0 = disabled
+    result_cache_ttl: float = 3600.0  # Seconds (0 = never expire)
+    
+    # Reranker: "worker" = int8 ONNX cross-encoder in a shared per-node process (llm/rerank_service.py),
+    # "onnx" = same model in this process, loaded on first use, "cross_encoder" = sentence-transformers model.
+    # Export the ONNX model with scripts/export_reranker_onnx.py
+    reranker_backend: str = "worker"
+    reranker_onnx_path: str = "models/reranker-onnx"
+    reranker_max_length: int = 256  # Tokens per (query, passage) pair
+    reranker_batch_size: int = 16  # Pairs per forward pass (length-bucketed)
+    reranker_threads: Optional[int] = None  # onnxruntime intra-op threads (None = default)
+    rerank_candidates: int = 48  # Fused candidates scored by the cross-encoder (cap)
+    
+    # Cross-encoder score cache, keyed by (normalized query hash, chunk_id) per loaded snapshot;
+    # the model only scores pairs that miss
+    rerank_cache_size: int = 50000  # Pairs kept (0 = disabled)
+    rerank_cache_ttl: float = 86400.0  # Seconds (0 = never expire)
+    
+    # Reranker worker (reranker_backend="worker"); on timeout or error results keep the fused order
+    reranker_address: str = "127.0.0.1:8771"  # 'host:port' or Unix socket path
+    reranker_timeout_ms: float = 800.0  # Per-request timeout
+    reranker_autostart: bool = True  # Start the worker (in the background) when nothing is listening; it exits when idle
+    reranker_max_wait_ms: float = 5.0  # Worker batching window for concurrent requests
+    reranker_max_batch_pairs: int = 128  # Worker pairs per shared forward pass
+    
+    # sentence-transformers cross-encoder (reranker_backend="cross_encoder")
     reranker_model: str = "BAAI/bge-reranker-v2-m3"
-    load_reranker: bool = False  # DISABLED: Don't load reranker to save ~1-2s init time and ~1GB memory
+    load_reranker: bool = False  # DISABLED: ~1-2s init time and ~1GB memory on CPU
 
 
 @dataclass
@@ -63,17 +187,18 @@ class HybridRetriever:
     Hybrid retrieval system combining BM25 and FAISS vector search.
     
     This class manages:
-    - SQLite database connection (with FTS5 for BM25)
+    - SQLite connection pool (with FTS5 for BM25)
     - FAISS vector index (for semantic search)
     - Cross-encoder reranking
     """
     
-    def __init__(self, config: Optional[RetrievalConfig] = None):
+    def __init__(self, config: Optional[RetrievalConfig] = None, reranker: Optional[Any] = None):
         """
         Initialize the hybrid retriever.
         
         Args:
             config: Configuration object (uses defaults if None)
+            reranker: Already loaded reranker to reuse (snapshot reloads), instead of loading one
         """
         self.config = config or RetrievalConfig()
         
@@ -85,56 +210,276 @@ class HybridRetriever:
         llm_dir = Path(__file__).parent
         backend_dir = llm_dir.parent
         project_root = backend_dir.parent
+        self.project_root = project_root
+        
+        if self.config.vector_space not in ("openai", "local"):
+            raise ValueError(f"Unknown vector space '{self.config.vector_space}', expected 'openai' or 'local'")
         
         self.db_path = project_root / self.config.db_path
-        self.faiss_path = project_root / self.config.faiss_index_path
-        self.mapping_path = project_root / self.config.chunk_mapping_path
+        if self.config.vector_space == "local":
+            self.faiss_path = project_root / self.config.local_faiss_index_path
+        else:
+            self.faiss_path = project_root / self.config.faiss_index_path
+        self.mapping_path: Optional[Path] = project_root / self.config.chunk_mapping_path
+        self.legacy_mapping_path = project_root / self.config.legacy_mapping_path
+        # Files that identify the corpus snapshot (fixed before loading adjusts mapping_path)
+        self._snapshot_paths = (self.db_path, self.faiss_path, self.mapping_path, self.legacy_mapping_path)
         
         # Initialize components
-        self.conn: Optional[sqlite3.Connection] = None
+        self.db: Optional[SQLitePool] = None
         self.faiss_index: Optional[faiss.Index] = None
-        self.chunk_ids: Optional[List[str]] = None
-        self.reranker: Optional[CrossEncoder] = None
+        self.faiss_ids_are_rowids = False  # Index built with ids: labels are chunks.rowid
+        self.faiss_rowids: Optional[np.ndarray] = None  # FAISS position -> chunks.rowid (position-mapped indexes)
+        self.faiss_to_id: Optional[np.ndarray] = None  # FAISS position -> chunk store id (position-mapped indexes)
+        self._legacy_chunk_ids: Optional[List[str]] = None
+        self.full_vectors: Optional[FullVectors] = None  # Rescoring vectors for a truncated index
+        self.binary_index: Optional[BinaryVectorIndex] = None  # Set for vector_search="binary"
+        self.store: Optional[ChunkStore] = None
+        self.reranker: Optional[Any] = None  # RerankClient, ONNXReranker or sentence_transformers.CrossEncoder
+        self.local_embedder: Optional[LocalEmbedder] = None  # Set for vector_space="local"
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.config.search_workers,
+            thread_name_prefix="retriever"
+        )
+        self._vector_executor = ThreadPoolExecutor(
+            max_workers=self.config.vector_workers,
+            thread_name_prefix="retriever-vector"
+        )
+        self.result_cache = LRUCache(self.config.result_cache_size, self.config.result_cache_ttl)
+        self.rerank_cache = LRUCache(self.config.rerank_cache_size, self.config.rerank_cache_ttl)
+        self._selector_cache = LRUCache(self.config.filter_cache_size)
+        self._faiss_reconstructable = True  # Cleared if the index type cannot reconstruct vectors
+        self._snapshot_version: Optional[str] = None
+        self._snapshot_checked = time.monotonic()
         
-        # Load everything on initialization
+        # Load everything on initialization; the snapshot is identified first so a
+        # re-ingest that lands while loading is picked up by the next check
+        self._snapshot_version = self.snapshot_version()
         self._connect_database()
         self._load_faiss_index()
-        self._load_reranker()
+        self._load_full_vectors()
+        self._load_binary_index()
+        self._load_query_embedder()
+        self._load_chunk_store()
+        if reranker is not None:
+            self.reranker = reranker
+        else:
+            self._load_reranker()
         
         print(f"[HybridRetriever] Initialized successfully")
         print(f"  - Database: {self.db_path}")
-        print(f"  - FAISS vectors: {self.faiss_index.ntotal if self.faiss_index else 0}")
-        print(f"  - Chunk mappings: {len(self.chunk_ids) if self.chunk_ids else 0}")
+        print(f"  - FAISS vectors: {self.faiss_index.ntotal if self.faiss_index else 0} ({self.config.vector_space} space)")
+        if self.faiss_ids_are_rowids:
+            print(f"  - FAISS ids: chunks.rowid")
+        else:
+            print(f"  - Chunk mappings: {len(self.faiss_to_id) if self.faiss_to_id is not None else 0}")
     
     def _connect_database(self):
-        """Connect to SQLite database with FTS5"""
+        """Create the read-only SQLite connection pool and check the database opens"""
         if not self.db_path.exists():
             raise FileNotFoundError(f"Database not found: {self.db_path}")
         
-        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
-        self.conn.execute("PRAGMA journal_mode=WAL;")
-        print(f"[HybridRetriever] Connected to database")
+        self.db = SQLitePool(
+            self.db_path,
+            mmap_size=self.config.sqlite_mmap_size,
+            cache_size_kib=self.config.sqlite_cache_size_kib
+        )
+        with self.db.connection() as conn:
+            conn.execute("SELECT 1 FROM chunks LIMIT 1").fetchall()
+        print(f"[HybridRetriever] Connected to database (read-only pool)")
     
     def _load_faiss_index(self):
-        """Load FAISS index and chunk ID mapping"""
+        """Load FAISS index (memory-mapped when supported) and its id mapping"""
         if not self.faiss_path.exists():
             raise FileNotFoundError(f"FAISS index not found: {self.faiss_path}")
-        if not self.mapping_path.exists():
-            raise FileNotFoundError(f"Chunk mapping not found: {self.mapping_path}")
         
         # Load FAISS index
-        self.faiss_index = faiss.read_index(str(self.faiss_path))
-        print(f"[HybridRetriever] Loaded FAISS index: {self.faiss_index.ntotal} vectors")
+        load_start = time.perf_counter()
+        self.faiss_index, load_mode = read_faiss_index(self.faiss_path, mmap=self.config.faiss_mmap)
+        load_ms = (time.perf_counter() - load_start) * 1000
+        print(f"[HybridRetriever] Loaded FAISS index: {self.faiss_index.ntotal} vectors ({load_mode}, {load_ms:.0f}ms)")
+        if self.config.faiss_search_params:
+            apply_search_params(self.faiss_index, self.config.faiss_search_params)
+            print(f"[HybridRetriever] FAISS search params: {self.config.faiss_search_params}")
+        
+        # Indexes built with ids return chunks.rowid labels directly - no mapping file
+        if isinstance(self.faiss_index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            self.faiss_ids_are_rowids = True
+            self.mapping_path = None
+            print(f"[HybridRetriever] FAISS labels are chunks.rowid (id-mapped index)")
+            return
+        
+        # Position-mapped index: compact mmap-able .npy, or the legacy pickle
+        if self.mapping_path.exists():
+            self.faiss_rowids = load_id_mapping(self.mapping_path)
+            print(f"[HybridRetriever] Loaded {len(self.faiss_rowids)} id mappings (mmap)")
+        elif self.legacy_mapping_path.exists():
+            self._legacy_chunk_ids = load_legacy_mapping(self.legacy_mapping_path)
+            print(f"[HybridRetriever] Loaded {len(self._legacy_chunk_ids)} legacy chunk mappings from {self.legacy_mapping_path.name} "
+                  f"(run scripts/ingestion/ingest_to_db.py --convert-mapping to switch to {self.mapping_path.name})")
+            self.mapping_path = self.legacy_mapping_path
+        else:
+            raise FileNotFoundError(f"Chunk mapping not found: {self.mapping_path}")
+    
+    def _embeddings_paths(self) -> Tuple[Path, Path]:
+        """Stored embeddings and their ids, written by ingestion next to the index"""
+        embeddings_name = VECTOR_SPACE_FILES[self.config.vector_space][1]
+        return (self.faiss_path.parent / f"{embeddings_name}.npy",
+                self.faiss_path.parent / f"{embeddings_name}.ids.npy")
+    
+    def _load_full_vectors(self):
+        """Memory-map the stored full-dimension embeddings when the index holds truncated vectors"""
+        if self.config.rescore_factor <= 0 or not self.faiss_ids_are_rowids:
+            return
+        embeddings_path, ids_path = self._embeddings_paths()
+        if not (embeddings_path.exists() and ids_path.exists()):
+            return
+        
+        full_vectors = FullVectors.load(embeddings_path, ids_path)
+        if full_vectors.dimension <= self.faiss_index.d:
+            return  # The index already holds full vectors
+        if len(full_vectors) != self.faiss_index.ntotal:
+            print(f"[HybridRetriever] Warning: {embeddings_path.name} has {len(full_vectors)} vectors, "
+                  f"index has {self.faiss_index.ntotal} (candidates without a stored vector keep their truncated score)")
+        self.full_vectors = full_vectors
+        print(f"[HybridRetriever] Truncated index ({self.faiss_index.d} of {full_vectors.dimension} dims), "
+              f"rescoring {self.config.rescore_factor:g}x candidates against {embeddings_path.name}")
+    
+    def _load_binary_index(self):
+        """Load sign-bit codes and float16 vectors for vector_search='binary'"""
+        if self.config.vector_search == "faiss":
+            return
+        if self.config.vector_search != "binary":
+            raise ValueError(f"Unknown vector search '{self.config.vector_search}', expected 'faiss' or 'binary'")
+        if not self.faiss_ids_are_rowids:
+            raise ValueError("Binary vector search needs an index built with chunks.rowid ids - re-run ingestion")
+        embeddings_path, ids_path = self._embeddings_paths()
+        if not (embeddings_path.exists() and ids_path.exists()):
+            raise FileNotFoundError(f"Stored embeddings not found: {embeddings_path} - re-run ingestion")
+        
+        load_start = time.perf_counter()
+        self.binary_index = BinaryVectorIndex.load(embeddings_path, ids_path)
+        load_ms = (time.perf_counter() - load_start) * 1000
+        print(f"[HybridRetriever] Binary vector search: {len(self.binary_index)} codes "
+              f"({self.binary_index.memory_bytes() / (1024 * 1024):.1f} MiB), float16 rescoring of "
+              f"{self.config.binary_rescore_factor:g}x candidates ({load_ms:.0f}ms)")
+    
+    def _load_query_embedder(self):
+        """Set up the in-process query embedder for the local vector space and check its dimension"""
+        if self.config.vector_space != "local":
+            return
         
-        # Load chunk ID mapping
-        with open(self.mapping_path, 'rb') as f:
-            self.chunk_ids = pickle.load(f)
-        print(f"[HybridRetriever] Loaded {len(self.chunk_ids)} chunk mappings")
+        self.local_embedder = LocalEmbedder(
+            self.project_root / self.config.local_embedding_path,
+            max_length=self.config.local_embedding_max_length,
+            num_threads=self.config.local_embedding_threads
+        )
+        if self.local_embedder.model_path is None:
+            raise FileNotFoundError(
+                f"Local embedding model not found in {self.local_embedder.model_dir} - run scripts/export_embedding_onnx.py"
+            )
+        
+        # Load now rather than on the first query; a mismatch means the index was built with another model
+        load_start = time.perf_counter()
+        dimension = self.local_embedder.embed_query("warm-up").shape[1]
+        load_ms = (time.perf_counter() - load_start) * 1000
+        stored = self.binary_index if self.binary_index is not None else self.full_vectors
+        expected = stored.dimension if stored is not None else self.faiss_index.d
+        if dimension < self.faiss_index.d or (stored is not None and dimension != expected):
+            raise ValueError(
+                f"Local embedding model {self.local_embedder.model_name} produces {dimension}-d vectors "
+                f"but {self.faiss_path.name} holds {expected}-d vectors - rebuild the local index"
+            )
+        print(f"[HybridRetriever] Local query embedder ready: {self.local_embedder.model_name} ({dimension}-d, {load_ms:.0f}ms)")
+    
+    def _embed_query(self, query: str, timeout: Optional[float] = None) -> np.ndarray:
+        """Query vector in the configured vector space, shape (1, d); timeout bounds the API call"""
+        if self.local_embedder is not None:
+            return self.local_embedder.embed_query(query)
+        return embed_query(query, timeout)
+    
+    async def _aembed_query(
+        self,
+        query: str,
+        timeout: Optional[float] = None,
+        executor: Optional[ThreadPoolExecutor] = None
+    ) -> np.ndarray:
+        """Async version of _embed_query(); the local model runs on the thread pool (or executor)"""
+        if self.local_embedder is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor or self._executor, self.local_embedder.embed_query, query)
+        return await aembed_query(query, timeout)
+    
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Query vectors in the configured vector space, shape (len(queries), d)"""
+        if self.local_embedder is not None:
+            return self.local_embedder.embed(queries)
+        return embed_queries(queries)
+    
+    async def _aembed_queries(self, queries: List[str]) -> np.ndarray:
+        """Async version of _embed_queries()"""
+        if self.local_embedder is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self.local_embedder.embed, queries)
+        return await aembed_queries(queries)
+    
+    def _load_chunk_store(self):
+        """Load chunk metadata into the columnar store and align it with FAISS positions"""
+        self.store = ChunkStore(
+            self.db,
+            text_cache_size=self.config.text_cache_size,
+            filter_cache_size=self.config.filter_cache_size
+        )
+        
+        if self.faiss_ids_are_rowids:
+            return
+        
+        # FAISS position -> store id, computed once (-1 = chunk no longer in the database)
+        if self.faiss_rowids is not None:
+            self.faiss_to_id = self.store.ids_from_rowids(self.faiss_rowids)
+        else:
+            self.faiss_to_id = self.store.ids_from_chunk_ids(self._legacy_chunk_ids)
+            self._legacy_chunk_ids = None
+        missing = int((self.faiss_to_id < 0).sum())
+        if missing:
+            print(f"[HybridRetriever] Warning: {missing} FAISS entries have no matching chunk in the database")
     
     def _load_reranker(self):
-        """Load cross-encoder reranking model (only if enabled)"""
-        if self.config.load_reranker:
+        """Set up the reranker (the ONNX model itself loads lazily on first rerank)"""
+        if self.config.reranker_backend in ("worker", "onnx"):
+            onnx_reranker = ONNXReranker(
+                self.project_root / self.config.reranker_onnx_path,
+                max_length=self.config.reranker_max_length,
+                batch_size=self.config.reranker_batch_size,
+                num_threads=self.config.reranker_threads
+            )
+            if onnx_reranker.model_path is None:
+                self.reranker = None
+                print(f"[HybridRetriever] ONNX reranker not found in {onnx_reranker.model_dir} - "
+                      f"run scripts/export_reranker_onnx.py to enable reranking")
+            elif self.config.reranker_backend == "onnx":
+                self.reranker = onnx_reranker
+                print(f"[HybridRetriever] ONNX reranker available: {onnx_reranker.model_path} (loads on first use)")
+            else:
+                spawn_args = None
+                if self.config.reranker_autostart:
+                    spawn_args = [
+                        "--model-dir", str(onnx_reranker.model_dir),
+                        "--max-length", str(self.config.reranker_max_length),
+                        "--batch-size", str(self.config.reranker_batch_size),
+                        "--max-wait-ms", str(self.config.reranker_max_wait_ms),
+                        "--max-batch-pairs", str(self.config.reranker_max_batch_pairs)
+                    ]
+                    if self.config.reranker_threads:
+                        spawn_args += ["--threads", str(self.config.reranker_threads)]
+                self.reranker = RerankClient(
+                    self.config.reranker_address,
+                    timeout_ms=self.config.reranker_timeout_ms,
+                    spawn_args=spawn_args
+                )
+                print(f"[HybridRetriever] Reranker worker: {self.config.reranker_address} (connects on first use)")
+        elif self.config.load_reranker:
+            from sentence_transformers import CrossEncoder
             print(f"[HybridRetriever] Loading reranker model: {self.config.reranker_model}")
             self.reranker = CrossEncoder(self.config.reranker_model)
             print(f"[HybridRetriever] Reranker loaded")
@@ -142,20 +487,153 @@ class HybridRetriever:
             print(f"[HybridRetriever] Reranker DISABLED - skipping model load (saves ~1-2s init + ~1GB memory)")
             self.reranker = None
     
-    def bm25_search(self, query: str, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    def snapshot_version(self) -> str:
+        """
+        Identify the on-disk corpus snapshot (corpus.db + vectors.faiss + mappings, if any).
+        
+        Returns:
+            Short hash of the files' sizes and modification times
+        """
+        parts = []
+        for path in self._snapshot_paths:
+            try:
+                stat = os.stat(path)
+                parts.append(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+            except FileNotFoundError:
+                parts.append(f"{path.name}:missing")
+        return hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()[:16]
+    
+    def snapshot_changed(self) -> bool:
+        """
+        Whether the on-disk snapshot differs from the loaded one.
+        
+        Stats the files at most once per snapshot_check_interval; in between
+        (and with checks disabled) it returns False without touching the disk.
+        """
+        interval = self.config.snapshot_check_interval
+        now = time.monotonic()
+        if interval <= 0 or now - self._snapshot_checked < interval:
+            return False
+        self._snapshot_checked = now
+        return self.snapshot_version() != self._snapshot_version
+    
+    def _fusion_params(self, fusion: Optional[Dict[str, Any]] = None) -> Tuple[str, float, float]:
+        """
+        Resolve fusion settings, with per-request values overriding the config.
+        
+        Args:
+            fusion: Optional dict with method, bm25_weight, faiss_weight
+            
+        Returns:
+            Tuple of (method, bm25 weight, faiss weight)
+        """
+        fusion = fusion or {}
+        method = fusion.get('method') or self.config.fusion_method
+        if method not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method '{method}', expected one of {FUSION_METHODS}")
+        bm25_weight = fusion.get('bm25_weight')
+        faiss_weight = fusion.get('faiss_weight')
+        return (
+            method,
+            float(self.config.bm25_weight if bm25_weight is None else bm25_weight),
+            float(self.config.faiss_weight if faiss_weight is None else faiss_weight)
+        )
+    
+    def _result_cache_key(
+        self,
+        query: str,
+        top_k: int,
+        use_reranking: bool,
+        filter_key: Optional[FilterKey] = None,
+        fusion_params: Optional[Tuple[str, float, float]] = None
+    ) -> Tuple:
+        """
+        Build the result cache key (caches belong to this retriever's loaded snapshot).
+        
+        Args:
+            query: Search query
+            top_k: Number of final results
+            use_reranking: Whether reranking was requested
+            filter_key: Normalized metadata filters
+            fusion_params: Resolved fusion settings from _fusion_params()
+            
+        Returns:
+            Hashable cache key
+        """
+        reranked = bool(use_reranking and self.reranker)
+        return (normalize_query(query), top_k, reranked, filter_key, fusion_params)
+    
+    def _cached_results(self, cache_key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        """
+        Hydrate a cached ranking, if present.
+        
+        Args:
+            cache_key: Key from _result_cache_key()
+            
+        Returns:
+            Final results, or None on a miss
+        """
+        entry = self.result_cache.get(cache_key)
+        if entry is None:
+            return None
+        ids, scores = entry
+        results = self.store.hydrate(ids, scores)
+        for rank, result in enumerate(results, start=1):
+            result['final_rank'] = rank
+        return results
+    
+    def _filter_sql(self, filter_key: FilterKey) -> Tuple[str, List[Any]]:
+        """
+        Translate a filter into a WHERE clause over chunks (uses idx_doc_id / idx_doctype / idx_date).
+        
+        Args:
+            filter_key: Normalized metadata filters
+            
+        Returns:
+            Tuple of (SQL condition, parameters)
+        """
+        doc_ids, doctypes, date_from, date_to = filter_key
+        clauses, params = [], []
+        if doc_ids:
+            clauses.append(f"doc_id IN ({','.join('?' * len(doc_ids))})")
+            params.extend(doc_ids)
+        if doctypes:
+            clauses.append(f"doctype IN ({','.join('?' * len(doctypes))})")
+            params.extend(doctypes)
+        if date_from:
+            clauses.append("date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("date <= ?")
+            params.append(date_to + '\uffff')  # Inclusive, matching ChunkStore.filter_mask
+        return " AND ".join(clauses), params
+    
+    def bm25_search(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
         Perform BM25 full-text search using FTS5.
         
         Args:
             query: Search query
             top_k: Number of results to return (uses config default if None)
+            filters: Optional metadata filters (doc_ids, doctypes, date_from, date_to),
+                     applied inside the FTS5 query so LIMIT counts only matching chunks
             
         Returns:
-            List of search results with BM25 scores
+            Tuple of (chunk store ids, BM25 scores), best match first
         """
         if top_k is None:
             top_k = self.config.bm25_top_k
         
+        filter_key = normalize_filters(filters)
+        mask = self.store.filter_mask(filter_key)
+        if mask is not None and not mask.any():
+            return _empty_hits()
+        
         # Sanitize query for FTS5 - remove/escape special characters
         # FTS5 special chars: " * ( ) : AND OR NOT NEAR
         # Remove all special chars and keep only alphanumeric and spaces
@@ -165,187 +643,363 @@ class HybridRetriever:
         
         if not sanitized_query:
             print(f"[BM25] Query sanitized to empty string, returning no results")
-            return []
+            return _empty_hits()
+        
+        where, params = "fts_chunks MATCH ?", [sanitized_query]
+        if filter_key is not None:
+            filter_sql, filter_params = self._filter_sql(filter_key)
+            where += f" AND rowid IN (SELECT rowid FROM chunks WHERE {filter_sql})"
+            params.extend(filter_params)
         
         try:
-            cursor = self.conn.execute("""
-                SELECT chunks.rowid, chunks.chunk_id, chunks.doc_id, chunks.doc_title, 
-                       chunks.source_url, chunks.date, chunks.doctype, chunks.page,
-                       chunks.section_path, chunks.text, chunks.is_table,
-                       bm25(fts_chunks) AS score
-                FROM fts_chunks
-                JOIN chunks ON chunks.rowid = fts_chunks.rowid
-                WHERE fts_chunks MATCH ?
-                ORDER BY score
-                LIMIT ?
-            """, (sanitized_query, top_k))
+            # Only rowids and scores - metadata comes from the chunk store
+            with self.db.connection() as conn:
+                cursor = conn.execute(f"""
+                    SELECT rowid, bm25(fts_chunks) AS score
+                    FROM fts_chunks
+                    WHERE {where}
+                    ORDER BY score
+                    LIMIT ?
+                """, (*params, top_k))
+                rows = cursor.fetchall()
         except Exception as e:
             print(f"[BM25] Search failed with query '{sanitized_query}': {e}")
             print(f"[BM25] Returning empty results")
-            return []
+            return _empty_hits()
         
-        results = []
-        for row in cursor.fetchall():
-                result = {
-                'chunk_id': row['chunk_id'],
-                'doc_id': row['doc_id'],
-                'doc_title': row['doc_title'],
-                'source_url': row['source_url'],
-                'date': row['date'],
-                'doctype': row['doctype'],
-                'page': row['page'],
-                'section_path': json.loads(row['section_path']) if row['section_path'] else [],
-                'text': row['text'],
-                'is_table': bool(row['is_table']),
-                'bm25_score': float(row['score'])
-                }
-                results.append(result)
+        if not rows:
+            return _empty_hits()
         
-        return results
+        rowids = np.array([row[0] for row in rows], dtype=np.int64)
+        scores = np.array([row[1] for row in rows], dtype=np.float32)
+        ids = self.store.ids_from_rowids(rowids)
+        keep = ids >= 0
+        return ids[keep], scores[keep]
     
-    def faiss_search(self, query: str, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    def faiss_search(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
         Perform semantic search using FAISS vector index.
         
         Args:
             query: Search query
             top_k: Number of results to return (uses config default if None)
+            filters: Optional metadata filters (see bm25_search)
+            
+        Returns:
+            Tuple of (chunk store ids, similarity scores), best match first
+        """
+        # Get query embedding
+        query_vector = self._embed_query(query)
+        return self.search_vector(query_vector, top_k, filters)
+    
+    def _faiss_filter(self, filter_key: FilterKey) -> Tuple[np.ndarray, Optional[faiss.IDSelector], np.ndarray]:
+        """
+        Resolve a filter to the FAISS labels it allows, plus a bitmap selector over them.
+        
+        Args:
+            filter_key: Normalized metadata filters
+            
+        Returns:
+            Tuple of (allowed labels, IDSelectorBitmap or None if empty, packed bitmap backing the selector)
+        """
+        entry = self._selector_cache.get(filter_key)
+        if entry is not None:
+            return entry
+        
+        mask = self.store.filter_mask(filter_key)
+        if self.faiss_ids_are_rowids:
+            labels = self.store.rowids[mask]
+        else:
+            positions = np.flatnonzero(self.faiss_to_id >= 0)
+            labels = positions[mask[self.faiss_to_id[positions]]].astype(np.int64)
+        
+        selector, bitmap = None, np.empty(0, dtype=np.uint8)
+        if len(labels):
+            bits = np.zeros(int(labels.max()) + 1, dtype=bool)
+            bits[labels] = True
+            bitmap = np.packbits(bits, bitorder='little')
+            # The selector points into bitmap, which is kept alongside it in the cache entry
+            selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))  # n = bitmap bytes
+        
+        entry = (labels, selector, bitmap)
+        self._selector_cache.put(filter_key, entry)
+        return entry
+    
+    def _search_subset(self, query_vectors: np.ndarray, labels: np.ndarray, top_k: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Exact search over a small set of FAISS labels using reconstructed vectors.
+        
+        Args:
+            query_vectors: Normalized query embeddings of shape (n, dim)
+            labels: FAISS labels to score
+            top_k: Number of results per query
             
         Returns:
-            List of search results with similarity scores
+            (distances, labels) in FAISS search layout, or None if the index cannot reconstruct vectors
+        """
+        try:
+            vectors = self.faiss_index.reconstruct_batch(labels)
+        except RuntimeError:
+            print(f"[FAISS] Index cannot reconstruct vectors, using selector search for filters")
+            self._faiss_reconstructable = False
+            return None
+        
+        similarities = query_vectors @ vectors.T
+        if self.faiss_index.metric_type == faiss.METRIC_L2:
+            # Match the index's own scores: squared L2 distance, smallest first
+            scores = ((vectors * vectors).sum(axis=1)[None, :]
+                      + (query_vectors * query_vectors).sum(axis=1)[:, None] - 2 * similarities)
+            order_keys = scores
+        else:
+            scores = similarities
+            order_keys = -similarities
+        
+        k = min(top_k, len(labels))
+        top = np.argpartition(order_keys, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(top, np.argsort(np.take_along_axis(order_keys, top, axis=1), axis=1, kind='stable'), axis=1)
+        return np.take_along_axis(scores, top, axis=1), labels[top]
+    
+    def search_vector(
+        self,
+        query_vector: np.ndarray,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search the FAISS index with an already computed query embedding.
+        
+        Args:
+            query_vector: Query embedding of shape (1, dim)
+            top_k: Number of results to return (uses config default if None)
+            filters: Optional metadata filters (see bm25_search)
+            ef_search: Per-request HNSW efSearch (None = the index's own)
+            
+        Returns:
+            Tuple of (chunk store ids, similarity scores), best match first
+        """
+        return self.search_vectors(query_vector, top_k, filters, ef_search)[0]
+    
+    def _search_faiss(
+        self,
+        query_vectors: np.ndarray,
+        top_k: int,
+        labels: Optional[np.ndarray],
+        selector: Optional[faiss.IDSelector],
+        ef_search: Optional[int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        FAISS index search for search_vectors(), in FAISS search layout (distances, labels).
+        
+        Args:
+            query_vectors: Normalized query embeddings (n, dim)
+            top_k: Results per query
+            labels: Labels allowed by the filter (None = no filter)
+            selector: Bitmap selector over labels
+            ef_search: Per-request HNSW efSearch (None = the index's own)
+        """
+        full_queries = None
+        search_k = top_k
+        if query_vectors.shape[1] > self.faiss_index.d:
+            full_queries = query_vectors
+            query_vectors = truncate_embeddings(query_vectors, self.faiss_index.d)
+            if self.full_vectors is not None:
+                search_k = max(top_k, math.ceil(top_k * self.config.rescore_factor))
+        
+        result = None
+        if labels is not None:
+            if len(labels) <= self.config.filter_exact_max and self._faiss_reconstructable:
+                result = self._search_subset(query_vectors, labels, search_k)
+            if result is None:
+                # Filtered-out nodes still cost graph hops, so widen HNSW's beam for selective filters
+                ef_scale = min(4.0, max(1.0, self.faiss_index.ntotal / len(labels)))
+                params = selector_search_params(self.faiss_index, selector, ef_scale, ef_search)
+                result = self.faiss_index.search(query_vectors, search_k, params=params)
+        else:
+            params = selector_search_params(self.faiss_index, None, ef_search=ef_search)
+            result = self.faiss_index.search(query_vectors, search_k, params=params)
+        distances, indices = result
+        if full_queries is not None and self.full_vectors is not None:
+            distances, indices = self.full_vectors.rescore(full_queries, indices, distances, top_k)
+        return distances, indices
+    
+    def search_vectors(
+        self,
+        query_vectors: np.ndarray,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Search the FAISS index with a matrix of query embeddings in one call.
+        
+        With filters, small selections are scored exactly from reconstructed
+        vectors (cheaper than a graph walk that skips most nodes); larger ones
+        search the index with a bitmap ID selector. A truncated (Matryoshka)
+        index is searched with the queries' leading dimensions, then the
+        candidates are rescored against the full-dimension vectors. With
+        vector_search="binary" the FAISS index is bypassed for a Hamming
+        scan over sign-bit codes plus float16 rescoring.
+        
+        Args:
+            query_vectors: Query embeddings of shape (n, dim)
+            top_k: Number of results per query (uses config default if None)
+            filters: Optional metadata filters (see bm25_search), shared by all queries
+            ef_search: Per-request HNSW efSearch (None = the index's own, see _budget_ef_search;
+                       unused by binary search)
+            
+        Returns:
+            One (chunk store ids, similarity scores) tuple per query, best match first
         """
         if top_k is None:
             top_k = self.config.faiss_top_k
         
-        # Get query embedding
-        query_vector = embed_query(query)
-        
         # Normalize for cosine similarity
-        faiss.normalize_L2(query_vector)
+        query_vectors = np.array(query_vectors, dtype='float32', copy=True)
+        faiss.normalize_L2(query_vectors)
         
-        # Search FAISS index
-        distances, indices = self.faiss_index.search(query_vector, top_k)
+        filter_key = normalize_filters(filters)
+        labels, selector = None, None
+        if filter_key is not None:
+            labels, selector, _ = self._faiss_filter(filter_key)
+            if selector is None:
+                return [_empty_hits() for _ in range(len(query_vectors))]
         
-        # Hydrate results with chunk metadata
-        results = []
-        for idx, score in zip(indices[0], distances[0]):
-            chunk_id = self.chunk_ids[idx]
-            
-            # Get chunk details from database
-            cursor = self.conn.execute(
-                """SELECT chunk_id, doc_id, doc_title, source_url, date, doctype,
-                          page, section_path, text, is_table
-                   FROM chunks WHERE chunk_id = ?""",
-                (chunk_id,)
+        if self.binary_index is not None:
+            distances, indices = self.binary_index.search(
+                query_vectors, top_k, self.config.binary_rescore_factor, labels
             )
-            row = cursor.fetchone()
-            
-            if row:
-                result = {
-                    'chunk_id': row['chunk_id'],
-                    'doc_id': row['doc_id'],
-                    'doc_title': row['doc_title'],
-                    'source_url': row['source_url'],
-                    'date': row['date'],
-                    'doctype': row['doctype'],
-                    'page': row['page'],
-                    'section_path': json.loads(row['section_path']) if row['section_path'] else [],
-                    'text': row['text'],
-                    'is_table': bool(row['is_table']),
-                    'faiss_score': float(score)
-                }
-                results.append(result)
+        else:
+            distances, indices = self._search_faiss(query_vectors, top_k, labels, selector, ef_search)
         
-        return results
+        # Translate FAISS labels to chunk store ids; drop padding (-1) and stale entries
+        hits = []
+        for row_distances, row_labels in zip(distances, indices):
+            found = row_labels >= 0
+            if self.faiss_ids_are_rowids:
+                ids = self.store.ids_from_rowids(row_labels[found])
+            else:
+                ids = self.faiss_to_id[row_labels[found]]
+            scores = row_distances[found]
+            keep = ids >= 0
+            hits.append((ids[keep], scores[keep]))
+        return hits
     
-    def rrf_fuse(
-        self, 
-        bm25_results: List[Dict[str, Any]], 
-        faiss_results: List[Dict[str, Any]],
-        top_k: Optional[int] = None
-    ) -> List[Dict[str, Any]]:
+    def fuse(
+        self,
+        bm25_hits: Tuple[np.ndarray, np.ndarray],
+        faiss_hits: Tuple[np.ndarray, np.ndarray],
+        top_k: Optional[int] = None,
+        fusion_params: Optional[Tuple[str, float, float]] = None
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
         """
-        Fuse BM25 and FAISS results using Reciprocal Rank Fusion (RRF).
+        Fuse BM25 and FAISS results (see llm.fusion).
         
-        RRF formula: score(d) = sum( 1 / (k + rank_i(d)) ) for each ranker i
+        RRF formula: score(d) = sum( w_i / (k + rank_i(d)) ) for each ranker i;
+        'minmax' / 'zscore' sum weighted normalized scores instead. Chunks found
+        by both branches get both contributions.
         
         Args:
-            bm25_results: Results from BM25 search
-            faiss_results: Results from FAISS search
+            bm25_hits: (ids, scores) from BM25 search
+            faiss_hits: (ids, scores) from FAISS search
             top_k: Number of fused results to return (uses config default if None)
+            fusion_params: (method, bm25 weight, faiss weight); config defaults if None
             
         Returns:
-            Fused and re-ranked results
+            Tuple of (fused ids, score columns aligned with ids). Score columns are
+            'rrf_score' (the fused score) plus each ranker's contribution (NaN if absent).
         """
         if top_k is None:
             top_k = self.config.fusion_top_k
+        method, bm25_weight, faiss_weight = fusion_params or self._fusion_params()
         
-        k = self.config.rrf_k
-        
-        # Calculate RRF scores for each result set
-        def get_rrf_scores(results: List[Dict[str, Any]]) -> Dict[str, float]:
-            scores = {}
-            for rank, result in enumerate(results, start=1):
-                chunk_id = result['chunk_id']
-                scores[chunk_id] = 1.0 / (k + rank)
-            return scores
+        fused_ids, fused_scores, contributions = fuse_runs(
+            [bm25_hits, faiss_hits],
+            [bm25_weight, faiss_weight],
+            method=method,
+            top_k=top_k,
+            rrf_k=self.config.rrf_k,
+            # FTS5 bm25() is more negative for better matches; L2 indexes return distances
+            higher_is_better=[False, self.faiss_index.metric_type != faiss.METRIC_L2]
+        )
+        return fused_ids, fusion_columns(fused_scores, contributions, ['bm25_score', 'faiss_score'])
+    
+    def _rerank_scores(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        cache_counts: Optional[Dict[str, int]] = None,
+        timeout_ms: Optional[float] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Cross-encoder scores for candidates, or None if the reranker is
+        unavailable, timed out or failed (callers keep the fused order).
         
-        bm25_scores = get_rrf_scores(bm25_results)
-        faiss_scores = get_rrf_scores(faiss_results)
+        Scores are looked up in the rerank cache first; only misses go to the model.
         
-        # Combine scores
-        all_chunk_ids = set(bm25_scores.keys()) | set(faiss_scores.keys())
-        fused_scores = {}
+        Args:
+            query: Search query
+            candidates: Hydrated candidates (need 'chunk_id' and 'text')
+            cache_counts: Optional dict that receives rerank cache 'hits' and 'misses'
+            timeout_ms: Time left for the model (latency budget); caps the worker timeout,
+                        and reranking is skipped if no time is left
+            
+        Returns:
+            float array aligned with candidates, or None
+        """
+        if not self.reranker:
+            print(f"[Retrieve] Reranker not loaded - skipping reranking step")
+            return None
         
-        for chunk_id in all_chunk_ids:
-            fused_scores[chunk_id] = (
-                bm25_scores.get(chunk_id, 0.0) + 
-                faiss_scores.get(chunk_id, 0.0)
-            )
+        query_hash = hashlib.sha1(normalize_query(query).encode('utf-8')).hexdigest()[:16]
+        keys = [(query_hash, c['chunk_id']) for c in candidates]
+        scores = np.empty(len(candidates), dtype=np.float64)
+        missing = []
+        for i, key in enumerate(keys):
+            score = self.rerank_cache.get(key)
+            if score is None:
+                missing.append(i)
+            else:
+                scores[i] = score
+        if cache_counts is not None:
+            cache_counts['hits'] = len(candidates) - len(missing)
+            cache_counts['misses'] = len(missing)
+        if not missing:
+            return scores
         
-        # Sort by combined RRF score
-        sorted_chunks = sorted(
-            fused_scores.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )[:top_k]
+        # Prepare query-text pairs (truncate text for speed; the ONNX tokenizer
+        # further truncates each pair to reranker_max_length tokens)
+        pairs = [(query, candidates[i]['text'][:2000]) for i in missing]
         
-        # Hydrate full chunk data from database
-        results = []
-        for chunk_id, rrf_score in sorted_chunks:
-            cursor = self.conn.execute(
-                """SELECT chunk_id, doc_id, doc_title, source_url, date, doctype,
-                          page, section_path, text, is_table
-                   FROM chunks WHERE chunk_id = ?""",
-                (chunk_id,)
-            )
-            row = cursor.fetchone()
-            
-            if row:
-                result = {
-                    'chunk_id': row['chunk_id'],
-                    'doc_id': row['doc_id'],
-                    'doc_title': row['doc_title'],
-                    'source_url': row['source_url'],
-                    'date': row['date'],
-                    'doctype': row['doctype'],
-                    'page': row['page'],
-                    'section_path': json.loads(row['section_path']) if row['section_path'] else [],
-                    'text': row['text'],
-                    'is_table': bool(row['is_table']),
-                    'rrf_score': rrf_score,
-                    'bm25_score': bm25_scores.get(chunk_id),
-                    'faiss_score': faiss_scores.get(chunk_id)
-                }
-                results.append(result)
+        try:
+            if timeout_ms is not None and timeout_ms <= 0:
+                raise TimeoutError("latency budget exhausted")
+            if isinstance(self.reranker, RerankClient):
+                if timeout_ms is not None:
+                    timeout_ms = min(timeout_ms, self.config.reranker_timeout_ms)
+                new_scores = self.reranker.predict(pairs, timeout_ms=timeout_ms)
+            else:
+                new_scores = self.reranker.predict(pairs)
+        except (TimeoutError, ConnectionError, RuntimeError) as e:
+            print(f"[Retrieve] Reranking skipped, keeping fused order: {e}")
+            return None
         
-        return results
-
+        for i, score in zip(missing, new_scores):
+            scores[i] = float(score)
+            self.rerank_cache.put(keys[i], float(score))
+        return scores
+    
     def rerank(
         self, 
         query: str, 
         candidates: List[Dict[str, Any]],
-        top_k: Optional[int] = None
+        top_k: Optional[int] = None,
+        scores: Optional[np.ndarray] = None
     ) -> List[Dict[str, Any]]:
         """
         Rerank candidates using cross-encoder model.
@@ -354,9 +1008,10 @@ class HybridRetriever:
             query: Original search query
             candidates: List of candidate chunks to rerank
             top_k: Number of top results to return (uses config default if None)
+            scores: Precomputed cross-encoder scores aligned with candidates
             
         Returns:
-            Reranked results with rerank scores
+            Reranked results with rerank scores (fused order if reranking is unavailable)
         """
         if top_k is None:
             top_k = self.config.rerank_top_k
@@ -364,20 +1019,16 @@ class HybridRetriever:
         if not candidates:
             return []
         
-        # If reranker is not loaded, return candidates as-is
-        if not self.reranker:
-            print(f"[Retrieve] Reranker not loaded - skipping reranking step")
+        if scores is None:
+            scores = self._rerank_scores(query, candidates)
+        
+        # If reranking is unavailable, return candidates as-is
+        if scores is None:
             result = candidates[:top_k]
             for rank, r in enumerate(result, start=1):
                 r['final_rank'] = rank
             return result
         
-        # Prepare query-text pairs (truncate text for speed)
-        pairs = [(query, c['text'][:2000]) for c in candidates]
-        
-        # Get reranking scores
-        scores = self.reranker.predict(pairs)
-        
         # Add scores to candidates
         for candidate, score in zip(candidates, scores):
             candidate['rerank_score'] = float(score)
@@ -395,97 +1046,756 @@ class HybridRetriever:
         
         return reranked
     
+    def _budget_ef_search(self, remaining_ms: float) -> Optional[int]:
+        """HNSW efSearch for the time left in the vector branch (None = index default)"""
+        for below_ms, ef_search in sorted(self.config.budget_ef_search):
+            if remaining_ms < below_ms:
+                return ef_search
+        return None
+    
+    def _vector_branch(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]],
+        deadline: float
+    ) -> Tuple[Tuple[np.ndarray, np.ndarray], Dict[str, Any]]:
+        """Embedding (bounded by the deadline) + FAISS search with efSearch picked from the time left"""
+        branch_timings: Dict[str, Any] = {}
+        query_vector, branch_timings['embed_ms'] = _timed(
+            self._embed_query, query, deadline - time.perf_counter()
+        )
+        ef_search = self._budget_ef_search((deadline - time.perf_counter()) * 1000)
+        hits, branch_timings['faiss_ms'] = _timed(self.search_vector, query_vector, None, filters, ef_search)
+        return hits, {'timings': branch_timings, 'ef_search': ef_search}
+    
+    async def _avector_branch(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]],
+        deadline: float
+    ) -> Tuple[Tuple[np.ndarray, np.ndarray], Dict[str, Any]]:
+        """Async version of _vector_branch()"""
+        loop = asyncio.get_running_loop()
+        branch_timings: Dict[str, Any] = {}
+        query_vector, branch_timings['embed_ms'] = await _atimed(
+            self._aembed_query(query, deadline - time.perf_counter(), self._vector_executor)
+        )
+        ef_search = self._budget_ef_search((deadline - time.perf_counter()) * 1000)
+        hits, branch_timings['faiss_ms'] = await loop.run_in_executor(
+            self._vector_executor, _timed, self.search_vector, query_vector, None, filters, ef_search
+        )
+        return hits, {'timings': branch_timings, 'ef_search': ef_search}
+    
+    def _merge_budgeted(
+        self,
+        bm25_result: Optional[Tuple[Tuple[np.ndarray, np.ndarray], float]],
+        vector_result: Optional[Tuple[Tuple[np.ndarray, np.ndarray], Dict[str, Any]]],
+        timings: Dict[str, float],
+        budget: Dict[str, Any]
+    ) -> Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]:
+        """Combine the branches that made the deadline, recording what was dropped"""
+        if vector_result is not None:
+            faiss_hits, branch = vector_result
+            timings.update(branch['timings'])
+            budget['ef_search'] = branch['ef_search']
+        else:
+            faiss_hits = _empty_hits()
+            timings['embed_ms'] = timings['faiss_ms'] = 0.0
+        if bm25_result is not None:
+            bm25_hits, timings['bm25_ms'] = bm25_result
+        else:
+            bm25_hits = _empty_hits()
+            timings['bm25_ms'] = 0.0
+        
+        if vector_result is None and bm25_result is None:
+            budget['degraded'] = 'empty'
+        elif vector_result is None:
+            budget['degraded'] = 'bm25_only'
+        elif bm25_result is None:
+            budget['degraded'] = 'vector_only'
+        if budget.get('degraded'):
+            print(f"[Retrieve] Latency budget {budget['latency_budget_ms']:.0f}ms: degraded to {budget['degraded']}")
+        return bm25_hits, faiss_hits
+    
+    def _bm25_timeout(self, deadline: float, only_branch: bool) -> float:
+        """Seconds to wait for BM25: until the deadline, plus degraded_bm25_wait_ms when it is the only branch"""
+        if only_branch:
+            deadline += self.config.degraded_bm25_wait_ms / 1000
+        return max(0.0, deadline - time.perf_counter())
+    
+    def _budgeted_search(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]],
+        budget_ms: float,
+        retrieve_start: float,
+        timings: Dict[str, float]
+    ) -> Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray], Dict[str, Any]]:
+        """
+        Run both branches with a shared deadline.
+        
+        The vector branch (embedding API call + FAISS) runs on its own pool with
+        the deadline as its embedding timeout, and is dropped if it misses the
+        deadline or fails. BM25 is then given degraded_bm25_wait_ms more; if it
+        misses that too both branches are empty (stats['degraded'] = 'empty').
+        
+        Returns:
+            Tuple of (bm25 hits, faiss hits, budget info for stats)
+        """
+        deadline = retrieve_start + max(0.0, budget_ms - self.config.budget_reserve_ms) / 1000
+        budget: Dict[str, Any] = {'latency_budget_ms': budget_ms, 'degraded': None}
+        bm25_future = self._executor.submit(_timed, self.bm25_search, query, None, filters)
+        vector_future = self._vector_executor.submit(self._vector_branch, query, filters, deadline)
+        
+        vector_result = None
+        try:
+            vector_result = vector_future.result(timeout=max(0.0, deadline - time.perf_counter()))
+        except FuturesTimeout:
+            print(f"[Retrieve] Vector branch missed the deadline")
+        except Exception as e:
+            print(f"[Retrieve] Vector branch failed: {type(e).__name__}: {e}")
+        
+        wait_start = time.perf_counter()
+        try:
+            bm25_result = bm25_future.result(timeout=self._bm25_timeout(deadline, vector_result is None))
+        except FuturesTimeout:
+            print(f"[Retrieve] BM25 branch missed the deadline")
+            bm25_result = None
+        timings['bm25_wait_ms'] = (time.perf_counter() - wait_start) * 1000
+        
+        bm25_hits, faiss_hits = self._merge_budgeted(bm25_result, vector_result, timings, budget)
+        return bm25_hits, faiss_hits, budget
+    
+    async def _abudgeted_search(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]],
+        budget_ms: float,
+        retrieve_start: float,
+        timings: Dict[str, float]
+    ) -> Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray], Dict[str, Any]]:
+        """Async version of _budgeted_search()"""
+        loop = asyncio.get_running_loop()
+        deadline = retrieve_start + max(0.0, budget_ms - self.config.budget_reserve_ms) / 1000
+        budget: Dict[str, Any] = {'latency_budget_ms': budget_ms, 'degraded': None}
+        bm25_future = loop.run_in_executor(self._executor, _timed, self.bm25_search, query, None, filters)
+        
+        vector_result = None
+        try:
+            vector_result = await asyncio.wait_for(
+                self._avector_branch(query, filters, deadline),
+                timeout=max(0.0, deadline - time.perf_counter())
+            )
+        except asyncio.TimeoutError:
+            print(f"[Retrieve] Vector branch missed the deadline")
+        except Exception as e:
+            print(f"[Retrieve] Vector branch failed: {type(e).__name__}: {e}")
+        
+        wait_start = time.perf_counter()
+        try:
+            bm25_result = await asyncio.wait_for(
+                asyncio.shield(bm25_future), timeout=self._bm25_timeout(deadline, vector_result is None)
+            )
+        except asyncio.TimeoutError:
+            print(f"[Retrieve] BM25 branch missed the deadline")
+            bm25_result = None
+        timings['bm25_wait_ms'] = (time.perf_counter() - wait_start) * 1000
+        
+        bm25_hits, faiss_hits = self._merge_budgeted(bm25_result, vector_result, timings, budget)
+        return bm25_hits, faiss_hits, budget
+    
     def retrieve(
         self,
         query: str,
         top_k: Optional[int] = None,
-        use_reranking: bool = True
+        use_reranking: bool = True,
+        filters: Optional[Dict[str, Any]] = None,
+        fusion: Optional[Dict[str, Any]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+        latency_budget_ms: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """
         Complete hybrid retrieval pipeline.
         
         Pipeline:
-        1. BM25 search (FTS5)
-        2. FAISS semantic search
-        3. Deduplicate by chunk_id (NEW)
-        4. RRF fusion
-        5. Cross-encoder reranking (optional)
+        1. BM25 search (FTS5) and query embedding + FAISS search, run
+           concurrently when config.concurrent_search is set
+        2. Fusion over integer ids (weighted RRF or normalized CombSUM)
+        3. Cross-encoder reranking (optional)
+        4. Hydration from the in-memory chunk store
         
         Args:
             query: Search query
             top_k: Number of final results (uses config default if None)
             use_reranking: Whether to apply cross-encoder reranking
+            filters: Optional metadata filters - doc_ids, doctypes (str or list),
+                     date_from, date_to (inclusive ISO dates) - pushed into both branches
+            fusion: Optional fusion overrides - method ('rrf', 'minmax', 'zscore'),
+                    bm25_weight, faiss_weight
+            stats: Optional dict that receives per-stage timings (ms)
+            latency_budget_ms: Latency budget for this call (config default if None, 0 = unbounded).
+                               If the embedding/FAISS branch misses it, results come from BM25
+                               alone and stats['degraded'] is 'bm25_only' ('empty' if BM25
+                               misses it as well)
             
         Returns:
             List of top-ranked search results
         """
+        retrieve_start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        
         if top_k is None:
             top_k = self.config.rerank_top_k
         
-        # Step 1: BM25 search
-        bm25_results = self.bm25_search(query)
-        print(f"[Retrieve] BM25 search: {len(bm25_results)} results")
-        
-        # Step 2: FAISS semantic search
-        faiss_results = self.faiss_search(query)
-        print(f"[Retrieve] FAISS search: {len(faiss_results)} results")
-        
-        # Step 3: Deduplicate by chunk_id before fusion
-        seen_chunks = set()
-        bm25_deduped = []
-        for result in bm25_results:
-            if result['chunk_id'] not in seen_chunks:
-                bm25_deduped.append(result)
-                seen_chunks.add(result['chunk_id'])
-        
-        faiss_deduped = []
-        for result in faiss_results:
-            if result['chunk_id'] not in seen_chunks:
-                faiss_deduped.append(result)
-                seen_chunks.add(result['chunk_id'])
-        
-        deduped_total = len(bm25_deduped) + len(faiss_deduped)
-        original_total = len(bm25_results) + len(faiss_results)
-        if deduped_total < original_total:
-            print(f"[Retrieve] Deduplication: {original_total} → {deduped_total} chunks ({original_total - deduped_total} duplicates removed)")
-        
-        # Step 4: RRF fusion
-        fused_results = self.rrf_fuse(bm25_deduped, faiss_deduped)
-        print(f"[Retrieve] RRF fusion: {len(fused_results)} candidates")
-        
-        # Step 5: Reranking (optional)
+        # Popular questions skip retrieval entirely
+        filter_key = normalize_filters(filters)
+        fusion_params = self._fusion_params(fusion)
+        cache_key = self._result_cache_key(query, top_k, use_reranking, filter_key, fusion_params)
+        cached, timings['cache_ms'] = _timed(self._cached_results, cache_key)
+        if cached is not None:
+            print(f"[Retrieve] Result cache hit: {len(cached)} results")
+            self._record_stats(stats, timings, retrieve_start, self.config.concurrent_search,
+                               result_cache='hit', filtered=filter_key is not None, fusion=fusion_params[0])
+            return cached
+        
+        # Step 1: BM25 and vector branches
+        budget_ms = self.config.latency_budget_ms if latency_budget_ms is None else latency_budget_ms
+        budget: Dict[str, Any] = {}
+        if budget_ms:
+            (bm25_ids, bm25_scores), (faiss_ids, faiss_scores), budget = self._budgeted_search(
+                query, filters, budget_ms, retrieve_start, timings
+            )
+        elif self.config.concurrent_search:
+            # BM25 runs on the executor while this thread waits on the embedding round trip
+            bm25_future = self._executor.submit(_timed, self.bm25_search, query, None, filters)
+            query_vector, timings['embed_ms'] = _timed(self._embed_query, query)
+            (faiss_ids, faiss_scores), timings['faiss_ms'] = _timed(self.search_vector, query_vector, None, filters)
+            wait_start = time.perf_counter()
+            (bm25_ids, bm25_scores), timings['bm25_ms'] = bm25_future.result()
+            timings['bm25_wait_ms'] = (time.perf_counter() - wait_start) * 1000
+        else:
+            (bm25_ids, bm25_scores), timings['bm25_ms'] = _timed(self.bm25_search, query, None, filters)
+            query_vector, timings['embed_ms'] = _timed(self._embed_query, query)
+            (faiss_ids, faiss_scores), timings['faiss_ms'] = _timed(self.search_vector, query_vector, None, filters)
+        timings['vector_ms'] = timings['embed_ms'] + timings['faiss_ms']
+        print(f"[Retrieve] BM25 search: {len(bm25_ids)} results in {timings['bm25_ms']:.1f}ms")
+        print(f"[Retrieve] FAISS search: {len(faiss_ids)} results in {timings['vector_ms']:.1f}ms "
+              f"(embed {timings['embed_ms']:.1f}ms + search {timings['faiss_ms']:.1f}ms)")
+        
+        outcome: Dict[str, Any] = {}
+        final_ids, final_scores, final_results = self._fuse_and_rank(
+            query,
+            (bm25_ids, bm25_scores),
+            (faiss_ids, faiss_scores),
+            top_k,
+            use_reranking,
+            timings,
+            fusion_params,
+            outcome,
+            self._rerank_deadline(retrieve_start, budget_ms)
+        )
+        # Degraded results (reranking fallback, dropped branch) are not cached under the full key
+        if not outcome.get('rerank_fallback') and not budget.get('degraded'):
+            self.result_cache.put(cache_key, (final_ids, final_scores))
+        
+        self._record_stats(stats, timings, retrieve_start, self.config.concurrent_search or bool(budget_ms),
+                           result_cache='miss', filtered=filter_key is not None, fusion=fusion_params[0],
+                           **budget, **outcome)
+        return final_results
+    
+    async def aretrieve(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        use_reranking: bool = True,
+        filters: Optional[Dict[str, Any]] = None,
+        fusion: Optional[Dict[str, Any]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+        latency_budget_ms: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Async version of retrieve() for request handlers.
+        
+        The query embedding uses the async OpenAI client, while BM25, FAISS,
+        fusion and hydration run on the retriever's bounded thread pool, so the
+        event loop is never blocked. BM25 always overlaps the embedding call.
+        
+        Args:
+            query: Search query
+            top_k: Number of final results (uses config default if None)
+            use_reranking: Whether to apply cross-encoder reranking
+            filters: Optional metadata filters (see retrieve)
+            fusion: Optional fusion overrides (see retrieve)
+            stats: Optional dict that receives per-stage timings (ms)
+            latency_budget_ms: Latency budget for this call (see retrieve)
+            
+        Returns:
+            List of top-ranked search results
+        """
+        retrieve_start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        loop = asyncio.get_running_loop()
+        
+        if top_k is None:
+            top_k = self.config.rerank_top_k
+        
+        filter_key = normalize_filters(filters)
+        fusion_params = self._fusion_params(fusion)
+        cache_key = self._result_cache_key(query, top_k, use_reranking, filter_key, fusion_params)
+        cached, timings['cache_ms'] = await loop.run_in_executor(
+            self._executor, _timed, self._cached_results, cache_key
+        )
+        if cached is not None:
+            print(f"[Retrieve] Result cache hit: {len(cached)} results")
+            self._record_stats(stats, timings, retrieve_start, True, result_cache='hit', filtered=filter_key is not None, fusion=fusion_params[0])
+            return cached
+        
+        budget_ms = self.config.latency_budget_ms if latency_budget_ms is None else latency_budget_ms
+        budget: Dict[str, Any] = {}
+        if budget_ms:
+            (bm25_ids, bm25_scores), (faiss_ids, faiss_scores), budget = await self._abudgeted_search(
+                query, filters, budget_ms, retrieve_start, timings
+            )
+        else:
+            bm25_future = loop.run_in_executor(self._executor, _timed, self.bm25_search, query, None, filters)
+            try:
+                query_vector, timings['embed_ms'] = await _atimed(self._aembed_query(query))
+                (faiss_ids, faiss_scores), timings['faiss_ms'] = await loop.run_in_executor(
+                    self._executor, _timed, self.search_vector, query_vector, None, filters
+                )
+            finally:
+                # Always collect the BM25 branch so its errors are not lost
+                (bm25_ids, bm25_scores), timings['bm25_ms'] = await bm25_future
+        timings['vector_ms'] = timings['embed_ms'] + timings['faiss_ms']
+        print(f"[Retrieve] BM25 search: {len(bm25_ids)} results in {timings['bm25_ms']:.1f}ms")
+        print(f"[Retrieve] FAISS search: {len(faiss_ids)} results in {timings['vector_ms']:.1f}ms "
+              f"(embed {timings['embed_ms']:.1f}ms + search {timings['faiss_ms']:.1f}ms)")
+        
+        outcome: Dict[str, Any] = {}
+        final_ids, final_scores, final_results = await loop.run_in_executor(
+            self._executor,
+            self._fuse_and_rank,
+            query,
+            (bm25_ids, bm25_scores),
+            (faiss_ids, faiss_scores),
+            top_k,
+            use_reranking,
+            timings,
+            fusion_params,
+            outcome,
+            self._rerank_deadline(retrieve_start, budget_ms)
+        )
+        # Degraded results (reranking fallback, dropped branch) are not cached under the full key
+        if not outcome.get('rerank_fallback') and not budget.get('degraded'):
+            self.result_cache.put(cache_key, (final_ids, final_scores))
+        
+        self._record_stats(stats, timings, retrieve_start, True, result_cache='miss', filtered=filter_key is not None, fusion=fusion_params[0], **budget, **outcome)
+        return final_results
+    
+    def _rerank_deadline(self, retrieve_start: float, budget_ms: float) -> Optional[float]:
+        """perf_counter() time by which reranking must finish, leaving time to hydrate"""
+        if not budget_ms:
+            return None
+        return retrieve_start + max(0.0, budget_ms - self.config.budget_reserve_ms / 3) / 1000
+    
+    def _batch_cache_lookup(
+        self,
+        queries: List[str],
+        top_k: int,
+        use_reranking: bool,
+        filter_key: Optional[FilterKey],
+        fusion_params: Tuple[str, float, float]
+    ) -> Tuple[List[Tuple], List[Optional[List[Dict[str, Any]]]], List[int]]:
+        """
+        Result cache lookups for a batch of queries.
+        
+        Returns:
+            Tuple of (cache keys, results with cached entries filled in, indices of queries still to run)
+        """
+        cache_keys = [self._result_cache_key(q, top_k, use_reranking, filter_key, fusion_params) for q in queries]
+        results = [self._cached_results(key) for key in cache_keys]
+        pending = [i for i, cached in enumerate(results) if cached is None]
+        return cache_keys, results, pending
+    
+    def _finish_batch_query(
+        self,
+        query: str,
+        cache_key: Tuple,
+        bm25_hits: Tuple[np.ndarray, np.ndarray],
+        faiss_hits: Tuple[np.ndarray, np.ndarray],
+        top_k: int,
+        use_reranking: bool,
+        fusion_params: Tuple[str, float, float]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, float], Dict[str, Any]]:
+        """Fuse, rerank and hydrate one query of a batch, then cache its ranking"""
+        timings: Dict[str, float] = {}
+        outcome: Dict[str, Any] = {}
+        final_ids, final_scores, final_results = self._fuse_and_rank(
+            query, bm25_hits, faiss_hits, top_k, use_reranking, timings, fusion_params, outcome
+        )
+        if not outcome.get('rerank_fallback'):
+            self.result_cache.put(cache_key, (final_ids, final_scores))
+        return final_results, timings, outcome
+    
+    def _record_batch_stats(
+        self,
+        stats: Optional[Dict[str, Any]],
+        timings: Dict[str, float],
+        retrieve_start: float,
+        num_queries: int,
+        num_cached: int,
+        per_query: List[Dict[str, float]],
+        outcomes: List[Dict[str, Any]]
+    ):
+        """Sum per-query stage timings into the batch timings and log the batch summary"""
+        for name in ('fusion_ms', 'hydrate_ms', 'rerank_ms'):
+            timings[name] = sum(t.get(name, 0.0) for t in per_query)
+        print(f"[Retrieve] Batch: {num_queries} queries ({num_cached} from result cache)")
+        self._record_stats(
+            stats, timings, retrieve_start, True,
+            queries=num_queries,
+            result_cache_hits=num_cached,
+            reranked=sum(1 for o in outcomes if o.get('reranked')),
+            rerank_fallbacks=sum(1 for o in outcomes if o.get('rerank_fallback'))
+        )
+    
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        top_k: Optional[int] = None,
+        use_reranking: bool = True,
+        filters: Optional[Dict[str, Any]] = None,
+        fusion: Optional[Dict[str, Any]] = None,
+        stats: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Hybrid retrieval for many queries at once (offline evaluation, question lists).
+        
+        Cached queries are answered from the result cache. The rest are embedded
+        in one embeddings request (embed_queries), searched in FAISS with the
+        full query matrix, and run through FTS5 in parallel on the retriever's
+        thread pool while the embedding request is in flight. Fusion, reranking
+        and hydration then run per query, in parallel.
+        
+        Args:
+            queries: Search queries
+            top_k: Number of final results per query (uses config default if None)
+            use_reranking: Whether to apply cross-encoder reranking
+            filters: Optional metadata filters shared by all queries (see retrieve)
+            fusion: Optional fusion overrides shared by all queries (see retrieve)
+            stats: Optional dict that receives batch timings (ms) and counts
+            
+        Returns:
+            One result list per query, in query order
+        """
+        retrieve_start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        if top_k is None:
+            top_k = self.config.rerank_top_k
+        
+        filter_key = normalize_filters(filters)
+        fusion_params = self._fusion_params(fusion)
+        cache_keys, results, pending = self._batch_cache_lookup(queries, top_k, use_reranking, filter_key, fusion_params)
+        
+        per_query, outcomes = [], []
+        if pending:
+            batch_queries = [queries[i] for i in pending]
+            bm25_futures = [self._executor.submit(self.bm25_search, q, None, filters) for q in batch_queries]
+            query_vectors, timings['embed_ms'] = _timed(self._embed_queries, batch_queries)
+            faiss_hits, timings['faiss_ms'] = _timed(self.search_vectors, query_vectors, None, filters)
+            wait_start = time.perf_counter()
+            bm25_hits = [future.result() for future in bm25_futures]
+            timings['bm25_wait_ms'] = (time.perf_counter() - wait_start) * 1000
+            print(f"[Retrieve] Batch search: {len(pending)} queries, embed {timings['embed_ms']:.1f}ms, "
+                  f"FAISS {timings['faiss_ms']:.1f}ms")
+            
+            finished = self._executor.map(
+                lambda j: self._finish_batch_query(
+                    batch_queries[j], cache_keys[pending[j]], bm25_hits[j], faiss_hits[j],
+                    top_k, use_reranking, fusion_params
+                ),
+                range(len(pending))
+            )
+            for i, (final_results, query_timings, outcome) in zip(pending, finished):
+                results[i] = final_results
+                per_query.append(query_timings)
+                outcomes.append(outcome)
+        
+        self._record_batch_stats(stats, timings, retrieve_start, len(queries), len(queries) - len(pending), per_query, outcomes)
+        return results
+    
+    async def aretrieve_batch(
+        self,
+        queries: List[str],
+        top_k: Optional[int] = None,
+        use_reranking: bool = True,
+        filters: Optional[Dict[str, Any]] = None,
+        fusion: Optional[Dict[str, Any]] = None,
+        stats: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Async version of retrieve_batch() for request handlers.
+        
+        Args:
+            queries: Search queries
+            top_k: Number of final results per query (uses config default if None)
+            use_reranking: Whether to apply cross-encoder reranking
+            filters: Optional metadata filters shared by all queries (see retrieve)
+            fusion: Optional fusion overrides shared by all queries (see retrieve)
+            stats: Optional dict that receives batch timings (ms) and counts
+            
+        Returns:
+            One result list per query, in query order
+        """
+        retrieve_start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        loop = asyncio.get_running_loop()
+        if top_k is None:
+            top_k = self.config.rerank_top_k
+        
+        filter_key = normalize_filters(filters)
+        fusion_params = self._fusion_params(fusion)
+        cache_keys, results, pending = await loop.run_in_executor(
+            self._executor, self._batch_cache_lookup, queries, top_k, use_reranking, filter_key, fusion_params
+        )
+        
+        per_query, outcomes = [], []
+        if pending:
+            batch_queries = [queries[i] for i in pending]
+            bm25_futures = [
+                loop.run_in_executor(self._executor, self.bm25_search, q, None, filters) for q in batch_queries
+            ]
+            try:
+                query_vectors, timings['embed_ms'] = await _atimed(self._aembed_queries(batch_queries))
+                faiss_hits, timings['faiss_ms'] = await loop.run_in_executor(
+                    self._executor, _timed, self.search_vectors, query_vectors, None, filters
+                )
+            finally:
+                # Always collect the BM25 branch so its errors are not lost
+                wait_start = time.perf_counter()
+                bm25_hits = await asyncio.gather(*bm25_futures)
+                timings['bm25_wait_ms'] = (time.perf_counter() - wait_start) * 1000
+            print(f"[Retrieve] Batch search: {len(pending)} queries, embed {timings['embed_ms']:.1f}ms, "
+                  f"FAISS {timings['faiss_ms']:.1f}ms")
+            
+            finished = await asyncio.gather(*[
+                loop.run_in_executor(
+                    self._executor, self._finish_batch_query,
+                    batch_queries[j], cache_keys[pending[j]], bm25_hits[j], faiss_hits[j],
+                    top_k, use_reranking, fusion_params
+                )
+                for j in range(len(pending))
+            ])
+            for i, (final_results, query_timings, outcome) in zip(pending, finished):
+                results[i] = final_results
+                per_query.append(query_timings)
+                outcomes.append(outcome)
+        
+        self._record_batch_stats(stats, timings, retrieve_start, len(queries), len(queries) - len(pending), per_query, outcomes)
+        return results
+    
+    def _record_stats(
+        self,
+        stats: Optional[Dict[str, Any]],
+        timings: Dict[str, float],
+        retrieve_start: float,
+        concurrent: bool,
+        **extra: Any
+    ):
+        """Log total retrieval time and copy timings (plus any extra fields) into the caller's stats dict"""
+        timings['total_ms'] = (time.perf_counter() - retrieve_start) * 1000
+        print(f"[Retrieve] Total retrieval time: {timings['total_ms']:.1f}ms")
+        if stats is not None:
+            stats['concurrent_search'] = concurrent
+            stats.update(extra)
+            stats['timings'] = {name: round(value, 2) for name, value in timings.items()}
+    
+    def _fuse_and_rank(
+        self,
+        query: str,
+        bm25_hits: Tuple[np.ndarray, np.ndarray],
+        faiss_hits: Tuple[np.ndarray, np.ndarray],
+        top_k: int,
+        use_reranking: bool,
+        timings: Dict[str, float],
+        fusion_params: Optional[Tuple[str, float, float]] = None,
+        outcome: Optional[Dict[str, Any]] = None,
+        rerank_deadline: Optional[float] = None
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray], List[Dict[str, Any]]]:
+        """
+        Fuse both branches, optionally rerank, and hydrate the final results.
+        
+        Args:
+            query: Search query
+            bm25_hits: (ids, scores) from BM25 search
+            faiss_hits: (ids, scores) from FAISS search
+            top_k: Number of final results
+            use_reranking: Whether to apply cross-encoder reranking
+            timings: Dict that receives stage timings (ms)
+            fusion_params: Resolved fusion settings (config defaults if None)
+            outcome: Optional dict that receives 'reranked', 'rerank_cache' (hit/miss
+                     counts) and, when reranking was requested but fell back to the
+                     fused order, 'rerank_fallback'
+            rerank_deadline: perf_counter() time by which reranking must finish (None = no limit)
+            
+        Returns:
+            Tuple of (final ids, score columns aligned with ids, hydrated results)
+        """
+        fusion_params = fusion_params or self._fusion_params()
+        if outcome is None:
+            outcome = {}
+        outcome['reranked'] = False
+        
+        # Fusion over ids; chunks found by both branches keep both contributions
+        (fused_ids, fused_scores), timings['fusion_ms'] = _timed(
+            self.fuse, bm25_hits, faiss_hits, None, fusion_params
+        )
+        overlap = len(bm25_hits[0]) + len(faiss_hits[0]) - len(np.union1d(bm25_hits[0], faiss_hits[0]))
+        print(f"[Retrieve] Fusion ({fusion_params[0]}): {len(fused_ids)} candidates, "
+              f"{overlap} found by both branches, in {timings['fusion_ms']:.1f}ms")
+        
+        # Reranking (optional) - hydrate only what the next stage needs
+        step_start = time.perf_counter()
         if use_reranking and self.reranker:
-            final_results = self.rerank(query, fused_results, top_k)
-            print(f"[Retrieve] Reranked: {len(final_results)} final results")
+            # Cross-encoder cost is linear in candidates: score only the fused head
+            num_candidates = max(self.config.rerank_candidates, top_k)
+            fused_ids = fused_ids[:num_candidates]
+            fused_scores = {name: column[:num_candidates] for name, column in fused_scores.items()}
+            fused_results = self.store.hydrate(fused_ids, fused_scores)
+            timings['hydrate_ms'] = (time.perf_counter() - step_start) * 1000
+            rerank_counts: Dict[str, int] = {}
+            timeout_ms = None if rerank_deadline is None else (rerank_deadline - time.perf_counter()) * 1000
+            rerank_scores, timings['rerank_ms'] = _timed(self._rerank_scores, query, fused_results, rerank_counts, timeout_ms)
+            outcome['rerank_cache'] = rerank_counts
         else:
+            rerank_scores = None
+        
+        if rerank_scores is not None:
+            final_results = self.rerank(query, fused_results, top_k, scores=rerank_scores)
+            print(f"[Retrieve] Reranked: {len(final_results)} final results in {timings['rerank_ms']:.1f}ms "
+                  f"(score cache: {rerank_counts['hits']}/{len(fused_results)} hits)")
+            outcome['reranked'] = True
+            
+            # Recover ids and score columns of the reranked order for the result cache
+            id_by_chunk = {result['chunk_id']: i for result, i in zip(fused_results, fused_ids.tolist())}
+            final_ids = np.array([id_by_chunk[r['chunk_id']] for r in final_results], dtype=np.int64)
+            final_scores = {
+                name: np.array([np.nan if r.get(name) is None else r[name] for r in final_results], dtype=np.float64)
+                for name in list(fused_scores) + ['rerank_score']
+            }
+        elif use_reranking and self.reranker:
+            # Reranker timed out or failed: fused order, from the candidates already hydrated
+            outcome['rerank_fallback'] = True
+            final_ids = fused_ids[:top_k]
+            final_scores = {name: column[:top_k] for name, column in fused_scores.items()}
             final_results = fused_results[:top_k]
             for rank, result in enumerate(final_results, start=1):
                 result['final_rank'] = rank
+        else:
+            final_ids = fused_ids[:top_k]
+            final_scores = {name: column[:top_k] for name, column in fused_scores.items()}
+            final_results = self.store.hydrate(final_ids, final_scores)
+            timings['hydrate_ms'] = (time.perf_counter() - step_start) * 1000
+            for rank, result in enumerate(final_results, start=1):
+                result['final_rank'] = rank
         
-        return final_results
+        return final_ids, final_scores, final_results
     
-    def close(self):
-        """Close database connection"""
-        if self.conn:
-            self.conn.close()
-            print("[HybridRetriever] Database connection closed")
+    def get_page_chunks(self, doc_id: str, page: int) -> List[Dict[str, Any]]:
+        """
+        Load every chunk of one document page, in chunk order.
+        
+        Args:
+            doc_id: Document ID
+            page: 1-indexed page number
+            
+        Returns:
+            List of chunk rows as dictionaries (empty if the page is unknown),
+            with char_start / char_end (None if not recorded) for stitching
+        """
+        spans = "char_start, char_end" if "char_start" in self.store.columns else "NULL AS char_start, NULL AS char_end"
+        with self.db.connection() as conn:
+            cursor = conn.execute(
+                f"""SELECT chunk_id, doc_id, doc_title, source_url, date, doctype,
+                          page, section_path, text, is_table, {spans}
+                   FROM chunks 
+                   WHERE doc_id = ? AND page = ?
+                   ORDER BY chunk_id""",
+                (doc_id, page)
+            )
+            return [dict(row) for row in cursor.fetchall()]
+    
+    async def aget_page_chunks(self, doc_id: str, page: int) -> List[Dict[str, Any]]:
+        """Async version of get_page_chunks() that runs on the retriever's thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.get_page_chunks, doc_id, page)
+    
+    def close(self, keep_reranker: bool = False):
+        """
+        Close database connections and stop the search executor.
+        
+        Args:
+            keep_reranker: Leave the reranker open (it was handed to a reloaded retriever)
+        """
+        self._executor.shutdown(wait=False)
+        self._vector_executor.shutdown(wait=False)
+        if isinstance(self.reranker, RerankClient) and not keep_reranker:
+            self.reranker.close()  # The shared worker keeps running for other processes
+        if self.db:
+            self.db.close()
+            print("[HybridRetriever] Database connections closed")
 
 
 # Global retriever instance (singleton)
 _retriever_instance: Optional[HybridRetriever] = None
+_retriever_lock = threading.Lock()
+_reloading = False
+
+
+def _reload_retriever(old: HybridRetriever):
+    """Load a retriever for the new corpus snapshot, swap it in and retire the old one"""
+    global _retriever_instance, _reloading
+    try:
+        print(f"[HybridRetriever] Corpus snapshot changed, reloading store and indexes in the background")
+        new = HybridRetriever(old.config, reranker=old.reranker)
+        with _retriever_lock:
+            _retriever_instance = new
+        print(f"[HybridRetriever] Switched to snapshot {new._snapshot_version}")
+        # Requests that already hold the old retriever keep using it; close it once they are done
+        timer = threading.Timer(old.config.reload_grace_s, old.close, kwargs={'keep_reranker': True})
+        timer.daemon = True
+        timer.start()
+    except Exception as e:
+        # E.g. ingestion still writing; retried after the next check interval
+        print(f"[HybridRetriever] Reload failed, keeping snapshot {old._snapshot_version}: {e}")
+    finally:
+        _reloading = False
 
 
 def get_retriever(config: Optional[RetrievalConfig] = None) -> HybridRetriever:
     """
     Get the global retriever instance (singleton pattern).
     
+    When the corpus snapshot on disk changes (re-ingest), a new retriever is
+    loaded in the background and replaces this one once ready; until then
+    requests are served from the loaded snapshot.
+    
     Args:
         config: Optional configuration (only used on first call)
         
     Returns:
         HybridRetriever instance
     """
-    global _retriever_instance
-    if _retriever_instance is None:
-        _retriever_instance = HybridRetriever(config)
-    return _retriever_instance
+    global _retriever_instance, _reloading
+    retriever = _retriever_instance
+    if retriever is None:
+        with _retriever_lock:
+            if _retriever_instance is None:
+                _retriever_instance = HybridRetriever(config)
+            return _retriever_instance
+    if retriever.snapshot_changed():
+        with _retriever_lock:
+            if not _reloading and retriever is _retriever_instance:
+                _reloading = True
+                threading.Thread(target=_reload_retriever, args=(retriever,), name="retriever-reload", daemon=True).start()
+    return retriever
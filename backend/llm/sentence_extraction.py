@@ -0,0 +1,171 @@
+"""
+Query-focused Sentence Extraction for Pryzm Project
+
+Compacts long evidence blocks to the sentences that match the query
+instead of cutting them at a fixed character count. Sentences are scored
+with BM25 against the query, using the sentences of all blocks in the
+request as the collection (so terms found everywhere weigh little).
+The best sentences are kept, each with its neighbours for context, and
+the kept passages are widened around the best matches until a per-block
+token cap is reached, then stitched back in document order.
+
+Lines are sentence boundaries too, so org charts, lists and tables
+(one entry per line) compact entry by entry.
+"""
+
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Sequence
+import numpy as np
+
+# Sentence end (., !, ? followed by whitespace) or a line break
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+|\s*\n\s*')
+_WORD = re.compile(r"\w+")
+
+# Function words that carry no evidence on their own
+STOPWORDS = frozenset("""
+a an and are as at be been but by can did do does for from had has have how i if in into is it its
+me my of on or our shall should so than that the their them then there these they this to was we
+were what when where which who whom why will with would you your
+""".split())
+
+GAP = " ... "  # Marks text left out between kept sentences
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences and lines (empty pieces dropped)"""
+    return [s for s in _SENTENCE_BREAK.split(text) if s.strip()]
+
+
+def terms(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords"""
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+def sentence_idf(sentence_terms: Sequence[Sequence[str]]) -> Dict[str, float]:
+    """
+    BM25 inverse document frequency with sentences as documents.
+
+    Args:
+        sentence_terms: Terms per sentence, over every block of the request
+
+    Returns:
+        term -> idf
+    """
+    n = len(sentence_terms)
+    df = Counter(term for sentence in sentence_terms for term in set(sentence))
+    return {term: math.log(1 + (n - f + 0.5) / (f + 0.5)) for term, f in df.items()}
+
+
+def score_sentences(
+    sentence_terms: Sequence[Sequence[str]],
+    query_terms: Sequence[str],
+    idf: Dict[str, float],
+    k1: float = 1.2,
+    b: float = 0.75
+) -> np.ndarray:
+    """
+    BM25 score of each sentence for the query.
+
+    Args:
+        sentence_terms: Terms per sentence of one block
+        query_terms: Query terms (terms(query))
+        idf: Collection idf (sentence_idf)
+        k1: Term frequency saturation
+        b: Length normalization
+
+    Returns:
+        float64 scores aligned with sentence_terms (0 = no query term)
+    """
+    scores = np.zeros(len(sentence_terms), dtype=np.float64)
+    query_terms = set(query_terms)
+    if not query_terms or not sentence_terms:
+        return scores
+    lengths = np.array([len(s) for s in sentence_terms], dtype=np.float64)
+    avg_length = max(lengths.mean(), 1.0)
+    for i, sentence in enumerate(sentence_terms):
+        counts = Counter(t for t in sentence if t in query_terms)
+        norm = k1 * (1 - b + b * lengths[i] / avg_length)
+        scores[i] = sum(idf.get(t, 0.0) * tf * (k1 + 1) / (tf + norm) for t, tf in counts.items())
+    return scores
+
+
+def select_sentences(
+    scores: np.ndarray,
+    costs: Sequence[int],
+    max_tokens: int,
+    context: int = 1
+) -> List[int]:
+    """
+    Pick sentences to keep within a token cap, using as much of it as fits.
+
+    Matching sentences are taken best first, each followed by up to
+    `context` sentences before and after it while they fit. The budget left
+    then widens the kept passages one sentence per side per round, best
+    match first, until nothing more fits. Without any match the leading
+    sentences are kept, as plain truncation would.
+
+    Args:
+        scores: Sentence scores (score_sentences)
+        costs: Estimated tokens per sentence
+        max_tokens: Token cap for the block
+        context: Neighbouring sentences kept on each side of a match
+
+    Returns:
+        Sentence indices to keep, ascending
+    """
+    chosen = set()
+    used = 0
+
+    def take(i: int) -> bool:
+        nonlocal used
+        if i in chosen or not 0 <= i < len(costs) or used + costs[i] > max_tokens:
+            return False
+        chosen.add(i)
+        used += costs[i]
+        return True
+
+    matches = [i for i in np.argsort(-scores, kind='stable').tolist() if scores[i] > 0]
+    for i in matches:
+        if i in chosen or take(i):
+            for offset in range(1, context + 1):
+                take(i - offset)
+                take(i + offset)
+
+    # Widen around the kept matches; a side stops at the block edge or the first sentence that does not fit
+    sides = [[i, step] for i in matches if i in chosen for step in (-1, 1)]
+    while sides:
+        growing = []
+        for side in sides:
+            j = side[0] + side[1]
+            while j in chosen:
+                j += side[1]
+            if take(j):
+                side[0] = j
+                growing.append(side)
+        sides = growing
+
+    if not chosen:
+        for i in range(len(costs)):
+            if not take(i):
+                break
+    return sorted(chosen)
+
+
+def stitch(sentences: Sequence[str], keep: Sequence[int]) -> str:
+    """Join kept sentences in order, marking skipped text with GAP"""
+    parts = []
+    previous = -1
+    for i in keep:
+        if parts and i != previous + 1:
+            parts.append(GAP)
+        elif parts:
+            parts.append(" ")
+        elif i > 0:
+            parts.append(GAP.lstrip())
+        parts.append(sentences[i].strip())
+        previous = i
+    if keep and keep[-1] < len(sentences) - 1:
+        parts.append(GAP.rstrip())
+    return "".join(parts)
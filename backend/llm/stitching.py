@@ -0,0 +1,142 @@
+"""
+Chunk Stitching for Pryzm Project
+
+TextChunker gives consecutive chunks of a page up to 180 tokens of
+overlap (whole sentences), so joining their texts repeats that text.
+Ingestion records each chunk's character span within its cleaned page
+text (chunks.char_start / chunks.char_end). Chunks are spliced on those
+offsets, so overlapping text appears once. Chunks stored without spans
+fall back to matching the longest suffix/prefix overlap of the texts.
+
+This module has no dependencies so ingestion scripts can import it.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Shorter suffix/prefix matches are treated as coincidence, not chunk overlap
+MIN_OVERLAP_CHARS = 20
+
+
+def overlap_length(left: str, right: str, min_overlap: int = MIN_OVERLAP_CHARS) -> int:
+    """
+    Length of the longest suffix of left that is also a prefix of right.
+
+    Linear time (Knuth-Morris-Pratt failure function over the prefix).
+
+    Args:
+        left: Earlier text
+        right: Following text
+        min_overlap: Shorter matches count as no overlap
+
+    Returns:
+        Overlap length in characters (0 if none)
+    """
+    n = min(len(left), len(right))
+    if n < min_overlap:
+        return 0
+    pattern = right[:n]
+    failure = [0] * n
+    k = 0
+    for i in range(1, n):
+        while k and pattern[i] != pattern[k]:
+            k = failure[k - 1]
+        if pattern[i] == pattern[k]:
+            k += 1
+        failure[i] = k
+
+    k = 0
+    for ch in left[-n:]:
+        if k == n:
+            k = failure[k - 1]
+        while k and ch != pattern[k]:
+            k = failure[k - 1]
+        if ch == pattern[k]:
+            k += 1
+    return k if k >= min_overlap else 0
+
+
+def page_spans(
+    texts: Sequence[str],
+    separator: str = " ",
+    known: Optional[Sequence[Optional[Tuple[int, int]]]] = None
+) -> List[Tuple[int, int]]:
+    """
+    Recover character spans for the consecutive chunks of one page.
+
+    Used to backfill chunks ingested before spans were recorded: each chunk
+    starts where its overlap with the previous one begins, or right after
+    the previous chunk and separator when there is no overlap. Spans that
+    were recorded at chunking time are kept and anchor the chunks after them.
+
+    Args:
+        texts: Chunk texts of one page, in chunk order
+        separator: Text between sentences that are not overlapped (TextChunker joins with a space)
+        known: Recorded (char_start, char_end) per chunk, None where missing
+
+    Returns:
+        (char_start, char_end) per chunk
+    """
+    spans = []
+    end = None
+    previous = ""
+    for i, text in enumerate(texts):
+        if known is not None and known[i] is not None:
+            start, end = known[i]
+        else:
+            if end is None:
+                start = 0
+            else:
+                overlap = overlap_length(previous, text)
+                start = end - overlap if overlap else end + len(separator)
+            end = start + len(text)
+        spans.append((start, end))
+        previous = text
+    return spans
+
+
+def splice(chunks: Sequence[Dict[str, Any]], separator: str = " ") -> Tuple[str, List[float]]:
+    """
+    Join chunk texts, writing text shared by consecutive chunks of a page once.
+
+    Args:
+        chunks: Chunk dictionaries with 'text', 'page' and optional
+                'char_start' / 'char_end', in page and chunk order
+        separator: Joins chunks that do not overlap (other pages, gaps)
+
+    Returns:
+        Tuple of (text, fraction of each chunk's text that was kept)
+    """
+    parts: List[str] = []
+    kept: List[float] = []
+    previous: Optional[Dict[str, Any]] = None
+    page_end: Optional[int] = None  # Furthest char_end written on the current page
+
+    for chunk in chunks:
+        text = chunk['text']
+        start, end = chunk.get('char_start'), chunk.get('char_end')
+        same_page = previous is not None and chunk.get('page') == previous.get('page')
+        skip = 0
+
+        if same_page and start is not None and page_end is not None:
+            if start < page_end:
+                skip = min(page_end - start, len(text))
+        elif same_page:
+            skip = overlap_length(previous['text'], text)
+
+        if previous is None:
+            parts.append(text)
+        elif skip:
+            parts.append(text[skip:])
+        else:
+            parts.append(separator + text)
+        kept.append((len(text) - skip) / len(text) if text else 1.0)
+
+        if not same_page:
+            page_end = None
+        if end is not None:
+            page_end = end if page_end is None else max(page_end, end)
+        elif start is None:
+            page_end = None
+        previous = chunk
+
+    return "".join(parts), kept
@@ -0,0 +1,402 @@
+"""
+Vector Index Loading for Pryzm Project
+
+Builds FAISS indexes from factory strings and loads them for search.
+The index is memory-mapped when the index type supports it, and the
+optional position mapping is a flat int64 .npy file opened with mmap,
+so uvicorn workers on the same node share both through the OS page
+cache instead of each holding a private copy.
+
+This module only depends on numpy and faiss so ingestion scripts can
+import it without API keys.
+"""
+
+import pickle
+from pathlib import Path
+from typing import List, Optional, Tuple
+import numpy as np
+import faiss
+
+
+# Index used unless ingestion is told otherwise (see scripts/ingestion/tune_index.py)
+DEFAULT_INDEX_FACTORY = "HNSW32,Flat"
+DEFAULT_EF_CONSTRUCTION = 200
+DEFAULT_SEARCH_PARAMS = "efSearch=100"
+
+# Index and stored-embeddings file names (under data/) per vector space (RetrievalConfig.vector_space)
+VECTOR_SPACE_FILES = {
+    "openai": ("vectors.faiss", "embeddings"),
+    "local": ("vectors.local.faiss", "embeddings.local"),
+}
+
+
+def build_faiss_index(
+    embeddings: np.ndarray,
+    ids: np.ndarray,
+    factory: str = DEFAULT_INDEX_FACTORY,
+    ef_construction: int = DEFAULT_EF_CONSTRUCTION,
+    search_params: str = DEFAULT_SEARCH_PARAMS,
+    train_size: Optional[int] = None
+) -> faiss.Index:
+    """
+    Build an inner-product index from a FAISS factory string.
+
+    Covers e.g. "Flat", "HNSW32,Flat", "HNSW32,SQ8", "IVF1024,PQ64" and
+    "OPQ64,IVF1024,PQ64". The index is wrapped in IndexIDMap2 so labels
+    are the given ids (chunks.rowid).
+
+    Args:
+        embeddings: L2-normalized float32 vectors (N x D)
+        ids: int64 id per row
+        factory: FAISS index_factory description (without an IDMap prefix)
+        ef_construction: HNSW efConstruction, if the index has an HNSW graph
+        search_params: ParameterSpace string stored with the index (e.g. "efSearch=100", "nprobe=16")
+        train_size: Max vectors used to train IVF/PQ/OPQ (None = all)
+
+    Returns:
+        Trained IndexIDMap2 with all vectors added
+    """
+    base = faiss.index_factory(embeddings.shape[1], factory, faiss.METRIC_INNER_PRODUCT)
+
+    hnsw = getattr(faiss.downcast_index(base), 'hnsw', None)
+    if hnsw is not None:
+        hnsw.efConstruction = ef_construction
+
+    if not base.is_trained:
+        train = embeddings
+        if train_size is not None and len(embeddings) > train_size:
+            sample = np.random.RandomState(0).choice(len(embeddings), train_size, replace=False)
+            train = embeddings[np.sort(sample)]
+        base.train(train)
+
+    index = faiss.IndexIDMap2(base)
+    if len(embeddings):
+        index.add_with_ids(embeddings, np.ascontiguousarray(ids, dtype=np.int64))
+    apply_search_params(index, search_params)
+    return index
+
+
+def truncate_embeddings(embeddings: np.ndarray, dimension: int) -> np.ndarray:
+    """
+    Matryoshka truncation: keep the leading dimensions and re-normalize.
+
+    text-embedding-3 models are trained so that a prefix of the vector is
+    itself a usable embedding (the API's `dimensions` parameter does the same).
+
+    Args:
+        embeddings: float32 vectors (N x D)
+        dimension: Dimensions to keep (0 or >= D = unchanged)
+
+    Returns:
+        New L2-normalized (N x dimension) array, or embeddings itself if not truncated
+    """
+    if not dimension or dimension >= embeddings.shape[1]:
+        return embeddings
+    truncated = np.array(embeddings[:, :dimension], dtype='float32', order='C')
+    faiss.normalize_L2(truncated)
+    return truncated
+
+
+class FullVectors:
+    """
+    Full-dimension embeddings used to rescore candidates from a truncated index.
+
+    Rows are looked up by FAISS label (chunks.rowid) through a sorted copy of
+    the ids; the vectors themselves can stay memory-mapped.
+    """
+
+    def __init__(self, vectors: np.ndarray, ids: np.ndarray):
+        """
+        Args:
+            vectors: L2-normalized float32 vectors (N x D), e.g. memory-mapped embeddings.npy
+            ids: int64 label of each row
+        """
+        self.vectors = vectors
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self._order = np.argsort(self.ids, kind='stable')
+        self._sorted_ids = self.ids[self._order]
+
+    @classmethod
+    def load(cls, embeddings_path: Path, ids_path: Path) -> "FullVectors":
+        """Open embeddings.npy (memory-mapped) and its ids as written by ingestion"""
+        return cls(np.load(str(embeddings_path), mmap_mode='r'), np.load(str(ids_path)))
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    def __len__(self) -> int:
+        return len(self._sorted_ids)
+
+    def rows(self, labels: np.ndarray) -> np.ndarray:
+        """Row of each label in vectors (-1 where the label has no stored vector)"""
+        if len(self._sorted_ids) == 0:
+            return np.full(len(labels), -1, dtype=np.int64)
+        slots = np.minimum(np.searchsorted(self._sorted_ids, labels), len(self._sorted_ids) - 1)
+        return np.where(self._sorted_ids[slots] == labels, self._order[slots], -1)
+
+    def rescore(
+        self,
+        query_vectors: np.ndarray,
+        labels: np.ndarray,
+        scores: np.ndarray,
+        top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact inner products for first-stage candidates, keeping the best top_k.
+
+        Args:
+            query_vectors: Normalized full-dimension queries (n x D)
+            labels: First-stage labels in FAISS search layout (n x k', -1 = padding)
+            scores: First-stage scores, kept for labels without a stored vector
+            top_k: Results per query
+
+        Returns:
+            (scores, labels) in FAISS search layout (n x top_k), best first
+        """
+        n, width = labels.shape
+        flat = labels.ravel()
+        rows = self.rows(flat)
+        stored = rows >= 0
+        rescored = np.array(scores, dtype=np.float32).ravel()
+        if stored.any():
+            # Sorted row order keeps reads sequential when the matrix is memory-mapped
+            unique_rows, inverse = np.unique(rows[stored], return_inverse=True)
+            candidates = np.asarray(self.vectors[unique_rows], dtype=np.float32)[inverse]
+            owners = np.repeat(np.arange(n), width)[stored]
+            rescored[stored] = np.einsum('ij,ij->i', candidates, query_vectors[owners])
+        rescored[flat < 0] = -np.inf
+        rescored = rescored.reshape(n, width)
+
+        k = min(top_k, width)
+        top = np.argsort(-rescored, axis=1, kind='stable')[:, :k]
+        top_scores = np.take_along_axis(rescored, top, axis=1)
+        top_labels = np.where(np.isfinite(top_scores), np.take_along_axis(labels, top, axis=1), -1)
+        return top_scores, top_labels
+
+
+def binary_codes(embeddings: np.ndarray) -> np.ndarray:
+    """Sign-bit codes: one bit per dimension (1 = positive), packed into uint8 (N x D/8)"""
+    return np.packbits(np.asarray(embeddings) > 0, axis=1)
+
+
+class BinaryVectorIndex(FullVectors):
+    """
+    Two-stage vector search over stored embeddings.
+
+    Stage one ranks sign-bit codes by Hamming distance (FAISS IndexBinaryFlat,
+    or NumPy popcount over a filtered subset); 1536 dims pack into 192 bytes
+    per vector, 32x less than float32, so the scan stays cache-resident.
+    Stage two rescores the survivors exactly against float16 vectors.
+    """
+
+    def __init__(self, codes: np.ndarray, vectors: np.ndarray, ids: np.ndarray):
+        """
+        Args:
+            codes: Packed sign bits from binary_codes() (N x D/8 uint8)
+            vectors: L2-normalized float16 vectors (N x D), e.g. memory-mapped
+            ids: int64 label of each row (chunks.rowid)
+        """
+        super().__init__(vectors, ids)
+        self.codes = np.ascontiguousarray(codes, dtype=np.uint8)
+        self._index = faiss.IndexBinaryFlat(self.codes.shape[1] * 8)
+        if len(self.codes):
+            self._index.add(self.codes)
+
+    @classmethod
+    def load(cls, embeddings_path: Path, ids_path: Path) -> "BinaryVectorIndex":
+        """
+        Open the .bin.npy codes and .f16.npy vectors written next to embeddings_path.
+
+        Files missing (embeddings stored before binary codes existed) are derived
+        from the float32 embeddings instead, in memory.
+        """
+        embeddings_path = Path(embeddings_path)
+        stem = embeddings_path.name[:-len(".npy")]
+        codes_path = embeddings_path.with_name(f"{stem}.bin.npy")
+        half_path = embeddings_path.with_name(f"{stem}.f16.npy")
+        if codes_path.exists() and half_path.exists():
+            codes, vectors = np.load(str(codes_path)), np.load(str(half_path), mmap_mode='r')
+        else:
+            print(f"[VectorIndex] {codes_path.name} / {half_path.name} missing, deriving them from {embeddings_path.name} "
+                  f"(re-run ingestion to store them)")
+            embeddings = np.load(str(embeddings_path), mmap_mode='r')
+            codes, vectors = binary_codes(embeddings), np.asarray(embeddings, dtype=np.float16)
+        return cls(codes, vectors, np.load(str(ids_path)))
+
+    def memory_bytes(self) -> int:
+        """Size of the first-stage codes"""
+        return int(self.codes.nbytes)
+
+    def search(
+        self,
+        query_vectors: np.ndarray,
+        top_k: int,
+        rescore_factor: float = 8.0,
+        labels: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Hamming top-N, then float16 rescoring.
+
+        Args:
+            query_vectors: Normalized float32 queries (n x D)
+            top_k: Results per query
+            rescore_factor: Hamming candidates kept per result
+            labels: Restrict the search to these labels (filters), None = all vectors
+
+        Returns:
+            (inner-product scores, labels) in FAISS search layout (n x top_k), best first
+        """
+        query_codes = binary_codes(query_vectors)
+        num_candidates = max(top_k, int(np.ceil(top_k * rescore_factor)))
+
+        if labels is None:
+            distances, positions = self._index.search(query_codes, min(num_candidates, len(self)))
+            candidates = np.where(positions >= 0, self.ids[np.maximum(positions, 0)], -1)
+        else:
+            rows = self.rows(np.asarray(labels, dtype=np.int64))
+            rows = rows[rows >= 0]
+            if len(rows) == 0:
+                empty = np.full((len(query_vectors), 0), -1, dtype=np.int64)
+                return empty.astype(np.float32), empty
+            subset = self.codes[rows]
+            k = min(num_candidates, len(rows))
+            distances = np.empty((len(query_vectors), k), dtype=np.int32)
+            candidates = np.empty((len(query_vectors), k), dtype=np.int64)
+            for i, code in enumerate(query_codes):
+                hamming = np.bitwise_count(subset ^ code).sum(axis=1, dtype=np.int32)
+                top = np.argpartition(hamming, k - 1)[:k] if k < len(rows) else np.arange(k)
+                distances[i] = hamming[top]
+                candidates[i] = self.ids[rows[top]]
+
+        # Every candidate has a stored vector; -distance only orders padding
+        return self.rescore(query_vectors, candidates, -distances.astype(np.float32), top_k)
+
+
+def apply_search_params(index: faiss.Index, params: str):
+    """
+    Set search-time parameters (efSearch, nprobe, ...) with faiss.ParameterSpace.
+
+    Parameters that do not apply to the index type (e.g. efSearch on an
+    IVF index) are skipped with a warning.
+
+    Args:
+        index: FAISS index (IDMap and pre-transform wrappers are handled)
+        params: Comma-separated "name=value" pairs; empty leaves the stored values
+    """
+    space = faiss.ParameterSpace()
+    for param in filter(None, (p.strip() for p in params.split(','))):
+        name, _, value = param.partition('=')
+        try:
+            space.set_index_parameter(index, name.strip(), float(value))
+        except RuntimeError:
+            print(f"[VectorIndex] Skipping search parameter {param!r} (not supported by this index type)")
+
+
+def index_memory_bytes(index: faiss.Index) -> int:
+    """Approximate resident size of an index (its serialized size)"""
+    return int(faiss.serialize_index(index).size)
+
+
+def read_faiss_index(path: Path, mmap: bool = True) -> Tuple[faiss.Index, str]:
+    """
+    Read a FAISS index, memory-mapping it when possible.
+
+    IO_FLAG_MMAP_IFC maps the stored vectors of flat-code indexes (Flat,
+    HNSW*Flat, SQ, PQ); IO_FLAG_MMAP covers inverted lists. Index types that
+    support neither fall back to a regular in-memory read.
+
+    Args:
+        path: Path to the .faiss file
+        mmap: Try memory-mapped loading first
+
+    Returns:
+        Tuple of (index, load mode: 'mmap_ifc', 'mmap' or 'memory')
+    """
+    if mmap:
+        for mode in ('IO_FLAG_MMAP_IFC', 'IO_FLAG_MMAP'):
+            flag = getattr(faiss, mode, None)
+            if flag is None:
+                continue
+            try:
+                index = faiss.read_index(str(path), flag | faiss.IO_FLAG_READ_ONLY)
+                return index, mode[len('IO_FLAG_'):].lower()
+            except RuntimeError as e:
+                print(f"[VectorIndex] {mode} not supported for this index ({e}), trying next mode")
+    return faiss.read_index(str(path)), 'memory'
+
+
+def load_id_mapping(path: Path) -> np.ndarray:
+    """
+    Open the FAISS-position -> chunks.rowid mapping written by ingestion.
+
+    Args:
+        path: Path to the .npy file (int64, one entry per FAISS row)
+
+    Returns:
+        Read-only, memory-mapped int64 array
+    """
+    mapping = np.load(str(path), mmap_mode='r')
+    if mapping.dtype != np.int64 or mapping.ndim != 1:
+        raise ValueError(f"Invalid id mapping {path}: expected 1-d int64, got {mapping.ndim}-d {mapping.dtype}")
+    return mapping
+
+
+def load_legacy_mapping(path: Path) -> List[str]:
+    """
+    Read the legacy pickled list of chunk_ids (one per FAISS row).
+
+    Args:
+        path: Path to vectors.pkl
+
+    Returns:
+        List of chunk_id strings
+    """
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _base_index(index: faiss.Index) -> faiss.Index:
+    """Unwrap IDMap / pre-transform (OPQ) wrappers down to the searching index"""
+    index = faiss.downcast_index(index)
+    while isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2, faiss.IndexPreTransform)):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def selector_search_params(
+    index: faiss.Index,
+    selector: Optional[faiss.IDSelector],
+    ef_scale: float = 1.0,
+    ef_search: Optional[int] = None
+) -> Optional[faiss.SearchParameters]:
+    """
+    Build per-query search parameters that restrict results to a selector
+    and/or override HNSW efSearch.
+
+    Passing SearchParameters replaces the index's own efSearch/nprobe, so the
+    current values are copied in. HNSW efSearch can be scaled up for
+    selective filters, since filtered-out nodes still cost graph hops.
+
+    Args:
+        index: Index the parameters are for (IDMap selectors see external ids)
+        selector: Allowed labels (None = no restriction)
+        ef_scale: Multiplier for HNSW efSearch
+        ef_search: Per-query HNSW efSearch before scaling (None = the index's own)
+
+    Returns:
+        SearchParameters to pass to index.search(..., params=...), or None if
+        the index defaults apply unchanged
+    """
+    base = _base_index(index)
+    hnsw = getattr(base, 'hnsw', None)
+    if hnsw is not None:
+        if selector is None and ef_search is None and ef_scale == 1.0:
+            return None
+        ef = ef_search if ef_search is not None else hnsw.efSearch
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=max(1, int(ef * ef_scale)))
+    if selector is None:
+        return None
+    if isinstance(base, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=base.nprobe)
+    return faiss.SearchParameters(sel=selector)
@@ -7,12 +7,25 @@ import re
 import json
 from llm.llm import openrouter_client
 from llm.retriever import get_retriever
-from llm.context_processor import process_context
+from llm.context_processor import ContextProcessor
 from settings import OPENROUTER_MODEL
 from schemas import AnswerRequest, AnswerResponse, EvidenceItem, ErrorResponse
 
 router = APIRouter(tags=["answer"])
 
+# Shared by /answer and /answer/stream (created once, reused by every request)
+context_processor = ContextProcessor(
+    max_context_tokens=30000,  # Reduced from 60000 for faster LLM response
+    context_fill_ratio=0.55,  # Reduced from 70% to 55% for speed
+    max_evidence_blocks=7,  # Limit to 7 evidence blocks max
+    max_blocks_per_doc=4,  # At most 4 merged blocks from one document
+    min_blocks_per_doc=1,  # Every document in the top 7 keeps its best block if it fits
+    max_block_tokens=200,  # Keep the ~200 tokens of each block that best match the query
+    max_block_chars=800,  # Truncate each block to 800 chars max (only without a query)
+    text_similarity_threshold=0.85,  # Remove highly similar chunks
+    packing="knapsack"  # Most relevance per token within the budget
+)
+
 
 @router.post("/answer", response_model=AnswerResponse)
 async def answer_question(request: AnswerRequest) -> AnswerResponse:
@@ -37,6 +50,7 @@ async def answer_question(request: AnswerRequest) -> AnswerResponse:
     print(f"\n🟢 BACKEND: ===== NEW REQUEST =====")
     print(f"🟢 BACKEND: Received question: {request.prompt}")
     print(f"🟢 BACKEND: max_sources={request.max_sources}, use_reranking={request.use_reranking}, use_web_search={request.use_web_search}")
+    retrieval_stats = {}
     
     try:
         # Step 1: Decide on search strategy
@@ -50,10 +64,14 @@ async def answer_question(request: AnswerRequest) -> AnswerResponse:
             retriever = get_retriever()
             print(f"🟢 BACKEND: Step 1 - Retriever obtained, running search...")
             step_start = time.time()
-            search_results = retriever.retrieve(
+            search_results = await retriever.aretrieve(
                 request.prompt,
                 top_k=request.max_sources,
-                use_reranking=request.use_reranking
+                use_reranking=request.use_reranking,
+                filters=request.filters.dict(exclude_none=True) if request.filters else None,
+                fusion=request.fusion.dict(exclude_none=True) if request.fusion else None,
+                stats=retrieval_stats,
+                latency_budget_ms=request.latency_budget_ms
             )
             step_elapsed = time.time() - step_start
             total_elapsed = time.time() - start_time
@@ -72,7 +90,9 @@ async def answer_question(request: AnswerRequest) -> AnswerResponse:
                         "total_sources": 0,
                         "reranking_used": request.use_reranking,
                         "message": "No search results found",
-                        "suggest_web_search": True
+                        "suggest_web_search": True,
+                        "retrieval_degraded": retrieval_stats.get('degraded'),
+                        "retrieval": retrieval_stats
                     },
                     used_web_search=False
                 )
@@ -81,15 +101,7 @@ async def answer_question(request: AnswerRequest) -> AnswerResponse:
         if not request.use_web_search:
             print(f"🟢 BACKEND: Step 3 - Processing context...")
             step_start = time.time()
-            context_data = process_context(
-                search_results,
-                query=request.prompt,
-                max_context_tokens=30000,  # Reduced from 60000 for faster LLM response
-                context_fill_ratio=0.55,  # Reduced from 70% to 55% for speed
-                max_evidence_blocks=7,  # Limit to 7 evidence blocks max
-                max_block_chars=800,  # Truncate each block to 800 chars max
-                text_similarity_threshold=0.85  # Remove highly similar chunks
-            )
+            context_data = context_processor.process(search_results, query=request.prompt)
             step_elapsed = time.time() - step_start
             total_elapsed = time.time() - start_time
             print(f"🟢 BACKEND: Step 3 - ✅ Context processed in {step_elapsed:.2f}s (total: {total_elapsed:.2f}s) - {len(context_data['evidence'])} evidence blocks")
@@ -303,9 +315,12 @@ Please answer the question using ONLY information from your knowledge base above
                 "target_tokens": context_data['metadata'].get('target_tokens', 0),
                 "fill_ratio": context_data['metadata'].get('fill_ratio', 0),
                 "blocks_truncated": context_data['metadata'].get('blocks_truncated', 0),
+                "packing": context_data['metadata'].get('packing'),
                 "reranking_used": request.use_reranking,
                 "citations_found": len(set(citations_found)) if citations_found else 0,
-                "web_search_used": request.use_web_search
+                "web_search_used": request.use_web_search,
+                "retrieval_degraded": retrieval_stats.get('degraded'),
+                "retrieval": retrieval_stats
             },
             used_web_search=request.use_web_search
         )
@@ -351,6 +366,7 @@ async def answer_question_stream(request: AnswerRequest):
         print(f"🟢 BACKEND: Received question: {request.prompt}")
         print(f"🟢 BACKEND: max_sources={request.max_sources}, use_reranking={request.use_reranking}, use_web_search={request.use_web_search}")
         print(f"🟢 BACKEND: 📡 Starting streaming response generation...")
+        retrieval_stats = {}
         
         try:
             # Step 1: Decide on search strategy
@@ -364,10 +380,14 @@ async def answer_question_stream(request: AnswerRequest):
                 retriever = get_retriever()
                 print(f"🟢 BACKEND: Step 1 - Retriever obtained, running search...")
                 step_start = time.time()
-                search_results = retriever.retrieve(
+                search_results = await retriever.aretrieve(
                     request.prompt,
                     top_k=request.max_sources,
-                    use_reranking=request.use_reranking
+                    use_reranking=request.use_reranking,
+                    filters=request.filters.dict(exclude_none=True) if request.filters else None,
+                    fusion=request.fusion.dict(exclude_none=True) if request.fusion else None,
+                    stats=retrieval_stats,
+                    latency_budget_ms=request.latency_budget_ms
                 )
                 step_elapsed = time.time() - step_start
                 total_elapsed = time.time() - start_time
@@ -383,15 +403,7 @@ async def answer_question_stream(request: AnswerRequest):
             if not request.use_web_search:
                 print(f"🟢 BACKEND: Step 3 - Processing context...")
                 step_start = time.time()
-                context_data = process_context(
-                    search_results,
-                    query=request.prompt,
-                    max_context_tokens=30000,
-                    context_fill_ratio=0.55,
-                    max_evidence_blocks=7,
-                    max_block_chars=800,
-                    text_similarity_threshold=0.85
-                )
+                context_data = context_processor.process(search_results, query=request.prompt)
                 step_elapsed = time.time() - step_start
                 total_elapsed = time.time() - start_time
                 print(f"🟢 BACKEND: Step 3 - ✅ Context processed in {step_elapsed:.2f}s (total: {total_elapsed:.2f}s) - {len(context_data['evidence'])} evidence blocks")
@@ -455,7 +467,10 @@ async def answer_question_stream(request: AnswerRequest):
                 'used_model': OPENROUTER_MODEL,
                 'total_sources': len(evidence_items),
                 'total_tokens': context_data['metadata'].get('total_tokens', 0),
-                'target_tokens': context_data['metadata'].get('target_tokens', 0)
+                'target_tokens': context_data['metadata'].get('target_tokens', 0),
+                'packing': context_data['metadata'].get('packing'),
+                'retrieval_degraded': retrieval_stats.get('degraded'),
+                'retrieval': retrieval_stats
             }
             print(f"🟢 BACKEND: 📡 SENDING METADATA EVENT with {len(evidence_items)} sources")
             print(f"🟢 BACKEND: 📡 Sources data:", [{"evidence_id": item.evidence_id, "doc_id": item.doc_id} for item in evidence_items])
@@ -544,7 +559,10 @@ Please answer the question using ONLY information from your knowledge base above
                     'used_model': OPENROUTER_MODEL,
                     'total_sources': len(evidence_items),
                     'total_tokens': context_data['metadata'].get('total_tokens', 0),
-                    'target_tokens': context_data['metadata'].get('target_tokens', 0)
+                    'target_tokens': context_data['metadata'].get('target_tokens', 0),
+                    'packing': context_data['metadata'].get('packing'),
+                    'retrieval_degraded': retrieval_stats.get('degraded'),
+                    'retrieval': retrieval_stats
                 }
             }
             yield f"data: {json.dumps(done_event)}\n\n"
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List
 from llm.retriever import get_retriever
+from llm.embeddings import embedding_cache, embedding_coalescer
 from schemas import ContextItem, ErrorResponse
 
 router = APIRouter(tags=["debug"])
@@ -20,18 +21,18 @@ async def context_debug(request: DebugRequest):
     """
     try:
         retriever = get_retriever()
-        retrieved_docs = retriever.retrieve(request.query, top_k=request.top_k, min_score=0.05)
+        retrieved_docs = await retriever.aretrieve(request.query, top_k=request.top_k, use_reranking=False)
         
         context_items = []
         for i, doc in enumerate(retrieved_docs, 1):
             context_item = ContextItem(
                 rank=i,
                 doc_id=doc['doc_id'],
-                title=doc['title'],
-                url=doc['url'],
-                doc_date=doc['doc_date'],
-                pageno=doc['pageno'],
-                snippet=doc['snippet']
+                title=doc['doc_title'],
+                url=doc['source_url'] or '',
+                doc_date=doc['date'] or 'Unknown',
+                pageno=doc['page'],
+                snippet=doc['text'][:300]
             )
             context_items.append(context_item)
         
@@ -51,3 +52,20 @@ async def context_debug(request: DebugRequest):
                 detail=str(e)
             ).dict()
         )
+
+
+@router.get("/v1/cache-stats")
+async def cache_stats():
+    """
+    Hit/miss counters for the in-process caches.
+    """
+    retriever = get_retriever()
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "result_cache": {
+            **retriever.result_cache.stats(),
+            "snapshot_version": retriever.snapshot_version()
+        },
+        "rerank_cache": retriever.rerank_cache.stats(),
+        "embedding_coalescer": embedding_coalescer.stats() if embedding_coalescer else None
+    }
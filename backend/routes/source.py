@@ -1,11 +1,63 @@
 from fastapi import APIRouter, HTTPException
-from schemas import SourceRequest, SourceResponse, SourcePageResponse, EvidenceItem, ErrorResponse
+from schemas import SourceRequest, SourceResponse, BatchSourceRequest, BatchSourceResponse, SourcePageResponse, EvidenceItem, ErrorResponse
 from llm.retriever import get_retriever
-from llm.context_processor import process_context
+from llm.context_processor import ContextProcessor
+from llm.stitching import splice
 import time
 
 router = APIRouter(tags=["source"])
 
+# Reused by every request: large budget, all available sources in rank order
+context_processor = ContextProcessor(
+    max_context_tokens=32000,
+    context_fill_ratio=1.0,
+    max_blocks_per_doc=4,
+    min_blocks_per_doc=0,  # Rank order packing: no per-document reservation
+    packing="rank"
+)
+
+
+def _evidence_items(search_results: list, query: str) -> tuple:
+    """
+    Merge search results into evidence blocks and convert them to EvidenceItems.
+    
+    Args:
+        search_results: Results from the retriever
+        query: Query the results were retrieved for
+        
+    Returns:
+        Tuple of (evidence items, context metadata)
+    """
+    # Process context (merge chunks, format citations)
+    context_data = context_processor.process(search_results, query=query)
+    
+    # Convert to EvidenceItem format
+    evidence_items = []
+    for ev in context_data['evidence']:
+        scores = ev.get('scores') or {}
+        evidence_item = EvidenceItem(
+            evidence_id=ev['evidence_id'],
+            citation=ev['citation'],
+            doc_id=ev['doc_id'],
+            doc_title=ev['doc_title'],
+            doctype=ev.get('doctype'),
+            date=ev.get('date'),
+            page_range=ev['page_range'],
+            section_path=ev.get('section_path', []),
+            text=ev['text'],
+            source_url=ev['source_url'],
+            chunk_ids=ev['chunk_ids'],
+            token_count=ev['token_count'],
+            # Scores of the block's best-ranked chunk (the one that sets its rank)
+            rerank_score=scores.get('rerank'),
+            rrf_score=scores.get('rrf'),
+            bm25_score=scores.get('bm25'),
+            faiss_score=scores.get('faiss')
+        )
+        evidence_items.append(evidence_item)
+    
+    return evidence_items, context_data['metadata']
+
 
 @router.get("/source/{doc_id}/{pageno}", response_model=SourcePageResponse)
 async def get_source_page(doc_id: str, pageno: int) -> SourcePageResponse:
@@ -42,16 +94,7 @@ async def get_source_page(doc_id: str, pageno: int) -> SourcePageResponse:
         retriever = get_retriever()
         
         # Query all chunks for this doc_id and page
-        cursor = retriever.conn.execute(
-            """SELECT chunk_id, doc_id, doc_title, source_url, date, doctype,
-                      page, section_path, text, is_table
-               FROM chunks 
-               WHERE doc_id = ? AND page = ?
-               ORDER BY chunk_id""",
-            (doc_id, pageno)
-        )
-        
-        chunks = cursor.fetchall()
+        chunks = await retriever.aget_page_chunks(doc_id, pageno)
         print(f"🟠 SOURCE: Found {len(chunks)} chunks for doc_id={doc_id}, page={pageno}")
         
         if not chunks:
@@ -64,9 +107,9 @@ async def get_source_page(doc_id: str, pageno: int) -> SourcePageResponse:
                 ).dict()
             )
         
-        # Reconstruct page from chunks
+        # Reconstruct page from chunks, writing the overlap between consecutive chunks once
         first_chunk = chunks[0]
-        page_text = "\n\n".join(chunk['text'] for chunk in chunks)
+        page_text, _ = splice(chunks, separator="\n\n")
         
         print(f"🟠 SOURCE: ✅ Reconstructed page text ({len(page_text)} chars from {len(chunks)} chunks)")
         
@@ -119,10 +162,15 @@ async def retrieve_sources(request: SourceRequest) -> SourceResponse:
     try:
         # Step 1: Hybrid retrieval
         retriever = get_retriever()
-        search_results = retriever.retrieve(
+        retrieval_stats = {}
+        search_results = await retriever.aretrieve(
             request.query,
             top_k=request.max_results,
-            use_reranking=request.use_reranking
+            use_reranking=request.use_reranking,
+            filters=request.filters.dict(exclude_none=True) if request.filters else None,
+            fusion=request.fusion.dict(exclude_none=True) if request.fusion else None,
+            stats=retrieval_stats,
+            latency_budget_ms=request.latency_budget_ms
         )
         
         if not search_results:
@@ -132,44 +180,17 @@ async def retrieve_sources(request: SourceRequest) -> SourceResponse:
                 metadata={
                     "total_sources": 0,
                     "reranking_used": request.use_reranking,
-                    "message": "No sources found for query"
+                    "message": "No sources found for query",
+                    "retrieval_degraded": retrieval_stats.get('degraded'),
+                    "retrieval": retrieval_stats
                 },
                 latency_ms=int((time.time() - start_time) * 1000)
             )
         
-        # Step 2: Process context (merge chunks, format citations)
-        context_data = process_context(
-            search_results,
-            query=request.query,
-            max_context_tokens=32000,  # Large budget for sources endpoint
-            context_fill_ratio=1.0  # Use all available sources
-        )
+        # Step 2: Merge chunks, format citations and convert to EvidenceItems
+        evidence_items, context_metadata = _evidence_items(search_results, request.query)
         
-        # Step 3: Convert to EvidenceItem format
-        evidence_items = []
-        for ev in context_data['evidence']:
-            evidence_item = EvidenceItem(
-                evidence_id=ev['evidence_id'],
-                citation=ev['citation'],
-                doc_id=ev['doc_id'],
-                doc_title=ev['doc_title'],
-                doctype=ev.get('doctype'),
-                date=ev.get('date'),
-                page_range=ev['page_range'],
-                section_path=ev.get('section_path', []),
-                text=ev['text'],
-                source_url=ev['source_url'],
-                chunk_ids=ev['chunk_ids'],
-                token_count=ev['token_count'],
-                # Include scores from original search results if available
-                rerank_score=search_results[ev['evidence_id']-1].get('rerank_score') if ev['evidence_id'] <= len(search_results) else None,
-                rrf_score=search_results[ev['evidence_id']-1].get('rrf_score') if ev['evidence_id'] <= len(search_results) else None,
-                bm25_score=search_results[ev['evidence_id']-1].get('bm25_score') if ev['evidence_id'] <= len(search_results) else None,
-                faiss_score=search_results[ev['evidence_id']-1].get('faiss_score') if ev['evidence_id'] <= len(search_results) else None
-            )
-            evidence_items.append(evidence_item)
-        
-        # Step 4: Return response
+        # Step 3: Return response
         latency_ms = int((time.time() - start_time) * 1000)
         
         return SourceResponse(
@@ -177,9 +198,11 @@ async def retrieve_sources(request: SourceRequest) -> SourceResponse:
             sources=evidence_items,
             metadata={
                 "total_sources": len(evidence_items),
-                "total_tokens": context_data['metadata']['total_tokens'],
+                "total_tokens": context_metadata['total_tokens'],
                 "reranking_used": request.use_reranking,
-                "blocks_merged": context_data['metadata'].get('total_blocks', 0)
+                "blocks_merged": context_metadata.get('total_blocks', 0),
+                "retrieval_degraded": retrieval_stats.get('degraded'),
+                "retrieval": retrieval_stats
             },
             latency_ms=latency_ms
         )
@@ -195,3 +218,68 @@ async def retrieve_sources(request: SourceRequest) -> SourceResponse:
                 detail=str(e)
             ).dict()
         )
+
+
+@router.post("/sources/batch", response_model=BatchSourceResponse)
+async def retrieve_sources_batch(request: BatchSourceRequest) -> BatchSourceResponse:
+    """
+    Retrieve sources for many queries in one call (evaluation runs, question lists).
+    
+    All queries are embedded in one request, searched in FAISS as one query
+    matrix and run through FTS5 in parallel; see HybridRetriever.aretrieve_batch.
+    
+    Args:
+        request: BatchSourceRequest with queries and shared options
+        
+    Returns:
+        BatchSourceResponse with one SourceResponse per query, in request order
+    """
+    start_time = time.time()
+    
+    try:
+        retriever = get_retriever()
+        retrieval_stats = {}
+        batch_results = await retriever.aretrieve_batch(
+            request.queries,
+            top_k=request.max_results,
+            use_reranking=request.use_reranking,
+            filters=request.filters.dict(exclude_none=True) if request.filters else None,
+            fusion=request.fusion.dict(exclude_none=True) if request.fusion else None,
+            stats=retrieval_stats
+        )
+        responses = []
+        for query, search_results in zip(request.queries, batch_results):
+            evidence_items, context_metadata = _evidence_items(search_results, query) if search_results else ([], {})
+            responses.append(SourceResponse(
+                query=query,
+                sources=evidence_items,
+                metadata={
+                    "total_sources": len(evidence_items),
+                    "total_tokens": context_metadata.get('total_tokens', 0),
+                    "reranking_used": request.use_reranking,
+                    "blocks_merged": context_metadata.get('total_blocks', 0)
+                }
+                # No per-query latency: queries share one batch (see BatchSourceResponse.latency_ms)
+            ))
+        
+        return BatchSourceResponse(
+            results=responses,
+            metadata={
+                "total_queries": len(request.queries),
+                "reranking_used": request.use_reranking,
+                "retrieval": retrieval_stats
+            },
+            latency_ms=int((time.time() - start_time) * 1000)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in retrieve_sources_batch: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=ErrorResponse(
+                error="Internal server error",
+                detail=str(e)
+            ).dict()
+        )
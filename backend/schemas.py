@@ -1,17 +1,35 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
 
 # ============================================================================
 # Request Schemas
 # ============================================================================
 
+class SearchFilters(BaseModel):
+    """Metadata filters applied inside retrieval (all given facets must match)"""
+    doc_ids: Optional[List[str]] = None
+    doctypes: Optional[List[str]] = None  # e.g. ["budget"]
+    date_from: Optional[str] = None  # Inclusive, ISO date (YYYY-MM-DD)
+    date_to: Optional[str] = None  # Inclusive, ISO date (YYYY-MM-DD)
+
+
+class FusionOptions(BaseModel):
+    """Per-request overrides of the retriever's fusion settings"""
+    method: Optional[Literal["rrf", "minmax", "zscore"]] = None
+    bm25_weight: Optional[float] = None
+    faiss_weight: Optional[float] = None
+
+
 class AnswerRequest(BaseModel):
     """Request for answer generation"""
     prompt: str
     max_sources: Optional[int] = 15
     use_reranking: Optional[bool] = False  # Disabled by default for lightweight operation
     use_web_search: Optional[bool] = False  # Enable web search via OpenRouter :online models
+    filters: Optional[SearchFilters] = None
+    fusion: Optional[FusionOptions] = None
+    latency_budget_ms: Optional[float] = None  # Retrieval deadline (server default if None, 0 = unbounded)
 
 
 class SourceRequest(BaseModel):
@@ -19,6 +37,18 @@ class SourceRequest(BaseModel):
     query: str
     max_results: Optional[int] = 15
     use_reranking: Optional[bool] = False  # Disabled by default for lightweight operation
+    filters: Optional[SearchFilters] = None
+    fusion: Optional[FusionOptions] = None
+    latency_budget_ms: Optional[float] = None  # Retrieval deadline (server default if None, 0 = unbounded)
+
+
+class BatchSourceRequest(BaseModel):
+    """Request for source retrieval over many queries (evaluation runs, question lists)"""
+    queries: List[str] = Field(..., min_length=1, max_length=1000)
+    max_results: Optional[int] = 15
+    use_reranking: Optional[bool] = False
+    filters: Optional[SearchFilters] = None  # Shared by all queries
+    fusion: Optional[FusionOptions] = None  # Shared by all queries
 
 
 # ============================================================================
@@ -51,6 +81,13 @@ class SourceResponse(BaseModel):
     query: str
     sources: List[EvidenceItem]
     metadata: dict
+    latency_ms: Optional[int] = None  # Unset inside a BatchSourceResponse (only the batch is timed)
+
+
+class BatchSourceResponse(BaseModel):
+    """Response with retrieved sources per query, in request order"""
+    results: List[SourceResponse]
+    metadata: dict
     latency_ms: int
 
 
@@ -9,6 +9,8 @@ DATA_PATH = os.getenv("DATA_PATH", "./data/docs.json")
 
 # OpenAI configuration (for embeddings)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Vector space for retrieval: "openai" (OpenAI embeddings) or "local" (in-process ONNX model, no API key)
+VECTOR_SPACE = os.getenv("VECTOR_SPACE", "openai")
 
 # OpenRouter configuration (for LLM completions)
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
@@ -22,7 +24,7 @@ PORT = int(os.getenv("PORT", "8000"))
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
 
 # Validate required environment variables
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY environment variable is required")
+if VECTOR_SPACE == "openai" and not OPENAI_API_KEY:
+    raise ValueError("OPENAI_API_KEY environment variable is required (or set VECTOR_SPACE=local)")
 if not OPENROUTER_API_KEY:
     raise ValueError("OPENROUTER_API_KEY environment variable is required")
@@ -0,0 +1,14 @@
+"""
+Test setup: import backend modules the way the app does (from llm.x import ...).
+
+settings.py refuses to load without API keys; tests never call the APIs,
+so placeholder keys are set when none are configured.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
@@ -0,0 +1,55 @@
+"""
+Knapsack block packing (context_processor._knapsack) against brute force.
+"""
+
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from llm.context_processor import KNAPSACK_BUCKETS, _knapsack
+
+
+def brute_force(weights, values, capacity, max_items):
+    """Best total value over every subset of at most max_items items within capacity"""
+    best = 0.0
+    for size in range(1, max_items + 1):
+        for subset in combinations(range(len(weights)), size):
+            if sum(weights[i] for i in subset) <= capacity:
+                best = max(best, sum(values[i] for i in subset))
+    return best
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("capacity,max_items", [(300, 8), (700, 3), (1000, 5), (50, 2)])
+def test_knapsack_matches_brute_force(seed, capacity, max_items):
+    rng = np.random.default_rng(seed)
+    weights = rng.integers(40, 400, size=8)
+    values = rng.random(8)
+    assert capacity < KNAPSACK_BUCKETS  # One bucket per token: the DP is exact
+
+    chosen = _knapsack(weights, values, capacity, max_items)
+
+    assert chosen == sorted(set(chosen))
+    assert len(chosen) <= max_items
+    assert weights[chosen].sum() <= capacity
+    assert values[chosen].sum() == pytest.approx(brute_force(weights, values, capacity, max_items))
+
+
+def test_knapsack_bucketed_budget_never_overflows():
+    rng = np.random.default_rng(7)
+    weights = rng.integers(500, 6000, size=8)
+    values = rng.random(8)
+    capacity = 12000  # Above KNAPSACK_BUCKETS: weights are rounded up to buckets
+
+    chosen = _knapsack(weights, values, capacity, 4)
+
+    assert len(chosen) <= 4
+    assert weights[chosen].sum() <= capacity
+    # Rounding may lose a little value, never more than the exact optimum
+    assert values[chosen].sum() <= brute_force(weights, values, capacity, 4) + 1e-9
+
+
+def test_knapsack_takes_nothing_when_nothing_fits():
+    assert _knapsack(np.array([500, 800]), np.array([1.0, 2.0]), 100, 2) == []
+    assert _knapsack(np.array([10, 20]), np.array([1.0, 2.0]), 100, 0) == []
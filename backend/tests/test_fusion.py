@@ -0,0 +1,104 @@
+"""
+Rank fusion (fusion.fuse_runs) against a straightforward dict-based RRF / CombSUM.
+"""
+
+import numpy as np
+import pytest
+
+from llm.fusion import fuse_runs, fusion_columns
+
+
+def reference_fusion(runs, weights, method, top_k, rrf_k=60, higher_is_better=None):
+    """Plain-Python fusion: per-id sum of per-run contributions, ties by ascending id"""
+    higher_is_better = higher_is_better or [True] * len(runs)
+    fused = {}
+    contributions = []
+    for (ids, scores), weight, higher in zip(runs, weights, higher_is_better):
+        run = {}
+        values = [s if higher else -s for s in scores]
+        for rank, (chunk_id, value) in enumerate(zip(ids, values), start=1):
+            if method == 'rrf':
+                run[chunk_id] = weight / (rrf_k + rank)
+            elif method == 'minmax':
+                low, high = min(values), max(values)
+                run[chunk_id] = weight * ((value - low) / (high - low) if high > low else 1.0)
+            else:
+                mean = sum(values) / len(values)
+                std = (sum((v - mean) ** 2 for v in values) / len(values)) ** 0.5
+                run[chunk_id] = weight * ((value - mean) / std if std > 0 else 0.0)
+        for chunk_id, value in run.items():
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + value
+        contributions.append(run)
+    ranked = sorted(fused, key=lambda chunk_id: (-fused[chunk_id], chunk_id))[:top_k]
+    return ranked, [fused[i] for i in ranked], contributions
+
+
+def run(ids, scores=None):
+    scores = scores if scores is not None else [float(len(ids) - i) for i in range(len(ids))]
+    return np.array(ids, dtype=np.int64), np.array(scores, dtype=np.float64)
+
+
+RUNS = [
+    # BM25 (FTS5 bm25(): more negative is better) and vector similarity, with partial overlap
+    (run([10, 3, 7, 42, 5], [-9.5, -7.0, -6.5, -2.0, -1.0]), run([7, 11, 10, 99], [0.91, 0.80, 0.62, 0.40])),
+    # One branch empty: every hit is single-branch
+    (run([4, 2, 8]), run([])),
+    # Disjoint branches with identical rank positions: RRF ties broken by id
+    (run([30, 20]), run([25, 15])),
+    # Both branches return the same ids in opposite order: every fused score ties
+    (run([1, 2, 3]), run([3, 2, 1])),
+]
+
+
+@pytest.mark.parametrize("method", ['rrf', 'minmax', 'zscore'])
+@pytest.mark.parametrize("runs", RUNS)
+@pytest.mark.parametrize("weights", [(1.0, 1.0), (0.5, 2.0)])
+def test_fuse_runs_matches_reference(method, runs, weights):
+    higher = [False, True]
+    ids, scores, contributions = fuse_runs(runs, weights, method, top_k=200, higher_is_better=higher)
+    expected_ids, expected_scores, expected_runs = reference_fusion(
+        [(list(i), list(s)) for i, s in runs], weights, method, 200, higher_is_better=higher
+    )
+
+    assert ids.tolist() == expected_ids
+    assert scores == pytest.approx(expected_scores)
+    for contribution, expected in zip(contributions, expected_runs):
+        for chunk_id, value in zip(ids.tolist(), contribution):
+            if chunk_id in expected:
+                assert value == pytest.approx(expected[chunk_id])
+            else:
+                assert np.isnan(value)  # Single-branch hit: no contribution from this run
+
+
+def test_fuse_runs_top_k_cuts_and_exceeds_candidates():
+    runs = RUNS[0]
+    weights = (1.0, 1.0)
+    all_ids, _, _ = fuse_runs(runs, weights, 'rrf', top_k=200)
+    assert len(all_ids) == 7  # Union of both runs, k larger than the candidates
+
+    expected_ids, expected_scores, _ = reference_fusion([(list(i), list(s)) for i, s in runs], weights, 'rrf', 3)
+    ids, scores, contributions = fuse_runs(runs, weights, 'rrf', top_k=3)
+    assert ids.tolist() == expected_ids == all_ids[:3].tolist()
+    assert scores == pytest.approx(expected_scores)
+    assert all(len(c) == 3 for c in contributions)
+
+
+def test_fuse_runs_dual_hits_rank_first_under_rrf():
+    ids, scores, (bm25, faiss) = fuse_runs(RUNS[0], (1.0, 1.0), 'rrf', top_k=200)
+    # 10 and 7 are the only ids both branches found
+    assert set(ids[:2].tolist()) == {10, 7}
+    assert scores[0] == pytest.approx(bm25[0] + faiss[0])
+
+
+def test_fuse_runs_empty_and_unknown_method():
+    ids, scores, contributions = fuse_runs([run([]), run([])], (1.0, 1.0), 'rrf', top_k=10)
+    assert len(ids) == 0 and len(scores) == 0 and all(len(c) == 0 for c in contributions)
+    with pytest.raises(ValueError):
+        fuse_runs(RUNS[0], (1.0, 1.0), 'borda')
+
+
+def test_fusion_columns_names():
+    ids, scores, contributions = fuse_runs(RUNS[0], (1.0, 1.0), 'rrf', top_k=5)
+    columns = fusion_columns(scores, contributions, ['bm25_score', 'faiss_score'])
+    assert list(columns) == ['rrf_score', 'bm25_score', 'faiss_score']
+    assert columns['rrf_score'] is scores
@@ -0,0 +1,87 @@
+"""
+Chunk stitching (stitching.splice / overlap_length / page_spans).
+"""
+
+import pytest
+
+from llm.stitching import MIN_OVERLAP_CHARS, overlap_length, page_spans, splice
+
+PAGE = (
+    "The Program Executive Office manages acquisition programs. "
+    "Each program reports cost, schedule and performance every quarter. "
+    "Oversight boards review programs that breach their baselines. "
+    "Breaches above fifteen percent are reported to Congress."
+)
+
+
+def chunk(start, end, page=1, spans=True):
+    """Chunk of PAGE[start:end], with or without its recorded span"""
+    data = {'text': PAGE[start:end], 'page': page}
+    if spans:
+        data.update(char_start=start, char_end=end)
+    return data
+
+
+def test_overlap_length_longest_suffix_prefix():
+    left = "alpha beta gamma delta epsilon zeta eta"
+    right = "delta epsilon zeta eta theta iota kappa"
+    assert overlap_length(left, right) == len("delta epsilon zeta eta")
+    # Repeated patterns need the KMP failure links, not a single scan
+    assert overlap_length("x" * 10 + "abcabcabcabcabcabcabcab", "abcabcabcabcabcabcabcabd" * 2) == 23
+
+
+def test_overlap_length_ignores_short_or_missing_overlap():
+    assert overlap_length("the end of one chunk", "a different start entirely") == 0
+    short = "x" * (MIN_OVERLAP_CHARS - 1)
+    assert overlap_length("abc " + short, short + " def") == 0
+    assert overlap_length("abc " + short, short + " def", min_overlap=5) == len(short)
+
+
+def test_splice_exact_span_overlap():
+    text, kept = splice([chunk(0, 130), chunk(100, 200), chunk(180, len(PAGE))])
+    assert text == PAGE
+    assert kept[0] == 1.0
+    assert kept[1] == pytest.approx(70 / 100)
+    assert kept[2] == pytest.approx((len(PAGE) - 200) / (len(PAGE) - 180))
+
+
+def test_splice_missing_spans_fall_back_to_text_overlap():
+    text, kept = splice([chunk(0, 130, spans=False), chunk(100, len(PAGE), spans=False)])
+    assert text == PAGE
+    assert kept[1] < 1.0
+    # A chunk with a span after one without also falls back
+    text, _ = splice([chunk(0, 130, spans=False), chunk(100, len(PAGE))])
+    assert text == PAGE
+
+
+def test_splice_no_overlap_joins_with_separator():
+    first, second = chunk(0, 58), chunk(59, 126)
+    text, kept = splice([first, second])
+    assert text == PAGE[:126]
+    assert kept == [1.0, 1.0]
+    # Same text without spans: nothing matches, so nothing is dropped
+    text, kept = splice([chunk(0, 58, spans=False), chunk(59, 126, spans=False)], separator=" | ")
+    assert text == PAGE[:58] + " | " + PAGE[59:126]
+    assert kept == [1.0, 1.0]
+
+
+def test_splice_other_page_is_never_spliced():
+    text, kept = splice([chunk(0, 130), chunk(100, 200, page=2)])
+    assert text == PAGE[:130] + " " + PAGE[100:200]
+    assert kept == [1.0, 1.0]
+
+
+def test_splice_chunk_contained_in_previous():
+    text, kept = splice([chunk(0, 150), chunk(20, 90), chunk(140, 200)])
+    assert text == PAGE[:200]
+    assert kept[1] == 0.0
+    # The contained chunk does not move the page end back: the next one skips from 150
+    assert kept[2] == pytest.approx(50 / 60)
+
+
+def test_page_spans_recovers_and_keeps_recorded_spans():
+    texts = [PAGE[0:130], PAGE[100:200], PAGE[180:]]
+    assert page_spans(texts) == [(0, 130), (100, 200), (180, len(PAGE))]
+    # A recorded span is kept and anchors the missing one after it
+    assert page_spans(texts, known=[None, (100, 200), None]) == [(0, 130), (100, 200), (180, len(PAGE))]
+    assert page_spans(texts, known=[None, (500, 600), None])[2] == (580, 580 + len(texts[2]))
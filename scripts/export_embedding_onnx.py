@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Export a sentence-embedding model to int8 ONNX for the local vector space.
+
+Loads a Hugging Face encoder (e.g. sentence-transformers/all-MiniLM-L6-v2),
+exports it to ONNX with dynamic batch/sequence axes (output: token
+embeddings, pooled at runtime), applies dynamic int8 quantization and
+writes tokenizer.json plus local_embedding.json (model, pooling,
+dimension) next to it. Build the matching index with:
+
+    python scripts/ingestion/ingest_to_db.py --vector-spaces openai local
+
+and query it with RetrievalConfig(vector_space="local") / VECTOR_SPACE=local.
+
+Usage:
+    python scripts/export_embedding_onnx.py
+    python scripts/export_embedding_onnx.py --model BAAI/bge-small-en-v1.5 --pooling cls
+"""
+
+import json
+import time
+import argparse
+from pathlib import Path
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_OUTPUT = Path(__file__).parent.parent / "models" / "embedding-onnx"
+
+
+def export_onnx(model_name: str, output_dir: Path, pooling: str = "mean", opset: int = 17) -> Path:
+    """
+    Export the fp32 encoder to output_dir/model.onnx and save tokenizer.json
+    and local_embedding.json.
+
+    Args:
+        model_name: Hugging Face model id or local path
+        output_dir: Export directory
+        pooling: 'mean' or 'cls', as the model was trained
+        opset: ONNX opset version
+
+    Returns:
+        Path to the fp32 ONNX file
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    print(f"Loading {model_name}...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    # tokenizer.json is all the runtime needs (tokenizers library, no transformers)
+    tokenizer.save_pretrained(str(output_dir))
+    if not (output_dir / "tokenizer.json").exists():
+        raise RuntimeError(f"{model_name} has no fast tokenizer (tokenizer.json) - pick another model")
+    config = {'model': model_name, 'pooling': pooling, 'dimension': model.config.hidden_size}
+    (output_dir / "local_embedding.json").write_text(json.dumps(config, indent=2))
+
+    sample = tokenizer(["example passage"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    onnx_path = output_dir / "model.onnx"
+    print(f"Exporting to {onnx_path} (opset {opset})...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(onnx_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+    return onnx_path
+
+
+def quantize(onnx_path: Path) -> Path:
+    """Dynamic int8 quantization of the weights (activations quantized at runtime)"""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantized_path = onnx_path.with_name("model_quantized.onnx")
+    print(f"Quantizing to {quantized_path}...")
+    quantize_dynamic(str(onnx_path), str(quantized_path), weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+def benchmark(output_dir: Path, num_queries: int, max_length: int):
+    """Time single-query embedding with the quantized export"""
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent.parent / "backend" / "llm"))
+    from local_embeddings import LocalEmbedder
+
+    embedder = LocalEmbedder(output_dir, max_length=max_length)
+    start = time.perf_counter()
+    embedder.load()
+    print(f"\nLoad: {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    query = "what funding did the committee recommend for the program"
+    embedder.embed_query(query)  # Warm-up
+    start = time.perf_counter()
+    for _ in range(num_queries):
+        embedder.embed_query(query)
+    print(f"Query embedding: {(time.perf_counter() - start) * 1000 / num_queries:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a sentence-embedding model to quantized ONNX")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Hugging Face sentence-embedding model")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Export directory")
+    parser.add_argument("--pooling", choices=["mean", "cls"], default="mean",
+                        help="How the model pools token embeddings (mean for MiniLM, cls for BGE)")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--keep-fp32", action="store_true", help="Keep model.onnx next to the quantized model")
+    parser.add_argument("--benchmark", type=int, default=100, metavar="N",
+                        help="Queries for the post-export latency check (0 to skip)")
+    parser.add_argument("--max-length", type=int, default=256)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("EMBEDDING MODEL ONNX EXPORT")
+    print("=" * 70)
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    onnx_path = export_onnx(args.model, args.output, args.pooling, args.opset)
+    quantized_path = quantize(onnx_path)
+    if not args.keep_fp32:
+        onnx_path.unlink()
+
+    size_mb = quantized_path.stat().st_size / (1024 * 1024)
+    print(f"\n[OK] {quantized_path} ({size_mb:.1f} MiB)")
+
+    if args.benchmark:
+        benchmark(args.output, args.benchmark, args.max_length)
+
+
+if __name__ == "__main__":
+    main()
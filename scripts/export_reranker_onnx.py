@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Export a cross-encoder reranker to int8 ONNX for CPU inference.
+
+Loads a Hugging Face sequence-classification cross-encoder, exports it to
+ONNX with dynamic batch/sequence axes, applies dynamic int8 quantization
+(onnxruntime.quantization) and writes the tokenizer next to it. The
+retriever picks the export up from models/reranker-onnx and loads it on
+the first reranked request.
+
+Usage:
+    python scripts/export_reranker_onnx.py
+    python scripts/export_reranker_onnx.py --model BAAI/bge-reranker-base --output models/reranker-onnx
+"""
+
+import time
+import argparse
+from pathlib import Path
+
+DEFAULT_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+DEFAULT_OUTPUT = Path(__file__).parent.parent / "models" / "reranker-onnx"
+
+
+def export_onnx(model_name: str, output_dir: Path, opset: int = 17) -> Path:
+    """
+    Export the fp32 model to output_dir/model.onnx and save tokenizer.json.
+
+    Args:
+        model_name: Hugging Face model id or local path
+        output_dir: Export directory
+        opset: ONNX opset version
+
+    Returns:
+        Path to the fp32 ONNX file
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    print(f"Loading {model_name}...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    # tokenizer.json is all the runtime needs (tokenizers library, no transformers)
+    tokenizer.save_pretrained(str(output_dir))
+    if not (output_dir / "tokenizer.json").exists():
+        raise RuntimeError(f"{model_name} has no fast tokenizer (tokenizer.json) - pick another model")
+
+    sample = tokenizer([("example query", "example passage")], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    onnx_path = output_dir / "model.onnx"
+    print(f"Exporting to {onnx_path} (opset {opset})...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(onnx_path),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+    return onnx_path
+
+
+def quantize(onnx_path: Path) -> Path:
+    """Dynamic int8 quantization of the weights (activations quantized at runtime)"""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantized_path = onnx_path.with_name("model_quantized.onnx")
+    print(f"Quantizing to {quantized_path}...")
+    quantize_dynamic(str(onnx_path), str(quantized_path), weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+def benchmark(output_dir: Path, num_candidates: int, max_length: int, batch_size: int):
+    """Time one rerank of num_candidates passages with the quantized export"""
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent.parent / "backend" / "llm"))
+    from reranker import ONNXReranker
+
+    reranker = ONNXReranker(output_dir, max_length=max_length, batch_size=batch_size)
+    start = time.perf_counter()
+    reranker.load()
+    print(f"\nLoad: {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    passage = "The committee reviewed the appropriations request and recommended funding. "
+    pairs = [("what funding did the committee recommend", passage * (1 + i % 6)) for i in range(num_candidates)]
+    reranker.predict(pairs[:2])  # Warm-up
+    start = time.perf_counter()
+    reranker.predict(pairs)
+    print(f"Rerank {num_candidates} candidates: {(time.perf_counter() - start) * 1000:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a cross-encoder reranker to quantized ONNX")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Hugging Face cross-encoder model")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Export directory")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--keep-fp32", action="store_true", help="Keep model.onnx next to the quantized model")
+    parser.add_argument("--benchmark", type=int, default=48, metavar="N",
+                        help="Candidates for the post-export latency check (0 to skip)")
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("RERANKER ONNX EXPORT")
+    print("=" * 70)
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    onnx_path = export_onnx(args.model, args.output, args.opset)
+    quantized_path = quantize(onnx_path)
+    if not args.keep_fp32:
+        onnx_path.unlink()
+
+    size_mb = quantized_path.stat().st_size / (1024 * 1024)
+    print(f"\n[OK] {quantized_path} ({size_mb:.1f} MiB)")
+
+    if args.benchmark:
+        benchmark(args.output, args.benchmark, args.max_length, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
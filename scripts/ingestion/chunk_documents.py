@@ -70,7 +70,8 @@ class TextChunker:
             page: Page number
             
         Yields:
-            Chunk dictionaries with metadata
+            Chunk dictionaries with metadata, including the chunk's character
+            span (char_start, char_end) within the cleaned page text
         """
         # Clean up text
         text = self._clean_text(text)
@@ -81,16 +82,25 @@ class TextChunker:
         # Split into sentences for better chunk boundaries
         sentences = self._split_sentences(text)
         
+        # Offset of each sentence in the cleaned page text
+        starts = []
+        offset = 0
+        for sentence in sentences:
+            offset = text.index(sentence, offset)
+            starts.append(offset)
+            offset += len(sentence)
+        
         chunk_num = 1
         current_chunk = []
         current_tokens = 0
         
-        for sentence in sentences:
+        for i, sentence in enumerate(sentences):
             sentence_tokens = self.count_tokens(sentence)
             
             # If adding this sentence would exceed target, finalize current chunk
             if current_tokens + sentence_tokens > self.target_tokens and current_chunk:
-                yield self._create_chunk(current_chunk, doc_id, page, chunk_num)
+                span = (starts[i - len(current_chunk)], starts[i - 1] + len(sentences[i - 1]))
+                yield self._create_chunk(current_chunk, doc_id, page, chunk_num, span)
                 chunk_num += 1
                 
                 # Start new chunk with overlap from previous chunk
@@ -101,7 +111,8 @@ class TextChunker:
         
         # Don't forget the last chunk
         if current_chunk:
-            yield self._create_chunk(current_chunk, doc_id, page, chunk_num)
+            span = (starts[len(sentences) - len(current_chunk)], starts[-1] + len(sentences[-1]))
+            yield self._create_chunk(current_chunk, doc_id, page, chunk_num, span)
     
     def _clean_text(self, text: str) -> str:
         """Clean up text formatting"""
@@ -117,8 +128,8 @@ class TextChunker:
         sentences = re.split(r'(?<=[.!?])\s+', text)
         return [s.strip() for s in sentences if s.strip()]
     
-    def _create_chunk(self, sentences: List[str], doc_id: str, page: int, chunk_num: int) -> Dict[str, Any]:
-        """Create chunk dictionary"""
+    def _create_chunk(self, sentences: List[str], doc_id: str, page: int, chunk_num: int, span: tuple) -> Dict[str, Any]:
+        """Create chunk dictionary (span: character offsets of the chunk in the page text)"""
         text = ' '.join(sentences)
         chunk_id = f"{doc_id}:p{page:03d}:c{chunk_num:03d}"
         
@@ -127,7 +138,9 @@ class TextChunker:
             'text': text,
             'tokens': self.count_tokens(text),
             'page': page,
-            'chunk_num': chunk_num
+            'chunk_num': chunk_num,
+            'char_start': span[0],
+            'char_end': span[1]
         }
     
     def _create_overlap_chunk(self, previous_chunk: List[str]) -> tuple[List[str], int]:
@@ -202,6 +215,8 @@ def process_transcribed_file(
                 'section_path': [],  # TODO: Could parse headings later
                 'text': chunk_data['text'],
                 'tokens': chunk_data['tokens'],
+                'char_start': chunk_data['char_start'],  # Span in the page text, for overlap-free merging
+                'char_end': chunk_data['char_end'],
                 'is_table': False,  # TODO: Could detect tables later
                 'table_html': None
             }
@@ -3,23 +3,49 @@
 Ingestion script for Pryzm project.
 
 Performs complete data ingestion pipeline:
-1. Load chunks.jsonl into SQLite database
-2. Generate OpenAI embeddings for all chunks
-3. Build FAISS vector index for semantic search
+1. Load chunks.jsonl into SQLite database (with a SimHash fingerprint, token
+   count and character span within the page per chunk)
+2. Generate embeddings for all chunks (OpenAI, and/or a local ONNX model)
+3. Build one FAISS vector index per vector space for semantic search
+
+FAISS ids are chunks.rowid, so a re-run with --incremental only embeds
+new or changed chunks; chunks no longer in chunks.jsonl are deleted from
+the database and their vectors dropped.
+
+--vector-spaces local builds data/vectors.local.faiss with the local
+sentence-embedding model (scripts/export_embedding_onnx.py) next to the
+OpenAI index; the backend picks one with RetrievalConfig.vector_space.
+
+--truncate-dim N indexes only the first N (re-normalized) dimensions of
+each embedding (Matryoshka); the backend rescores candidates against the
+full vectors kept in embeddings.npy.
 """
 
 import json
 import sqlite3
 import pickle
+import argparse
 import os
+import sys
 from pathlib import Path
 from typing import List, Dict, Any, Iterator
 import numpy as np
 import faiss
+import tiktoken
 from openai import OpenAI
 from tqdm import tqdm
 from dotenv import load_dotenv
 
+# Index construction helpers shared with the backend (numpy/faiss only)
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "backend" / "llm"))
+from vector_index import (
+    build_faiss_index, truncate_embeddings, binary_codes,
+    DEFAULT_INDEX_FACTORY, DEFAULT_EF_CONSTRUCTION, DEFAULT_SEARCH_PARAMS, VECTOR_SPACE_FILES
+)
+from local_embeddings import LocalEmbedder
+from fingerprint import simhash
+from stitching import page_spans
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -30,6 +56,8 @@ class DatabaseIngestor:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.conn = None
+        self.changed_rowids = set()  # Existing chunks whose text changed during ingest_chunks()
+        self.deleted_rowids = set()  # Chunks removed by ingest_chunks(prune=True)
         
     def connect(self):
         """Connect to database"""
@@ -37,11 +65,34 @@ class DatabaseIngestor:
         self.conn.execute("PRAGMA journal_mode=WAL;")
         self.conn.row_factory = sqlite3.Row
         print(f"Connected to database: {self.db_path}")
+        self._migrate()
+    
+    def _migrate(self):
+        """Add columns introduced after the database was created"""
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(chunks)")}
+        if "simhash" not in columns:
+            self.conn.execute("ALTER TABLE chunks ADD COLUMN simhash INTEGER")
+            self.conn.commit()
+            print("[OK] Added chunks.simhash column")
+        if "token_count" not in columns:
+            self.conn.execute("ALTER TABLE chunks ADD COLUMN token_count INTEGER")
+            self.conn.commit()
+            print("[OK] Added chunks.token_count column")
+        if "char_start" not in columns:
+            self.conn.execute("ALTER TABLE chunks ADD COLUMN char_start INTEGER")
+            self.conn.execute("ALTER TABLE chunks ADD COLUMN char_end INTEGER")
+            self.conn.commit()
+            print("[OK] Added chunks.char_start / char_end columns")
         
-    def ingest_chunks(self, chunks_path: str) -> int:
+    def ingest_chunks(self, chunks_path: str, prune: bool = False) -> int:
         """
         Load chunks from JSONL file into SQLite.
         
+        Args:
+            chunks_path: chunks.jsonl to load
+            prune: Delete stored chunks whose chunk_id is not in the file
+                   (their rowids are kept in deleted_rowids)
+        
         Returns:
             Number of chunks inserted
         """
@@ -50,11 +101,13 @@ class DatabaseIngestor:
         chunks_inserted = 0
         batch = []
         batch_size = 500
+        chunk_ids = set()
         
         with open(chunks_path, 'r', encoding='utf-8') as f:
             for line in tqdm(f, desc="Reading chunks", unit=" chunks"):
                 chunk = json.loads(line)
                 batch.append(chunk)
+                chunk_ids.add(chunk["chunk_id"])
                 
                 if len(batch) >= batch_size:
                     self._insert_batch(batch)
@@ -68,15 +121,127 @@ class DatabaseIngestor:
         
         self.conn.commit()
         print(f"[OK] Inserted {chunks_inserted} chunks into database")
+        if prune:
+            self.delete_missing(chunk_ids)
+        self.backfill_simhashes()
+        self.backfill_token_counts()
+        self.backfill_spans()
         return chunks_inserted
     
+    def delete_missing(self, chunk_ids: set):
+        """Delete chunks that are not in chunk_ids (removed from chunks.jsonl)"""
+        rowids = [
+            row["rowid"] for row in self.conn.execute("SELECT rowid, chunk_id FROM chunks")
+            if row["chunk_id"] not in chunk_ids
+        ]
+        if not rowids:
+            return
+        self.conn.executemany("DELETE FROM chunks WHERE rowid = ?", [(rowid,) for rowid in rowids])
+        self.conn.commit()
+        self.deleted_rowids.update(rowids)
+        self.changed_rowids.difference_update(rowids)
+        print(f"[OK] Deleted {len(rowids)} chunks no longer in the chunks file")
+    
+    def backfill_simhashes(self, batch_size: int = 500):
+        """Fingerprint chunks stored before chunks.simhash existed"""
+        rows = self.conn.execute("SELECT rowid, text FROM chunks WHERE simhash IS NULL").fetchall()
+        if not rows:
+            return
+        for i in tqdm(range(0, len(rows), batch_size), desc="Fingerprinting chunks"):
+            self.conn.executemany(
+                "UPDATE chunks SET simhash = ? WHERE rowid = ?",
+                [(simhash(row["text"]), row["rowid"]) for row in rows[i:i + batch_size]]
+            )
+        self.conn.commit()
+        print(f"[OK] Computed SimHash fingerprints for {len(rows)} existing chunks")
+    
+    def backfill_token_counts(self, batch_size: int = 500):
+        """Count tokens for chunks stored without one (older chunks.jsonl or database)"""
+        rows = self.conn.execute("SELECT rowid, text FROM chunks WHERE token_count IS NULL").fetchall()
+        if not rows:
+            return
+        # Same encoding as TextChunker and the backend's ContextProcessor
+        encoding = tiktoken.get_encoding("cl100k_base")
+        for i in tqdm(range(0, len(rows), batch_size), desc="Counting tokens"):
+            batch = rows[i:i + batch_size]
+            counts = encoding.encode_ordinary_batch([row["text"] for row in batch])
+            self.conn.executemany(
+                "UPDATE chunks SET token_count = ? WHERE rowid = ?",
+                [(len(tokens), row["rowid"]) for tokens, row in zip(counts, batch)]
+            )
+        self.conn.commit()
+        print(f"[OK] Counted tokens for {len(rows)} existing chunks")
+    
+    def backfill_spans(self):
+        """
+        Recover page character spans for chunks stored without one.
+        
+        Chunks of a page are laid out in chunk order, each starting where its
+        overlap with the previous chunk begins (stitching.page_spans). Spans
+        recorded at chunking time are never overwritten; they anchor the
+        missing spans that follow them on the page.
+        """
+        pages = self.conn.execute(
+            "SELECT DISTINCT doc_id, page FROM chunks WHERE char_start IS NULL OR char_end IS NULL"
+        ).fetchall()
+        if not pages:
+            return
+        updates = []
+        for page in tqdm(pages, desc="Recovering chunk spans"):
+            rows = self.conn.execute(
+                "SELECT rowid, text, char_start, char_end FROM chunks WHERE doc_id = ? AND page = ? ORDER BY chunk_id",
+                (page["doc_id"], page["page"])
+            ).fetchall()
+            known = [
+                (row["char_start"], row["char_end"])
+                if row["char_start"] is not None and row["char_end"] is not None else None
+                for row in rows
+            ]
+            spans = page_spans([row["text"] for row in rows], known=known)
+            updates.extend(
+                (start, end, row["rowid"])
+                for (start, end), row, recorded in zip(spans, rows, known) if recorded is None
+            )
+        self.conn.executemany("UPDATE chunks SET char_start = ?, char_end = ? WHERE rowid = ?", updates)
+        self.conn.commit()
+        print(f"[OK] Recovered character spans for {len(updates)} chunks on {len(pages)} pages")
+    
     def _insert_batch(self, batch: List[Dict[str, Any]]):
-        """Insert a batch of chunks into database"""
+        """
+        Insert or update a batch of chunks.
+        
+        Existing chunk_ids are updated in place (an upsert, not INSERT OR REPLACE)
+        so their rowid - which is also their FAISS id - stays the same.
+        """
+        # Remember existing chunks whose text changes, so their vectors get re-embedded
+        placeholders = ",".join("?" * len(batch))
+        new_texts = {chunk["chunk_id"]: chunk["text"] for chunk in batch}
+        for row in self.conn.execute(
+            f"SELECT rowid, chunk_id, text FROM chunks WHERE chunk_id IN ({placeholders})",
+            list(new_texts.keys())
+        ):
+            if row["text"] != new_texts[row["chunk_id"]]:
+                self.changed_rowids.add(row["rowid"])
+        
         self.conn.executemany(
-            """INSERT OR REPLACE INTO chunks
+            """INSERT INTO chunks
                (chunk_id, doc_id, doc_title, source_url, date, doctype, page, 
-                section_path, text, is_table)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                section_path, text, is_table, simhash, token_count, char_start, char_end)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(chunk_id) DO UPDATE SET
+                   doc_id = excluded.doc_id,
+                   doc_title = excluded.doc_title,
+                   source_url = excluded.source_url,
+                   date = excluded.date,
+                   doctype = excluded.doctype,
+                   page = excluded.page,
+                   section_path = excluded.section_path,
+                   text = excluded.text,
+                   is_table = excluded.is_table,
+                   simhash = excluded.simhash,
+                   token_count = excluded.token_count,
+                   char_start = excluded.char_start,
+                   char_end = excluded.char_end""",
             [
                 (
                     chunk["chunk_id"],
@@ -88,7 +253,11 @@ class DatabaseIngestor:
                     chunk["page"],
                     json.dumps(chunk.get("section_path", [])),
                     chunk["text"],
-                    int(chunk.get("is_table", False))
+                    int(chunk.get("is_table", False)),
+                    simhash(chunk["text"]),
+                    chunk.get("tokens"),  # Counted by TextChunker; NULLs are backfilled
+                    chunk.get("char_start"),  # Span in the page text; NULLs are backfilled
+                    chunk.get("char_end")
                 )
                 for chunk in batch
             ]
@@ -97,7 +266,7 @@ class DatabaseIngestor:
     def get_all_chunks(self) -> List[Dict[str, Any]]:
         """Retrieve all chunks from database"""
         cursor = self.conn.execute(
-            "SELECT chunk_id, text FROM chunks ORDER BY rowid"
+            "SELECT rowid, chunk_id, text FROM chunks ORDER BY rowid"
         )
         return [dict(row) for row in cursor.fetchall()]
     
@@ -120,20 +289,20 @@ class EmbeddingGenerator:
         self, 
         chunks: List[Dict[str, Any]], 
         batch_size: int = 2048
-    ) -> tuple[List[str], np.ndarray]:
+    ) -> tuple[np.ndarray, np.ndarray]:
         """
         Generate embeddings for all chunks.
         
         Args:
-            chunks: List of chunk dictionaries with 'chunk_id' and 'text'
+            chunks: List of chunk dictionaries with 'rowid' and 'text'
             batch_size: Number of texts to send in each API call
             
         Returns:
-            Tuple of (chunk_ids, embedding_matrix)
+            Tuple of (rowids, embedding_matrix)
         """
         print(f"\nGenerating embeddings for {len(chunks)} chunks...")
         
-        chunk_ids = [c["chunk_id"] for c in chunks]
+        rowids = np.array([c["rowid"] for c in chunks], dtype=np.int64)
         texts = [c["text"] for c in chunks]
         
         all_embeddings = []
@@ -160,94 +329,375 @@ class EmbeddingGenerator:
         embedding_matrix = np.array(all_embeddings, dtype='float32')
         
         print(f"[OK] Generated embeddings with shape: {embedding_matrix.shape}")
-        return chunk_ids, embedding_matrix
+        return rowids, embedding_matrix
+
+
+class LocalEmbeddingGenerator:
+    """Handles embedding generation with the local ONNX model (no API calls)"""
+    
+    def __init__(self, model_dir: Path, max_length: int = 256, num_threads: int = None):
+        self.embedder = LocalEmbedder(model_dir, max_length=max_length, num_threads=num_threads)
+        if self.embedder.model_path is None:
+            raise FileNotFoundError(
+                f"No local embedding model in {model_dir} - run scripts/export_embedding_onnx.py"
+            )
+        self.embedder.load()
+        print(f"Initialized local embedding model: {self.embedder.model_name}")
+    
+    def generate_embeddings(
+        self,
+        chunks: List[Dict[str, Any]],
+        batch_size: int = 2048
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Generate embeddings for all chunks.
+        
+        Args:
+            chunks: List of chunk dictionaries with 'rowid' and 'text'
+            batch_size: Number of texts per progress step (the model batches internally)
+            
+        Returns:
+            Tuple of (rowids, embedding_matrix)
+        """
+        print(f"\nGenerating local embeddings for {len(chunks)} chunks...")
+        
+        rowids = np.array([c["rowid"] for c in chunks], dtype=np.int64)
+        texts = [c["text"] for c in chunks]
+        
+        batches = []
+        for i in tqdm(range(0, len(texts), batch_size), desc="Generating embeddings"):
+            batches.append(self.embedder.embed(texts[i:i + batch_size]))
+        embedding_matrix = np.vstack(batches).astype('float32', copy=False)
+        
+        print(f"[OK] Generated embeddings with shape: {embedding_matrix.shape}")
+        return rowids, embedding_matrix
 
 
 class FAISSIndexBuilder:
     """Handles FAISS index creation"""
     
-    def __init__(self):
-        pass
+    def __init__(self, vector_space: str = "openai"):
+        # Each vector space has its own index and stored embeddings
+        self.index_name, self.embeddings_name = VECTOR_SPACE_FILES[vector_space]
         
     def build_index(
         self, 
         embeddings: np.ndarray,
-        use_hnsw: bool = True
+        rowids: np.ndarray,
+        factory: str = DEFAULT_INDEX_FACTORY,
+        ef_construction: int = DEFAULT_EF_CONSTRUCTION,
+        search_params: str = DEFAULT_SEARCH_PARAMS,
+        dimension: int = 0
     ) -> faiss.Index:
         """
         Build FAISS index from embeddings.
         
+        The index is wrapped in IndexIDMap2 with ids = chunks.rowid, so search
+        labels join directly to chunks/fts_chunks rows and no mapping file is needed.
+        
         Args:
-            embeddings: Numpy array of embeddings (N x D)
-            use_hnsw: If True, use HNSW index (approximate), else use flat index (exact)
+            embeddings: Numpy array of embeddings (N x D), normalized in place
+            rowids: chunks.rowid of each embedding row
+            factory: FAISS factory string, e.g. "HNSW32,Flat" (approximate),
+                     "HNSW32,SQ8", "OPQ64,IVF1024,PQ64" (quantized) or "Flat" (exact)
+            ef_construction: HNSW efConstruction (higher = better graph, slower build)
+            search_params: Search-time parameters stored in the index, e.g. "efSearch=100"
+            dimension: Index only the first N dimensions, re-normalized (0 = all)
             
         Returns:
             FAISS index
         """
         print(f"\nBuilding FAISS index for {embeddings.shape[0]} vectors...")
+        print(f"Using index factory '{factory}' ({search_params or 'default search params'})")
         
-        dimension = embeddings.shape[1]
+        # Normalize embeddings for cosine similarity (the full vectors are stored for rescoring)
+        faiss.normalize_L2(embeddings)
+        index_vectors = truncate_embeddings(embeddings, dimension)
+        if index_vectors is not embeddings:
+            print(f"Truncating to {index_vectors.shape[1]} of {embeddings.shape[1]} dimensions")
+        index = build_faiss_index(
+            index_vectors, rowids, factory,
+            ef_construction=ef_construction,
+            search_params=search_params
+        )
         
-        if use_hnsw:
-            # HNSW index - faster search, approximate results
-            print("Using HNSW index (approximate nearest neighbor)")
-            index = faiss.IndexHNSWFlat(dimension, 32)  # 32 = M parameter
-            index.hnsw.efConstruction = 200  # Higher = better quality, slower build
-            index.hnsw.efSearch = 100  # Higher = better search quality
-        else:
-            # Flat index - exact search, slower for large datasets
-            print("Using Flat index (exact nearest neighbor)")
-            index = faiss.IndexFlatIP(dimension)  # IP = Inner Product (cosine similarity)
+        print(f"[OK] FAISS index built with {index.ntotal} vectors")
+        return index
+    
+    def add_vectors(self, index: faiss.Index, embeddings: np.ndarray, rowids: np.ndarray):
+        """
+        Add embeddings to an id-mapped index under their chunks.rowid.
         
-        # Normalize embeddings for cosine similarity
+        Args:
+            index: IndexIDMap2 from build_index() or load_index()
+            embeddings: Numpy array of embeddings (N x D), normalized in place
+            rowids: chunks.rowid of each embedding row
+        """
+        # Normalize embeddings for cosine similarity; a truncated index gets the leading dimensions
         faiss.normalize_L2(embeddings)
+        index_vectors = truncate_embeddings(embeddings, index.d)
+        index.add_with_ids(index_vectors, np.ascontiguousarray(rowids, dtype=np.int64))
+    
+    def remove_vectors(self, index: faiss.Index, rowids: np.ndarray) -> bool:
+        """
+        Remove vectors by chunks.rowid.
         
-        # Add vectors to index
-        index.add(embeddings)
+        Args:
+            index: IndexIDMap2 from build_index() or load_index()
+            rowids: chunks.rowid values to remove
+            
+        Returns:
+            False if the underlying index type does not support removal (e.g. HNSW)
+        """
+        try:
+            removed = index.remove_ids(faiss.IDSelectorBatch(np.ascontiguousarray(rowids, dtype=np.int64)))
+        except RuntimeError as e:
+            print(f"[WARN] Index does not support removal: {e}")
+            return False
+        print(f"[OK] Removed {removed} vectors from FAISS index")
+        return True
+    
+    def load_index(self, output_dir: str) -> faiss.Index:
+        """
+        Load a previously saved index for an incremental update.
         
-        print(f"[OK] FAISS index built with {index.ntotal} vectors")
+        Args:
+            output_dir: Directory containing the index (vectors.faiss for OpenAI)
+            
+        Returns:
+            FAISS index, or None if missing or not id-mapped (needs a full build)
+        """
+        index_path = Path(output_dir) / self.index_name
+        if not index_path.exists():
+            print(f"[WARN] No existing index at {index_path}, doing a full build")
+            return None
+        index = faiss.read_index(str(index_path))
+        if not isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            print(f"[WARN] Existing index has no chunk ids (built before rowid ids), doing a full build")
+            return None
+        print(f"[OK] Loaded existing index with {index.ntotal} vectors")
         return index
     
-    def save_index(self, index: faiss.Index, chunk_ids: List[str], output_dir: str):
+    def save_index(self, index: faiss.Index, output_dir: str):
         """
-        Save FAISS index and chunk ID mapping.
+        Save FAISS index.
+        
+        Ids are stored inside the index (chunks.rowid), so no separate
+        chunk mapping is written.
         
         Args:
             index: FAISS index
-            chunk_ids: List of chunk IDs in same order as index
             output_dir: Directory to save files
         """
         output_path = Path(output_dir)
         
         # Save FAISS index
-        index_path = output_path / "vectors.faiss"
+        index_path = output_path / self.index_name
         faiss.write_index(index, str(index_path))
         print(f"[OK] Saved FAISS index to {index_path}")
+    
+    def save_embeddings(
+        self,
+        embeddings: np.ndarray,
+        rowids: np.ndarray,
+        output_dir: str,
+        drop_rowids: np.ndarray = None
+    ):
+        """
+        Store normalized embeddings so indexes can be rebuilt or tuned offline
+        (scripts/ingestion/tune_index.py) without calling the embeddings API,
+        plus their sign-bit codes (.bin.npy) and a float16 copy (.f16.npy)
+        for the backend's binary vector search.
+        
+        Args:
+            embeddings: Normalized embeddings (N x D)
+            rowids: chunks.rowid of each row
+            output_dir: Directory to save files
+            drop_rowids: If set, update the stored arrays instead of replacing them:
+                         rows with these rowids are dropped, then the new rows appended
+        """
+        output_path = Path(output_dir)
+        embeddings_path = output_path / f"{self.embeddings_name}.npy"
+        ids_path = output_path / f"{self.embeddings_name}.ids.npy"
+        
+        if drop_rowids is not None:
+            if not (embeddings_path.exists() and ids_path.exists()):
+                print(f"[WARN] No stored embeddings to update; run a full ingestion before tuning")
+                return
+            old_embeddings = np.load(embeddings_path)
+            old_rowids = np.load(ids_path)
+            keep = ~np.isin(old_rowids, drop_rowids)
+            if len(rowids):
+                embeddings = np.vstack([old_embeddings[keep], embeddings])
+            else:
+                embeddings = old_embeddings[keep]
+            rowids = np.concatenate([old_rowids[keep], rowids])
         
-        # Save chunk ID mapping
-        mapping_path = output_path / "vectors.pkl"
-        with open(mapping_path, 'wb') as f:
-            pickle.dump(chunk_ids, f)
-        print(f"[OK] Saved chunk ID mapping to {mapping_path}")
+        np.save(embeddings_path, np.ascontiguousarray(embeddings, dtype='float32'))
+        np.save(ids_path, np.ascontiguousarray(rowids, dtype=np.int64))
+        print(f"[OK] Saved {len(rowids)} embeddings to {embeddings_path}")
+        
+        codes_path = output_path / f"{self.embeddings_name}.bin.npy"
+        np.save(codes_path, binary_codes(embeddings))
+        np.save(output_path / f"{self.embeddings_name}.f16.npy", np.ascontiguousarray(embeddings, dtype=np.float16))
+        print(f"[OK] Saved binary codes to {codes_path}")
+
+
+def convert_legacy_mapping(db_path: Path, output_dir: Path):
+    """
+    Convert a legacy vectors.pkl (pickled chunk_id list) into vectors.ids.npy.
+    
+    Args:
+        db_path: Path to corpus.db
+        output_dir: Directory containing vectors.pkl
+    """
+    legacy_path = output_dir / "vectors.pkl"
+    with open(legacy_path, 'rb') as f:
+        chunk_ids = pickle.load(f)
+    
+    conn = sqlite3.connect(str(db_path))
+    rowid_by_chunk_id = dict(
+        (chunk_id, rowid) for rowid, chunk_id in conn.execute("SELECT rowid, chunk_id FROM chunks")
+    )
+    conn.close()
+    
+    # Chunks missing from the database map to -1 and are skipped at query time
+    rowids = np.array([rowid_by_chunk_id.get(chunk_id, -1) for chunk_id in chunk_ids], dtype=np.int64)
+    missing = int((rowids < 0).sum())
+    if missing:
+        print(f"[WARN] {missing} chunk_ids from {legacy_path.name} are not in the database")
+    
+    mapping_path = output_dir / "vectors.ids.npy"
+    np.save(mapping_path, rowids)
+    print(f"[OK] Converted {len(rowids)} mappings from {legacy_path} to {mapping_path}")
+
+
+def build_vector_space(
+    vector_space: str,
+    chunks: List[Dict[str, Any]],
+    changed_rowids: set,
+    deleted_rowids: set,
+    args: argparse.Namespace,
+    output_dir: Path
+) -> tuple[int, faiss.Index]:
+    """
+    Embed chunks and build (or incrementally update) one vector space's index.
+    
+    Args:
+        vector_space: Key of VECTOR_SPACE_FILES
+        chunks: All chunks in the database ('rowid' and 'text')
+        changed_rowids: Rowids inserted or modified by this ingestion run
+        deleted_rowids: Rowids deleted by this ingestion run
+        args: Parsed command-line arguments
+        output_dir: Directory for the index and stored embeddings
+        
+    Returns:
+        Tuple of (number of chunks embedded, FAISS index)
+    """
+    index_builder = FAISSIndexBuilder(vector_space)
+    index = index_builder.load_index(str(output_dir)) if args.incremental else None
+    stale = None
+    
+    if index is not None and args.truncate_dim and index.d != args.truncate_dim:
+        print(f"[WARN] Existing index has {index.d} dimensions, --truncate-dim is {args.truncate_dim}; doing a full build")
+        index = None
+    
+    if index is not None:
+        # Only vectors for deleted or changed chunks need removing
+        indexed_rowids = faiss.vector_to_array(index.id_map)
+        db_rowids = np.array([c["rowid"] for c in chunks], dtype=np.int64)
+        changed = np.array(sorted(changed_rowids), dtype=np.int64)
+        deleted = np.array(sorted(deleted_rowids), dtype=np.int64)
+        stale = np.union1d(np.union1d(np.setdiff1d(indexed_rowids, db_rowids), deleted), changed)
+        stale = np.intersect1d(stale, indexed_rowids)
+        if len(stale) and not index_builder.remove_vectors(index, stale):
+            print("[WARN] Falling back to a full rebuild")
+            index = None
+            stale = None
+        else:
+            pending = set(np.union1d(np.setdiff1d(db_rowids, indexed_rowids), changed).tolist())
+            chunks = [c for c in chunks if c["rowid"] in pending]
+            print(f"Incremental update: {len(stale)} vectors removed, {len(chunks)} chunks to embed")
+    
+    # Task 2: Generate embeddings
+    print("\n" + "=" * 70)
+    print(f"TASK 2: Generating {vector_space} embeddings")
+    print("-" * 70)
+    if vector_space == "local":
+        embedder = LocalEmbeddingGenerator(args.local_model, args.local_max_length, args.local_threads)
+    else:
+        embedder = EmbeddingGenerator(model="text-embedding-3-small")
+    if chunks:
+        rowids, embeddings = embedder.generate_embeddings(chunks, batch_size=256)
+    else:
+        rowids, embeddings = np.empty(0, dtype=np.int64), np.empty((0, 0), dtype='float32')
+    
+    # Task 3: Build FAISS index
+    print("\n" + "=" * 70)
+    print(f"TASK 3: Building FAISS vector index ({index_builder.index_name})")
+    print("-" * 70)
+    if index is None:
+        index = index_builder.build_index(
+            embeddings, rowids,
+            factory=args.index_factory,
+            ef_construction=args.ef_construction,
+            search_params=args.search_params,
+            dimension=args.truncate_dim
+        )
+    elif len(rowids):
+        index_builder.add_vectors(index, embeddings, rowids)
+    index_builder.save_index(index, str(output_dir))
+    index_builder.save_embeddings(
+        embeddings, rowids, str(output_dir),
+        drop_rowids=None if stale is None else np.union1d(stale, rowids)
+    )
+    
+    return embeddings.shape[0], index
 
 
 def main():
     """Main ingestion pipeline"""
+    parser = argparse.ArgumentParser(description="Ingest chunks, embed them and build the FAISS index")
+    parser.add_argument("--convert-mapping", action="store_true",
+                        help="Only convert an existing vectors.pkl into vectors.ids.npy")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Update the existing index: embed new/changed chunks, drop deleted ones")
+    parser.add_argument("--index-factory", default=DEFAULT_INDEX_FACTORY,
+                        help=f"FAISS factory string (default: {DEFAULT_INDEX_FACTORY})")
+    parser.add_argument("--ef-construction", type=int, default=DEFAULT_EF_CONSTRUCTION,
+                        help="HNSW efConstruction")
+    parser.add_argument("--search-params", default=DEFAULT_SEARCH_PARAMS,
+                        help=f"Search parameters stored in the index (default: {DEFAULT_SEARCH_PARAMS})")
+    parser.add_argument("--truncate-dim", type=int, default=0,
+                        help="Index only the first N embedding dimensions, e.g. 256 or 512 (0 = all; "
+                             "pick N with scripts/ingestion/tune_index.py --dims)")
+    parser.add_argument("--vector-spaces", nargs="+", choices=sorted(VECTOR_SPACE_FILES), default=["openai"],
+                        help="Indexes to build: openai (vectors.faiss) and/or local (vectors.local.faiss)")
+    parser.add_argument("--local-model", type=Path,
+                        default=Path(__file__).parent.parent.parent / "models" / "embedding-onnx",
+                        help="Local ONNX embedding model (scripts/export_embedding_onnx.py)")
+    parser.add_argument("--local-max-length", type=int, default=256, help="Tokens per chunk for the local model")
+    parser.add_argument("--local-threads", type=int, default=None, help="onnxruntime intra-op threads")
+    args = parser.parse_args()
+    
+    # Paths
+    project_root = Path(__file__).parent.parent.parent
+    chunks_path = project_root / "data" / "chunks.jsonl"
+    db_path = project_root / "data" / "corpus.db"
+    output_dir = project_root / "data"
+    
+    if args.convert_mapping:
+        convert_legacy_mapping(db_path, output_dir)
+        return
     
     # Check for OpenAI API key
-    if not os.getenv("OPENAI_API_KEY"):
+    if "openai" in args.vector_spaces and not os.getenv("OPENAI_API_KEY"):
         print("[ERROR] OPENAI_API_KEY environment variable not set")
         print("Please set your OpenAI API key:")
         print("  export OPENAI_API_KEY='your-api-key'  # Linux/Mac")
         print("  $env:OPENAI_API_KEY='your-api-key'   # Windows PowerShell")
         return
     
-    # Paths
-    project_root = Path(__file__).parent.parent.parent
-    chunks_path = project_root / "data" / "chunks.jsonl"
-    db_path = project_root / "data" / "corpus.db"
-    output_dir = project_root / "data"
-    
     print("=" * 70)
     print("PRYZM INGESTION PIPELINE")
     print("=" * 70)
@@ -261,27 +711,18 @@ def main():
     print("-" * 70)
     db_ingestor = DatabaseIngestor(str(db_path))
     db_ingestor.connect()
-    chunks_inserted = db_ingestor.ingest_chunks(str(chunks_path))
+    chunks_inserted = db_ingestor.ingest_chunks(str(chunks_path), prune=args.incremental)
     
     # Retrieve all chunks for embedding generation
     print("\nRetrieving chunks from database...")
     chunks = db_ingestor.get_all_chunks()
     print(f"Retrieved {len(chunks)} chunks")
     
-    # Task 2: Generate OpenAI embeddings
-    print("\n" + "=" * 70)
-    print("TASK 2: Generating OpenAI embeddings")
-    print("-" * 70)
-    embedder = EmbeddingGenerator(model="text-embedding-3-small")
-    chunk_ids, embeddings = embedder.generate_embeddings(chunks, batch_size=256)
-    
-    # Task 3: Build FAISS index
-    print("\n" + "=" * 70)
-    print("TASK 3: Building FAISS vector index")
-    print("-" * 70)
-    index_builder = FAISSIndexBuilder()
-    index = index_builder.build_index(embeddings, use_hnsw=True)
-    index_builder.save_index(index, chunk_ids, str(output_dir))
+    results = {}
+    for vector_space in args.vector_spaces:
+        results[vector_space] = build_vector_space(
+            vector_space, chunks, db_ingestor.changed_rowids, db_ingestor.deleted_rowids, args, output_dir
+        )
     
     # Cleanup
     db_ingestor.close()
@@ -291,8 +732,8 @@ def main():
     print("INGESTION COMPLETE!")
     print("=" * 70)
     print(f"[OK] {chunks_inserted} chunks in SQLite database")
-    print(f"[OK] {embeddings.shape[0]} embeddings generated")
-    print(f"[OK] FAISS index with {index.ntotal} vectors")
+    for vector_space, (num_embedded, index) in results.items():
+        print(f"[OK] {vector_space}: {num_embedded} embeddings generated, FAISS index with {index.ntotal} vectors")
     print("\nYour search system is ready to use!")
     print("=" * 70)
 
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Measure FAISS index load time and per-process memory, mmap vs in-memory.
+
+Spawns N worker processes that each load vectors.faiss and the id mapping
+(as uvicorn workers on one node would) and reports load time, RSS and
+PSS/shared memory per worker from /proc/self/smaps_rollup.
+
+Usage:
+    python scripts/ingestion/measure_index_memory.py --workers 4
+"""
+
+import sys
+import time
+import argparse
+import multiprocessing as mp
+from pathlib import Path
+
+# Import vector_index directly (the llm package needs API keys at import time)
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "backend" / "llm"))
+
+from vector_index import read_faiss_index, load_id_mapping
+
+
+def read_smaps_rollup() -> dict:
+    """Return Rss/Pss/Shared_* values (KiB) for the current process"""
+    values = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].rstrip(':') in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty"):
+                    values[parts[0].rstrip(':')] = int(parts[1])
+    except FileNotFoundError:
+        pass  # Not Linux
+    return values
+
+
+def worker(faiss_path: str, mapping_path: str, mmap: bool, ready, done, results):
+    """Load the index, touch every page with a search, then report memory"""
+    start = time.perf_counter()
+    index, mode = read_faiss_index(Path(faiss_path), mmap=mmap)
+    # Id-mapped indexes carry chunks.rowid labels; only older indexes have a mapping file
+    mapping = load_id_mapping(Path(mapping_path)) if Path(mapping_path).exists() else []
+    load_ms = (time.perf_counter() - start) * 1000
+
+    # One search so the mapped pages are actually faulted in
+    import numpy as np
+    query = np.random.rand(1, index.d).astype('float32')
+    index.search(query, 10)
+    _ = int(mapping[-1]) if len(mapping) else None
+
+    ready.wait()  # Measure while all workers hold the index
+    memory = read_smaps_rollup()
+    results.put({'mode': mode, 'load_ms': load_ms, **memory})
+    done.wait()
+
+
+def measure(faiss_path: Path, mapping_path: Path, workers: int, mmap: bool):
+    """Run one measurement round and print a summary"""
+    ctx = mp.get_context("spawn")
+    ready = ctx.Barrier(workers + 1)
+    done = ctx.Barrier(workers + 1)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(str(faiss_path), str(mapping_path), mmap, ready, done, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    ready.wait()
+    rows = [results.get() for _ in range(workers)]
+    done.wait()
+    for p in procs:
+        p.join()
+
+    label = "mmap" if mmap else "memory"
+    print(f"\n[{label}] {workers} workers (load mode: {rows[0]['mode']})")
+    print(f"  {'worker':>6}  {'load_ms':>9}  {'rss_mib':>9}  {'pss_mib':>9}  {'shared_mib':>10}")
+    for i, row in enumerate(rows):
+        shared = row.get('Shared_Clean', 0) + row.get('Shared_Dirty', 0)
+        print(f"  {i:>6}  {row['load_ms']:>9.1f}  {row.get('Rss', 0) / 1024:>9.1f}  "
+              f"{row.get('Pss', 0) / 1024:>9.1f}  {shared / 1024:>10.1f}")
+    total_pss = sum(row.get('Pss', 0) for row in rows) / 1024
+    print(f"  Total PSS across workers: {total_pss:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare mmap vs in-memory FAISS loading across processes")
+    parser.add_argument("--workers", type=int, default=4, help="Number of worker processes")
+    parser.add_argument("--faiss", type=Path, default=project_root / "data" / "vectors.faiss")
+    parser.add_argument("--mapping", type=Path, default=project_root / "data" / "vectors.ids.npy",
+                        help="Position mapping (ignored if missing)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("FAISS INDEX MEMORY: MMAP VS IN-MEMORY")
+    print("=" * 70)
+    measure(args.faiss, args.mapping, args.workers, mmap=True)
+    measure(args.faiss, args.mapping, args.workers, mmap=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,6 @@ Tests:
 """
 
 import sqlite3
-import pickle
 import numpy as np
 import faiss
 from pathlib import Path
@@ -23,7 +22,7 @@ load_dotenv()
 project_root = Path(__file__).parent.parent.parent
 db_path = project_root / "data" / "corpus.db"
 faiss_path = project_root / "data" / "vectors.faiss"
-mapping_path = project_root / "data" / "vectors.pkl"
+mapping_path = project_root / "data" / "vectors.ids.npy"
 
 print("=" * 70)
 print("TESTING INGESTION")
@@ -78,10 +77,13 @@ print("-" * 70)
 index = faiss.read_index(str(faiss_path))
 print(f"FAISS index loaded: {index.ntotal} vectors, {index.d} dimensions")
 
-# Load chunk ID mapping
-with open(mapping_path, 'rb') as f:
-    chunk_ids = pickle.load(f)
-print(f"Chunk ID mapping loaded: {len(chunk_ids)} entries")
+# FAISS labels are chunks.rowid for id-mapped indexes; older indexes need the position mapping
+if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+    rowids = None
+    print("FAISS labels are chunks.rowid")
+else:
+    rowids = np.load(str(mapping_path), mmap_mode='r')
+    print(f"Id mapping loaded: {len(rowids)} entries")
 
 # Generate query embedding
 client = OpenAI()
@@ -107,14 +109,13 @@ conn = sqlite3.connect(str(db_path))
 conn.row_factory = sqlite3.Row
 
 for i, (idx, score) in enumerate(zip(indices[0], distances[0])):
-    chunk_id = chunk_ids[idx]
     cursor = conn.execute(
-        "SELECT doc_title, page FROM chunks WHERE chunk_id = ?",
-        (chunk_id,)
+        "SELECT chunk_id, doc_title, page FROM chunks WHERE rowid = ?",
+        (int(idx if rowids is None else rowids[idx]),)
     )
     row = cursor.fetchone()
     if row:
-        print(f"  {i+1}. {chunk_id}")
+        print(f"  {i+1}. {row['chunk_id']}")
         print(f"     Doc: {row['doc_title']}, Page: {row['page']}")
         print(f"     Similarity Score: {score:.4f}")
 
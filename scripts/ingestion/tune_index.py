@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Offline FAISS index tuner for Pryzm project.
+
+Rebuilds candidate indexes from the embeddings stored by ingestion
+(data/embeddings.npy) and sweeps build and search parameters:
+- HNSW: M, efConstruction, efSearch (Flat and SQ8 storage)
+- IVF: nlist, nprobe (Flat, PQ and OPQ+PQ storage)
+
+- Matryoshka truncation (--dims): each configuration is also built over
+  the first N re-normalized dimensions, with the candidates rescored
+  against the full vectors as the retriever does
+
+Each configuration is scored on recall@k against exact full-dimension
+search, p50/p99 single-query latency (including rescoring) and index
+memory, and summarized per dimension. The cheapest configuration (least
+memory, then lowest p99) that meets the recall target is recommended, and
+can be written to data/vectors.faiss with --write (data/vectors.local.faiss
+with --vector-space local).
+
+Usage:
+    python scripts/ingestion/tune_index.py --recall 0.95 --k 120
+    python scripts/ingestion/tune_index.py --factories "HNSW32,SQ8" "IVF1024,PQ64" --write
+    python scripts/ingestion/tune_index.py --dims 256 512 1536 --factories "HNSW32,Flat"
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+import numpy as np
+import faiss
+
+# Index construction helpers shared with the backend (numpy/faiss only)
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "backend" / "llm"))
+from vector_index import (
+    build_faiss_index, apply_search_params, index_memory_bytes, truncate_embeddings, FullVectors, VECTOR_SPACE_FILES
+)
+
+
+def default_factories(n: int, dimension: int) -> List[str]:
+    """
+    Candidate factory strings sized for the corpus.
+
+    Args:
+        n: Number of vectors
+        dimension: Vector dimension
+
+    Returns:
+        Factory strings to evaluate
+    """
+    # ~4*sqrt(N) lists, with at least 39 training points per centroid
+    nlist = max(1, min(int(4 * np.sqrt(n)), n // 39))
+    # PQ sub-quantizers must divide the dimension; 8 bits each
+    pq_m = next(m for m in (64, 48, 32, 16, 8, 4, 2, 1) if dimension % m == 0 and m <= dimension)
+
+    factories = ["HNSW16,Flat", "HNSW32,Flat", "HNSW32,SQ8", f"IVF{nlist},Flat", f"IVF{nlist},SQ8"]
+    if n >= 256 * 39:  # PQ codebooks need enough training points
+        factories += [f"IVF{nlist},PQ{pq_m}", f"OPQ{pq_m},IVF{nlist},PQ{pq_m}"]
+    return factories
+
+
+def search_grid(factory: str) -> List[str]:
+    """Search-time parameter strings to sweep for a factory"""
+    if factory.startswith("HNSW"):
+        return [f"efSearch={ef}" for ef in (16, 32, 64, 128, 256, 512)]
+    if "IVF" in factory:
+        return [f"nprobe={p}" for p in (1, 2, 4, 8, 16, 32, 64, 128)]
+    return [""]
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Mean fraction of the exact top-k found in the approximate top-k"""
+    hits = [len(np.intersect1d(f[f >= 0], t)) for f, t in zip(found, truth)]
+    return float(np.mean(hits)) / truth.shape[1]
+
+
+def measure(
+    index: faiss.Index,
+    queries: np.ndarray,
+    k: int,
+    truth: np.ndarray,
+    full_vectors: Optional[FullVectors] = None,
+    rescore_factor: float = 2.0
+) -> Dict[str, float]:
+    """
+    Run queries one at a time (as the retriever does) and collect metrics.
+
+    Args:
+        index: Index with search parameters applied
+        queries: Full-dimension query vectors (Q x D)
+        k: Results per query
+        truth: Exact top-k labels (Q x k)
+        full_vectors: Set for a truncated index: the top k * rescore_factor
+                      candidates are rescored against these
+        rescore_factor: Candidate multiplier for rescoring
+
+    Returns:
+        Dict with recall, p50_ms, p99_ms
+    """
+    truncated = index.d < queries.shape[1]
+    search_queries = truncate_embeddings(queries, index.d)
+    search_k = max(k, int(np.ceil(k * rescore_factor))) if truncated and full_vectors is not None else k
+    labels = np.empty((len(queries), k), dtype=np.int64)
+    latencies = np.empty(len(queries))
+    threads = faiss.omp_get_max_threads()
+    faiss.omp_set_num_threads(1)  # Single-query latency, like one retrieval request
+    try:
+        for i in range(len(queries)):
+            start = time.perf_counter()
+            scores, found = index.search(search_queries[i:i + 1], search_k)
+            if search_k > k:
+                scores, found = full_vectors.rescore(queries[i:i + 1], found, scores, k)
+            latencies[i] = (time.perf_counter() - start) * 1000
+            labels[i] = found[0, :k]
+    finally:
+        faiss.omp_set_num_threads(threads)
+    return {
+        'recall': recall_at_k(labels, truth),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99))
+    }
+
+
+def tune(
+    embeddings: np.ndarray,
+    rowids: np.ndarray,
+    factories: List[str],
+    ef_constructions: List[int],
+    k: int,
+    num_queries: int,
+    train_size: Optional[int],
+    dims: Optional[List[int]] = None,
+    rescore_factor: float = 2.0
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate every (dimension, factory, efConstruction, search params) combination.
+
+    Queries are sampled from the corpus itself; ground truth is exact
+    inner-product search over all full-dimension vectors.
+
+    Returns:
+        One result dict per configuration
+    """
+    sample = np.random.RandomState(42).choice(len(embeddings), min(num_queries, len(embeddings)), replace=False)
+    queries = np.ascontiguousarray(embeddings[np.sort(sample)])
+    k = min(k, len(embeddings))
+
+    exact = faiss.IndexIDMap2(faiss.IndexFlatIP(embeddings.shape[1]))
+    exact.add_with_ids(embeddings, rowids)
+    _, truth = exact.search(queries, k)
+    full_vectors = FullVectors(embeddings, rowids)
+
+    full_dim = embeddings.shape[1]
+    results = []
+    for dimension in sorted({min(d, full_dim) for d in (dims or [full_dim])}):
+        index_vectors = truncate_embeddings(embeddings, dimension)
+        for factory in factories:
+            builds = ef_constructions if factory.startswith("HNSW") else [None]
+            for ef_construction in builds:
+                start = time.perf_counter()
+                index = build_faiss_index(
+                    index_vectors, rowids, factory,
+                    ef_construction=ef_construction or 0,
+                    search_params="",
+                    train_size=train_size
+                )
+                build_s = time.perf_counter() - start
+                memory_mb = index_memory_bytes(index) / (1024 * 1024)
+                label = factory if ef_construction is None else f"{factory} (efC={ef_construction})"
+                print(f"\n{label} @ {dimension}d: built in {build_s:.1f}s, {memory_mb:.1f} MiB")
+
+                for params in search_grid(factory):
+                    apply_search_params(index, params)
+                    metrics = measure(index, queries, k, truth, full_vectors, rescore_factor)
+                    results.append({
+                        'dimension': dimension,
+                        'factory': factory,
+                        'ef_construction': ef_construction,
+                        'search_params': params,
+                        'memory_mb': memory_mb,
+                        'build_s': build_s,
+                        **metrics
+                    })
+                    print(f"  {params or '-':<14} recall@{k}={metrics['recall']:.4f}  "
+                          f"p50={metrics['p50_ms']:.2f}ms  p99={metrics['p99_ms']:.2f}ms")
+    return results
+
+
+def summarize_dimensions(results: List[Dict[str, Any]], recall_target: float, k: int):
+    """Print the best recall and the cheapest passing configuration for each dimension"""
+    print("\nPER-DIMENSION SUMMARY")
+    print("-" * 70)
+    for dimension in sorted({r['dimension'] for r in results}):
+        rows = [r for r in results if r['dimension'] == dimension]
+        top = max(rows, key=lambda r: r['recall'])
+        line = f"{dimension:>5}d  best recall@{k}={top['recall']:.4f}"
+        best = pick_cheapest(rows, recall_target)
+        if best is not None:
+            line += (f"  cheapest passing: {best['factory']} {best['search_params'] or '-'} "
+                     f"p50={best['p50_ms']:.2f}ms p99={best['p99_ms']:.2f}ms {best['memory_mb']:.1f} MiB")
+        else:
+            line += "  (no configuration meets the target)"
+        print(line)
+
+
+def pick_cheapest(results: List[Dict[str, Any]], recall_target: float) -> Optional[Dict[str, Any]]:
+    """Least memory, then lowest p99 latency, among configs meeting the recall target"""
+    passing = [r for r in results if r['recall'] >= recall_target]
+    if not passing:
+        return None
+    return min(passing, key=lambda r: (round(r['memory_mb'], 1), r['p99_ms']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep FAISS index configurations over stored embeddings")
+    project_root = Path(__file__).parent.parent.parent
+    parser.add_argument("--data-dir", type=Path, default=project_root / "data")
+    parser.add_argument("--vector-space", choices=sorted(VECTOR_SPACE_FILES), default="openai",
+                        help="Which stored embeddings to tune (openai or local)")
+    parser.add_argument("--factories", nargs="+", help="Factory strings to evaluate (default: sized for the corpus)")
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[100, 200], help="HNSW efConstruction values")
+    parser.add_argument("--k", type=int, default=120, help="Recall cutoff (RetrievalConfig.faiss_top_k)")
+    parser.add_argument("--recall", type=float, default=0.95, help="Recall@k target")
+    parser.add_argument("--queries", type=int, default=500, help="Number of sampled queries")
+    parser.add_argument("--train-size", type=int, default=100_000, help="Max training vectors for IVF/PQ/OPQ")
+    parser.add_argument("--dims", type=int, nargs="+",
+                        help="Index dimensions to evaluate, e.g. 256 512 1536 (default: full dimension only)")
+    parser.add_argument("--rescore-factor", type=float, default=2.0,
+                        help="Candidates rescored at full dimension per result (RetrievalConfig.rescore_factor)")
+    parser.add_argument("--write", action="store_true", help="Save the recommended index (vectors.faiss or vectors.local.faiss)")
+    args = parser.parse_args()
+
+    index_name, embeddings_name = VECTOR_SPACE_FILES[args.vector_space]
+    embeddings_path = args.data_dir / f"{embeddings_name}.npy"
+    if not embeddings_path.exists():
+        print(f"[ERROR] {embeddings_path} not found - run scripts/ingestion/ingest_to_db.py first")
+        return
+    embeddings = np.ascontiguousarray(np.load(embeddings_path), dtype='float32')
+    rowids = np.load(args.data_dir / f"{embeddings_name}.ids.npy")
+
+    factories = args.factories or default_factories(len(embeddings), embeddings.shape[1])
+
+    print("=" * 70)
+    print("FAISS INDEX TUNING")
+    print("=" * 70)
+    print(f"Vectors: {embeddings.shape[0]} x {embeddings.shape[1]} ({args.vector_space} space)")
+    print(f"Factories: {', '.join(factories)}")
+    print(f"Target: recall@{args.k} >= {args.recall}")
+    if args.dims:
+        print(f"Dimensions: {', '.join(map(str, args.dims))} (rescore factor {args.rescore_factor:g})")
+
+    results = tune(embeddings, rowids, factories, args.ef_construction, args.k, args.queries, args.train_size,
+                   args.dims, args.rescore_factor)
+
+    print("\n" + "=" * 70)
+    summarize_dimensions(results, args.recall, args.k)
+    print("\n" + "=" * 70)
+    best = pick_cheapest(results, args.recall)
+    if best is None:
+        top = max(results, key=lambda r: r['recall'])
+        print(f"[WARN] No configuration reached recall {args.recall}; best was {top['recall']:.4f} "
+              f"({top['factory']}, {top['search_params']})")
+        return
+
+    print("RECOMMENDED CONFIGURATION")
+    print("-" * 70)
+    print(f"Dimension:      {best['dimension']}")
+    print(f"Factory:        {best['factory']}")
+    if best['ef_construction'] is not None:
+        print(f"efConstruction: {best['ef_construction']}")
+    print(f"Search params:  {best['search_params'] or '-'}")
+    print(f"Recall@{args.k}:     {best['recall']:.4f}")
+    print(f"Latency:        p50={best['p50_ms']:.2f}ms  p99={best['p99_ms']:.2f}ms")
+    print(f"Memory:         {best['memory_mb']:.1f} MiB")
+    print("\nApply with --write, or on the next ingestion with:")
+    ef_flag = f" --ef-construction {best['ef_construction']}" if best['ef_construction'] is not None else ""
+    extra_flags = f" --vector-spaces {args.vector_space}" if args.vector_space != "openai" else ""
+    if best['dimension'] < embeddings.shape[1]:
+        extra_flags += f" --truncate-dim {best['dimension']}"
+    print(f"  python scripts/ingestion/ingest_to_db.py{extra_flags} --index-factory \"{best['factory']}\"{ef_flag} "
+          f"--search-params \"{best['search_params']}\"")
+
+    if args.write:
+        index = build_faiss_index(
+            truncate_embeddings(embeddings, best['dimension']), rowids, best['factory'],
+            ef_construction=best['ef_construction'] or 0,
+            search_params=best['search_params'],
+            train_size=args.train_size
+        )
+        index_path = args.data_dir / index_name
+        faiss.write_index(index, str(index_path))
+        print(f"\n[OK] Saved recommended index to {index_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -42,10 +42,27 @@ def init_database(db_path: Path = DB_PATH, reset: bool = False):
             page INTEGER,
             section_path TEXT,        -- JSON string of headings
             text TEXT NOT NULL,
-            is_table INTEGER DEFAULT 0
+            is_table INTEGER DEFAULT 0,
+            simhash INTEGER,          -- 64-bit SimHash of text (near-duplicate detection)
+            token_count INTEGER,      -- cl100k_base tokens in text
+            char_start INTEGER,       -- Span of text within the page text (overlap-free merging)
+            char_end INTEGER
         )
     """)
     
+    # Migrate databases created before chunks.simhash / token_count / char spans existed
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(chunks)")}
+    if "simhash" not in columns:
+        print("Adding chunks.simhash column...")
+        cursor.execute("ALTER TABLE chunks ADD COLUMN simhash INTEGER")
+    if "token_count" not in columns:
+        print("Adding chunks.token_count column...")
+        cursor.execute("ALTER TABLE chunks ADD COLUMN token_count INTEGER")
+    if "char_start" not in columns:
+        print("Adding chunks.char_start / char_end columns...")
+        cursor.execute("ALTER TABLE chunks ADD COLUMN char_start INTEGER")
+        cursor.execute("ALTER TABLE chunks ADD COLUMN char_end INTEGER")
+    
     # Create FTS5 virtual table for full-text search (BM25)
     print("Creating FTS5 index...")
     cursor.execute("""